@@ -11,6 +11,7 @@ from __future__ import annotations
 import itertools
 from typing import Iterable, Sequence, TypeVar
 
+from gaphor.core.modeling.query import one_of
 from gaphor.UML.uml import (
     Artifact,
     Association,
@@ -132,9 +133,7 @@ def get_stereotypes(element: Element) -> list[Stereotype]:
     names = {c.__name__ for c in cls.__mro__ if issubclass(c, Element)}
 
     # find stereotypes that extend element class
-    classes: Iterable[Class] = model.select(  # type: ignore[assignment]
-        lambda e: isinstance(e, Class) and e.name in names
-    )
+    classes: Iterable[Class] = model.query(Class, name=one_of(*names))
 
     stereotypes = list({ext.ownedEnd.type for cls in classes for ext in cls.extension})
 
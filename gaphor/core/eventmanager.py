@@ -1,32 +1,125 @@
 """Event Manager."""
 
-from collections import deque
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from time import perf_counter
 
 from generic.event import Event, Handler
 from generic.event import Manager as _Manager
 
 from gaphor.abc import Service
+from gaphor.event import TransactionBegin, TransactionCommit, TransactionRollback
 
 
-def event_handler(*event_types):
+def event_handler(*event_types, batch=False):
     """Mark a function/method as an event handler for a particular type of
-    event."""
+    event.
+
+    Batch handlers are called with a list of events. Events emitted
+    within a transaction are delivered when the transaction ends.
+    """
 
     def wrapper(func):
         func.__event_types__ = event_types
+        if batch:
+            func.__event_batch__ = True
         return func
 
     return wrapper
 
 
+def coalesce(events: list[Event]) -> list[Event]:
+    """Remove events that are superseded by a later event.
+
+    Events can define a ``coalesce_key``, normally the element and the
+    property that changed. Of all events with the same key, only the last
+    one is kept.
+    """
+    keys = [getattr(event, "coalesce_key", None) for event in events]
+    last = {key: n for n, key in enumerate(keys) if key is not None}
+    return [
+        event
+        for n, (event, key) in enumerate(zip(events, keys))
+        if key is None or last[key] == n
+    ]
+
+
+@dataclass
+class HandlerStats:
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+
+class EventProfile:
+    """Timing of event handlers.
+
+    Calls, cumulative time and maximum time are recorded per handler and
+    event type. Times include events handled by priority handlers while
+    the handler runs. The queue depth is the largest number of events
+    waiting to be handled; nesting is the deepest level of ``handle()``
+    calls from within handlers.
+    """
+
+    def __init__(self) -> None:
+        self.stats: defaultdict[tuple[str, str], HandlerStats] = defaultdict(
+            HandlerStats
+        )
+        self.max_queue_depth = 0
+        self.max_nesting = 0
+
+    def record(self, handler: Handler, event_type: str, duration: float) -> None:
+        stats = self.stats[
+            (getattr(handler, "__qualname__", None) or repr(handler), event_type)
+        ]
+        stats.calls += 1
+        stats.total += duration
+        stats.max = max(stats.max, duration)
+
+    def report(self, limit: int = 30) -> str:
+        """A table of the handlers that took most time."""
+        lines = [
+            f"{'calls':>8} {'total (ms)':>11} {'max (ms)':>9}  handler (event)",
+        ]
+        lines.extend(
+            f"{stats.calls:>8} {stats.total * 1000:>11.1f} {stats.max * 1000:>9.1f}  {handler} ({event_type})"
+            for (handler, event_type), stats in sorted(
+                self.stats.items(), key=lambda item: item[1].total, reverse=True
+            )[:limit]
+        )
+        lines.append(
+            f"max queue depth: {self.max_queue_depth}, max nesting: {self.max_nesting}"
+        )
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.report()
+
+
 class EventManager(Service):
-    """The Event Manager."""
+    """The Event Manager.
+
+    Handlers can be profiled with :meth:`start_profiling`, or by assigning
+    an :obj:`EventProfile` to ``profile`` on the class before event
+    managers are created. Profiled handlers are subscribed wrapped in a
+    function that times them.
+    """
+
+    profile: EventProfile | None = None
 
     def __init__(self) -> None:
         self._events = _Manager()
         self._priority = _Manager()
         self._queue: deque[Event] = deque()
         self._handling = False
+        self._batch_handlers: dict[Handler, tuple[type, ...]] = {}
+        self._batches: dict[Handler, list[Event]] = {}
+        self._in_transaction = False
+        self._nesting = 0
+        self._subscriptions: dict[Handler, _Manager] = {}
+        self._profiled: dict[Handler, Handler] = {}
 
     def shutdown(self) -> None:
         pass
@@ -36,8 +129,16 @@ class EventManager(Service):
 
         Handlers are triggered (executed) when specific events are
         emitted through the handle() method.
+
+        Batch handlers (``@event_handler(..., batch=True)``) receive a
+        list of events. Within a transaction events are collected, and
+        delivered coalesced (see :func:`coalesce`) when the transaction
+        is committed or rolled back.
         """
-        self._subscribe(handler, self._events)
+        if getattr(handler, "__event_batch__", False):
+            self._batch_handlers[handler] = self._event_types(handler)
+        else:
+            self._subscribe(handler, self._events)
 
     def priority_subscribe(self, handler: Handler) -> None:
         """Register a handler.
@@ -51,35 +152,120 @@ class EventManager(Service):
         self._subscribe(handler, self._priority)
 
     def _subscribe(self, handler: Handler, manager: _Manager) -> None:
-        event_types = getattr(handler, "__event_types__", None)
+        self._subscriptions[handler] = manager
+        if self.profile:
+            handler = self._profiled_handler(handler)
+        for et in self._event_types(handler):
+            manager.subscribe(handler, et)
+
+    def _profiled_handler(self, handler: Handler) -> Handler:
+        if profiled := self._profiled.get(handler):
+            return profiled
+
+        def profiled_handler(event: Event) -> None:
+            if not (profile := self.profile):
+                handler(event)
+                return
+            start = perf_counter()
+            try:
+                handler(event)
+            finally:
+                profile.record(handler, type(event).__name__, perf_counter() - start)
+
+        profiled_handler.__event_types__ = self._event_types(handler)  # type: ignore[attr-defined]
+        self._profiled[handler] = profiled_handler
+        return profiled_handler
+
+    def _event_types(self, handler: Handler) -> tuple[type, ...]:
+        event_types: tuple[type, ...] | None = getattr(handler, "__event_types__", None)
         if not event_types:
             raise Exception(f"No event types provided for function {handler}")
-
-        for et in event_types:
-            manager.subscribe(handler, et)
+        return event_types
 
     def unsubscribe(self, handler: Handler) -> None:
         """Unregister a previously registered handler."""
-        event_types = getattr(handler, "__event_types__", None)
-        if not event_types:
-            raise Exception(f"No event types provided for function {handler}")
+        subscribed = self._profiled.pop(handler, handler)
+        for et in self._event_types(handler):
+            self._priority.unsubscribe(subscribed, et)
+            self._events.unsubscribe(subscribed, et)
+        self._subscriptions.pop(handler, None)
+        self._batch_handlers.pop(handler, None)
+        self._batches.pop(handler, None)
 
-        for et in event_types:
-            self._priority.unsubscribe(handler, et)
-            self._events.unsubscribe(handler, et)
+    def start_profiling(self) -> EventProfile:
+        """Record handler timing for this event manager."""
+        self.profile = profile = EventProfile()
+        for handler, manager in self._subscriptions.items():
+            if handler not in self._profiled:
+                for et in self._event_types(handler):
+                    manager.unsubscribe(handler, et)
+                self._subscribe(handler, manager)
+        return profile
+
+    def stop_profiling(self) -> EventProfile | None:
+        """Stop recording handler timing, and return the recorded profile."""
+        profile = self.profile
+        self.profile = None
+        for handler, manager in self._subscriptions.items():
+            if profiled := self._profiled.pop(handler, None):
+                for et in self._event_types(handler):
+                    manager.unsubscribe(profiled, et)
+                self._subscribe(handler, manager)
+        return profile
 
     def handle(self, *events: Event) -> None:
         """Send event notifications to registered handlers."""
         queue = self._queue
         queue.extendleft(events)
 
-        for event in events:
-            self._priority.handle(event)
+        if profile := self.profile:
+            profile.max_queue_depth = max(profile.max_queue_depth, len(queue))
+            profile.max_nesting = max(profile.max_nesting, self._nesting)
+
+        self._nesting += 1
+        try:
+            for event in events:
+                self._priority.handle(event)
+
+            if not self._handling:
+                self._handling = True
+                try:
+                    while queue:
+                        self._dispatch(queue.pop())
+                finally:
+                    self._handling = False
+        finally:
+            self._nesting -= 1
+
+    def _dispatch(self, event: Event) -> None:
+        if isinstance(event, TransactionBegin):
+            self._in_transaction = True
+        elif isinstance(event, (TransactionCommit, TransactionRollback)):
+            self._in_transaction = False
+
+        if self._batch_handlers:
+            for handler, event_types in self._batch_handlers.items():
+                if isinstance(event, event_types):
+                    self._batches.setdefault(handler, []).append(event)
+
+        try:
+            if self._batches and not self._in_transaction:
+                self._handle_batches()
+        finally:
+            self._events.handle(event)
 
-        if not self._handling:
-            self._handling = True
+    def _handle_batches(self) -> None:
+        batches, self._batches = self._batches, {}
+        exceptions = []
+        profile = self.profile
+        for handler, events in batches.items():
+            start = perf_counter()
             try:
-                while queue:
-                    self._events.handle(queue.pop())
+                handler(coalesce(events))
+            except Exception as e:
+                exceptions.append(e)
             finally:
-                self._handling = False
+                if profile:
+                    profile.record(handler, "batch", perf_counter() - start)
+        if exceptions:
+            raise ExceptionGroup("Error while handling events", exceptions)
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import contextlib
-from typing import Generic, Iterator, Sequence, Type, TypeVar, overload
+from typing import Generic, Iterable, Iterator, Sequence, Type, TypeVar, overload
 
 from gaphor.core.modeling.event import AssociationUpdated
 
@@ -11,16 +11,97 @@ T = TypeVar("T")
 
 
 class collection(Generic[T]):
-    """Collection (set-like) for model elements' 1:n and n:m relationships."""
+    """Collection (set-like) for model elements' 1:n and n:m relationships.
+
+    Items are kept in a list, to maintain order. Once a collection grows
+    beyond a few items, an index keyed on item identity is created. It
+    provides constant time membership tests and lookup of the position
+    of an item. Positions are refreshed lazily after items have been
+    inserted or removed somewhere in the middle of the list.
+    """
+
+    __slots__ = ("property", "object", "type", "_items", "_index", "_positions_valid")
+
+    # Small collections are scanned, larger collections are indexed
+    INDEX_THRESHOLD = 16
 
     def __init__(self, property, object, type: Type[T]):
         self.property = property
         self.object = object
         self.type = type
-        self.items: list[T] = []
+        self._items: list[T] = []
+        self._index: dict[int, int] | None = None
+        self._positions_valid = True
+
+    @property
+    def items(self) -> list[T]:
+        """The items in this collection.
+
+        The list should not be changed directly. Use the methods on the
+        collection's property instead.
+        """
+        return self._items
+
+    @items.setter
+    def items(self, items: list[T]) -> None:
+        self._items = list(items)
+        self._index = None
+
+    def _indexed(self) -> dict[int, int] | None:
+        if self._index is None and len(self._items) >= self.INDEX_THRESHOLD:
+            self._reindex()
+        return self._index
+
+    def _reindex(self) -> None:
+        self._index = {id(item): pos for pos, item in enumerate(self._items)}
+        self._positions_valid = True
+
+    def _position(self, value: T) -> int:
+        index = self._indexed()
+        if index is None:
+            return self._items.index(value)
+        if not self._positions_valid:
+            self._reindex()
+            index = self._index
+            assert index is not None
+        return index[id(value)]
+
+    def insert_item(self, index: int | None, value: T) -> None:
+        """Add an item, without notifying the property."""
+        items = self._items
+        if index is None or index >= len(items):
+            if self._index is not None:
+                self._index[id(value)] = len(items)
+            items.append(value)
+        else:
+            items.insert(index, value)
+            if self._index is not None:
+                self._index[id(value)] = index
+                self._positions_valid = False
+
+    def extend_items(self, values: Iterable[T]) -> None:
+        for value in values:
+            self.insert_item(None, value)
+
+    def remove_item(self, value: T) -> int:
+        """Remove an item, without notifying the property.
+
+        Returns the position the item was at. Raises :exc:`ValueError`
+        if the item is not part of this collection.
+        """
+        if value not in self:
+            raise ValueError(f"{value} is not in collection")
+        items = self._items
+        pos = self._position(value)
+        del items[pos]
+        if self._index is not None:
+            del self._index[id(value)]
+            if pos != len(items):
+                self._positions_valid = False
+        return pos
 
     def __len__(self) -> int:
-        return len(self.items)
+        return len(self._items)
 
     def __setitem__(self, key, value) -> None:
         raise RuntimeError("items should not be overwritten.")
@@ -38,26 +119,27 @@ class collection(Generic[T]):
 
     def __getitem__(self, key):
         if key == _recurseproxy_trigger:
-            return recurseproxy(self.items)
-        return self.items.__getitem__(key)
+            return recurseproxy(self._items)
+        return self._items.__getitem__(key)
 
     def __contains__(self, obj) -> bool:
-        return self.items.__contains__(obj)
+        index = self._indexed()
+        return obj in self._items if index is None else id(obj) in index
 
     def __iter__(self) -> Iterator[T]:
-        return iter(self.items)
+        return iter(self._items)
 
     def __str__(self):
-        return f"collection({self.items})"
+        return f"collection({self._items})"
 
     __repr__ = __str__
 
     def __bool__(self):
-        return self.items != []
+        return bool(self._items)
 
     def __eq__(self, other):
-        return self.items == other or (
-            isinstance(other, collection) and self.items == other.items
+        return self._items == other or (
+            isinstance(other, collection) and self._items == other._items
         )
 
     def __hash__(self):
@@ -66,7 +148,9 @@ class collection(Generic[T]):
     def index(self, key: T) -> int:
         """Given an object, return the position of that object in the
         collection."""
-        return self.items.index(key)
+        if key not in self:
+            raise ValueError(f"{key} is not in collection")
+        return self._position(key)
 
     def append(self, value: T) -> None:
         if isinstance(value, self.type):
@@ -75,40 +159,40 @@ class collection(Generic[T]):
             raise TypeError(f"Object is not of type {self.type.__name__}")
 
     def remove(self, value: T) -> None:
-        if value in self.items:
+        if value in self:
             self.property.delete(self.object, value)
 
     # OCL members (from SMW by Ivan Porres, http://www.abo.fi/~iporres/smw)
 
     def size(self):
-        return len(self.items)
+        return len(self._items)
 
     def includes(self, o):
-        return o in self.items
+        return o in self
 
     def excludes(self, o):
         return not self.includes(o)
 
     def count(self, o):
-        return self.items.count(o)
+        return self._items.count(o)
 
     def includesAll(self, c):
-        return all(o in self.items for o in c)
+        return all(o in self for o in c)
 
     def excludesAll(self, c):
-        return all(o not in self.items for o in c)
+        return all(o not in self for o in c)
 
     def select(self, f):
-        return [v for v in self.items if f(v)]
+        return [v for v in self._items if f(v)]
 
     def reject(self, f):
-        return [v for v in self.items if not f(v)]
+        return [v for v in self._items if not f(v)]
 
     def collect(self, f):
-        return [f(v) for v in self.items]
+        return [f(v) for v in self._items]
 
     def isEmpty(self):
-        return len(self.items) == 0
+        return not self._items
 
     def nonEmpty(self):
         return not self.isEmpty()
@@ -118,18 +202,23 @@ class collection(Generic[T]):
 
         Return true if swap was successful.
         """
-        try:
-            i1 = self.items.index(item1)
-            i2 = self.items.index(item2)
-            self.items[i1], self.items[i2] = self.items[i2], self.items[i1]
-
-            self.object.handle(AssociationUpdated(self.object, self.property))
-            return True
-        except (IndexError, ValueError):
+        if item1 not in self or item2 not in self:
             return False
 
+        items = self._items
+        i1 = self._position(item1)
+        i2 = self._position(item2)
+        items[i1], items[i2] = items[i2], items[i1]
+        if self._index is not None:
+            self._index[id(item1)] = i2
+            self._index[id(item2)] = i1
+
+        self.object.handle(AssociationUpdated(self.object, self.property))
+        return True
+
     def order(self, key):
-        self.items.sort(key=key)
+        self._items.sort(key=key)
+        self._index = None
         self.object.handle(AssociationUpdated(self.object, self.property))
 
 
@@ -29,6 +29,7 @@ from gaphor.core.modeling.element import (
 from gaphor.core.modeling.event import (
     AssociationAdded,
     AssociationDeleted,
+    DiagramUpdated,
     DiagramUpdateRequested,
 )
 from gaphor.core.modeling.presentation import Presentation
@@ -281,6 +282,8 @@ class Diagram(Element):
         self._compiled_style_sheet: CompiledStyleSheet | None = None
         self._registered_views: set[gaphas.model.View] = set()
         self._dirty_items: set[gaphas.Item] = set()
+        # Items to update once the diagram is updated, see defer_update()
+        self._deferred_items: set[gaphas.Item] = set()
 
         self._watcher = self.watcher()
         self._watcher.watch("ownedPresentation", self._owned_presentation_changed)
@@ -297,6 +300,7 @@ class Diagram(Element):
 
     def _owned_presentation_changed(self, event):
         if isinstance(event, AssociationDeleted) and event.old_value:
+            self._deferred_items.discard(event.old_value)
             self._update_dirty_items(removed_items={event.old_value})
         elif isinstance(event, AssociationAdded):
             self._order_owned_presentation()
@@ -418,14 +422,29 @@ class Diagram(Element):
         else:
             yield from (e for e in self.get_all_items() if expression(e))
 
+    def defer_update(self) -> None:
+        """Mark all items for update, without updating them now.
+
+        The items are updated on the next call to :meth:`update`, e.g.
+        when the diagram is opened. This saves time when loading models
+        with many diagrams.
+        """
+        self._deferred_items.update(self.ownedPresentation)
+
     def update(self, dirty_items: Collection[Presentation] = ()) -> None:
         """Update the diagram.
 
         All items that requested an update via :meth:`request_update`
         are now updates. If an item has an ``update(context: UpdateContext)``
         method, it's invoked. Constraints are solved.
+
+        A :obj:`DiagramUpdated` event is emitted for the items that were
+        updated, including those moved by the constraint solver.
         """
         self._update_dirty_items(dirty_items)
+        if self._deferred_items:
+            self._dirty_items.update(self._deferred_items)
+            self._deferred_items.clear()
 
         # Clear our (cached) style sheet first
         self._compiled_style_sheet = None
@@ -435,13 +454,18 @@ class Diagram(Element):
                 yield item
                 yield from gaphas.canvas.ancestors(self, item)
 
-        for item in reversed(list(self.sort(dirty_items_with_ancestors()))):
+        updated_items = list(self.sort(dirty_items_with_ancestors()))
+        for item in reversed(updated_items):
             if update := getattr(item, "update", None):
                 update(UpdateContext(style=self.style(StyledItem(item))))
 
         self._connections.solve()
 
+        # Solving constraints can add dirty items
+        updated_items.extend(self._dirty_items.difference(updated_items))
         self._dirty_items.clear()
+        if updated_items:
+            self.handle(DiagramUpdated(self, updated_items))
 
     # gaphas.model.Model protocol:
 
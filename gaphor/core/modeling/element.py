@@ -4,12 +4,23 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING, Callable, Iterator, Protocol, TypeVar, overload
+from contextlib import AbstractContextManager
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterator,
+    Protocol,
+    Sequence,
+    TypeVar,
+    overload,
+)
 from uuid import uuid1
 
 from gaphor.core.modeling.event import ElementUpdated
 from gaphor.core.modeling.properties import (
+    PropertyTables,
     attribute,
+    property_tables,
     relation_many,
     relation_one,
     umlproperty,
@@ -82,6 +93,13 @@ class Element:
     relationship: relation_many[Element]
     appliedStereotype: relation_many[Element]
 
+    # Only set on the instance while unlinking
+    _unlink_lock = 0
+
+    # Property values, by slot. Replaced by a list on the instance once
+    # a value is set
+    _values: Sequence[object] = ()
+
     def __init__(self, id: Id | None = None, model: RepositoryProtocol | None = None):
         """Create an element. As optional parameters an id and model can be
         given.
@@ -96,7 +114,6 @@ class Element:
         # The model this element belongs to.
         # NOTE: Will be unset by ElementFactory once it's `unlink()`ed.
         self._model = model
-        self._unlink_lock = 0
 
     @property
     def id(self) -> Id:
@@ -115,16 +132,17 @@ class Element:
     @classmethod
     def umlproperties(cls) -> Iterator[umlproperty]:
         """Iterate over all properties."""
-        umlprop = umlproperty
-        for propname in dir(cls):
-            if not propname.startswith("_"):
-                prop = getattr(cls, propname)
-                if isinstance(prop, umlprop):
-                    yield prop
+        return iter(property_tables(cls).all)
+
+    @classmethod
+    def property_tables(cls) -> PropertyTables:
+        """Properties of this class, split in attributes, associations and
+        derived properties."""
+        return property_tables(cls)
 
     def save(self, save_func) -> None:
         """Save the state by calling ``save_func(name, value)``."""
-        for prop in self.umlproperties():
+        for prop in property_tables(type(self)).persistent:
             prop.save(self, save_func)
 
     def load(self, name, value) -> None:
@@ -145,7 +163,7 @@ class Element:
 
         This is run after all elements are loaded.
         """
-        for prop in self.umlproperties():
+        for prop in property_tables(type(self)).derived:
             prop.postload(self)
 
     def unlink(self) -> None:
@@ -168,7 +186,7 @@ class Element:
             self._unlink_lock -= 1
 
     def inner_unlink(self, unlink_event: UnlinkEvent):
-        for prop in self.umlproperties():
+        for prop in property_tables(type(self)).persistent:
             prop.unlink(self)
 
         log.debug("unlinking %s", self)
@@ -249,6 +267,9 @@ class RepositoryProtocol(Protocol):
     def select(self, expression: None) -> Iterator[Element]:
         ...
 
+    def query(self, type_: type[T], /, **criteria: object) -> Iterator[T]:
+        ...
+
     def lookup(self, id: str) -> Element | None:
         ...
 
@@ -260,6 +281,9 @@ class RepositoryProtocol(Protocol):
     def handle(self, event: object) -> None:
         ...
 
+    def bulk(self) -> AbstractContextManager:
+        ...
+
 
 class EventWatcherProtocol(Protocol):
     def watch(self, path: str, handler: Handler | None = None) -> EventWatcherProtocol:
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import logging
+from typing import NamedTuple
 
 from gaphor.abc import Service
 from gaphor.core import event_handler
@@ -19,6 +20,20 @@ from gaphor.core.modeling.properties import umlproperty
 log = logging.getLogger(__name__)
 
 
+class WatchPath(NamedTuple):
+    """A compiled watch path: a property and the path that follows it.
+
+    Compiled paths are shared by all elements of the same type, so
+    registrations only need to refer to them.
+    """
+
+    property: umlproperty
+    remainder: WatchPath | None
+
+
+Remainders = tuple[WatchPath, ...]
+
+
 class EventWatcher:
     """A helper for easy registering and unregistering event handlers."""
 
@@ -31,7 +46,7 @@ class EventWatcher:
         self.element = element
         self.element_dispatcher = element_dispatcher
         self.default_handler: Handler | None = default_handler
-        self._watched_paths: dict[str, Handler] = {}
+        self._handlers: list[Handler] = []
 
     def watch(self, path: str, handler: Handler | None = None) -> EventWatcher:
         """Watch a certain path of elements starting with the DiagramItem. The
@@ -44,15 +59,15 @@ class EventWatcher:
 
         This interface is fluent (returns self).
         """
-        if handler:
-            self._watched_paths[path] = handler
-        elif self.default_handler:
-            self._watched_paths[path] = self.default_handler
-        else:
+        handler = handler or self.default_handler
+        if not handler:
             raise ValueError(f"No handler provided for path {path}")
 
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
         if dispatcher := self.element_dispatcher:
-            dispatcher.subscribe(self._watched_paths[path], self.element, path)
+            dispatcher.subscribe(handler, self.element, path)
         return self
 
     def unsubscribe_all(self, *_args):
@@ -65,7 +80,7 @@ class EventWatcher:
         if not dispatcher:
             return
 
-        for _path, handler in self._watched_paths.items():
+        for handler in self._handlers:
             dispatcher.unsubscribe(handler)
 
 
@@ -108,13 +123,23 @@ class ElementDispatcher(Service):
         self.modeling_language = modeling_language
 
         # Table used to fire events:
-        # (event.element, event.property): { handler: set(path, ..), ..}
-        self._handlers: dict[tuple[Element, umlproperty], dict[Handler, set]] = {}
+        # (event.element, event.property): (handler, (remainder, ..))
+        # or, if multiple handlers are registered for the same key:
+        # (event.element, event.property): { handler: (remainder, ..), ..}
+        self._handlers: dict[
+            tuple[Element, umlproperty],
+            tuple[Handler, Remainders] | dict[Handler, Remainders],
+        ] = {}
 
         # Fast resolution when handlers are disconnected
         # handler: [(element, property), ..]
         self._reverse: dict[Handler, list[tuple[Element, umlproperty]]] = {}
 
+        # Compiled paths: (element type, path): WatchPath
+        self._paths: dict[tuple[type[Element], str], WatchPath] = {}
+        # Shared (partial) paths: WatchPath: (WatchPath,)
+        self._watch_paths: dict[WatchPath, Remainders] = {}
+
         self.event_manager.subscribe(self.on_model_loaded)
         self.event_manager.subscribe(self.on_element_change_event)
 
@@ -123,8 +148,8 @@ class ElementDispatcher(Service):
         self.event_manager.unsubscribe(self.on_model_loaded)
 
     def subscribe(self, handler: Handler, element: Element, path: str) -> None:
-        props = self._path_to_properties(element, path)
-        self._add_handlers(element, props, handler)
+        watch_path = self._compiled_path(element, path)
+        self._add_handlers(element, watch_path, handler)
 
     def unsubscribe(self, handler: Handler) -> None:
         """Unregister a handler from the registry."""
@@ -134,24 +159,59 @@ class ElementDispatcher(Service):
             return
 
         for key in reverse:
-            if handlers := self._handlers.get(key):
-                handlers.pop(handler, None)
-                if not handlers:
-                    del self._handlers[key]
+            self._unregister(key, handler)
         del self._reverse[handler]
 
-    def _path_to_properties(self, element, path):
-        """Given a start element and a path, return a tuple of properties
-        (association, attribute, etc.) representing the path."""
-        c = type(element)
-        tpath = []
+    def _registrations(self, key) -> dict[Handler, Remainders]:
+        """Handlers registered for key, and their remaining paths."""
+        registrations = self._handlers.get(key)
+        if registrations is None:
+            return {}
+        if isinstance(registrations, dict):
+            return registrations
+        handler, remainders = registrations
+        return {handler: remainders}
+
+    def _register(self, key, handler, remainders):
+        registrations = self._handlers.get(key)
+        if isinstance(registrations, dict):
+            registrations[handler] = remainders
+        elif registrations is None or registrations[0] == handler:
+            self._handlers[key] = (handler, remainders)
+        else:
+            self._handlers[key] = dict((registrations, (handler, remainders)))
+
+    def _unregister(self, key, handler):
+        registrations = self._handlers.get(key)
+        if isinstance(registrations, dict):
+            registrations.pop(handler, None)
+            if len(registrations) == 1:
+                self._handlers[key] = next(iter(registrations.items()))
+        elif registrations and registrations[0] == handler:
+            del self._handlers[key]
+
+    def _compiled_path(self, element, path):
+        """Given a start element and a path, return the compiled path of
+        properties (association, attribute, etc.).
+
+        Paths are compiled once per element type.
+        """
+        key = (type(element), path)
+        try:
+            return self._paths[key]
+        except KeyError:
+            watch_path = self._paths[key] = self._compile_path(type(element), path)
+            return watch_path
+
+    def _compile_path(self, c, path):
+        props = []
         for attr in path.split("."):
             cname = ""
             if "[" in attr:
                 assert attr.endswith("]"), f'"{attr}" should end with "]"'
                 attr, cname = attr[:-1].split("[")
             prop = getattr(c, attr)
-            tpath.append(prop)
+            props.append(prop)
 
             if cname:
                 c = self.modeling_language.lookup_element(cname)
@@ -160,83 +220,79 @@ class ElementDispatcher(Service):
                 ), f"{c} should be a subclass of {prop.type}"
             else:
                 c = prop.type
-        return tuple(tpath)
-
-    def _add_handlers(self, element, props, handler):
-        """Provided an element and a path of properties (props), register the
-        handler for each property."""
-        property, remainder = props[0], props[1:]
-        key = (element, property)
 
-        # Register key
-        try:
-            handlers = self._handlers[key]
-        except KeyError:
-            handlers = {}
-            self._handlers[key] = handlers
+        watch_path = None
+        for prop in reversed(props):
+            watch_path = self._watch_path(prop, watch_path)
+        return watch_path
 
-        # Register handler and it's remaining paths
-        try:
-            remainders = handlers[handler]
-        except KeyError:
-            remainders = handlers[handler] = set()
-        if remainder:
-            remainders.add(remainder)
+    def _watch_path(self, property, remainder):
+        """A shared instance of a (partial) watch path."""
+        watch_path = WatchPath(property, remainder)
+        return self._watch_paths.setdefault(watch_path, (watch_path,))[0]
 
-        # Also add them to the reverse table, easing disconnecting
-        try:
-            reverse = self._reverse[handler]
-        except KeyError:
-            reverse = []
-            self._reverse[handler] = reverse
+    def _add_handlers(self, element, watch_path, handler):
+        """Provided an element and a compiled path, register the handler for
+        each property."""
+        property, remainder = watch_path
+        key = (element, property)
 
-        reverse.append(key)
+        # Register handler and it's remaining paths.
+        # Also add the key to the reverse table, easing disconnecting
+        remainders = self._registrations(key).get(handler)
+        if remainders is None:
+            self._register(
+                key, handler, self._watch_paths[remainder] if remainder else ()
+            )
+            try:
+                self._reverse[handler].append(key)
+            except KeyError:
+                self._reverse[handler] = [key]
+        elif remainder and remainder not in remainders:
+            self._register(key, handler, (*remainders, remainder))
 
         # Apply remaining path
         if remainder:
             if property.upper == "*" or property.upper > 1:
                 for e in property.get(element):
                     self._add_handlers(e, remainder, handler)
-            else:
-                e = property.get(element)
-                if e and remainder:
-                    self._add_handlers(e, remainder, handler)
+            elif e := property.get(element):
+                self._add_handlers(e, remainder, handler)
 
     def _remove_handlers(self, element, property, handler):
         """Remove the handler of the path of elements."""
         key = element, property
-        handlers = self._handlers.get(key)
-        if not handlers:
+        if key not in self._handlers:
             return
 
-        if property.upper == "*" or property.upper > 1:
-            for remainder in handlers.get(handler, ()):
-                for e in property.get(element):
-                    self._remove_handlers(e, remainder[0], handler)
-        else:
-            for remainder in handlers.get(handler, ()):
-                if e := property.get(element):
-                    self._remove_handlers(e, remainder[0], handler)
-        try:
-            del handlers[handler]
-        except KeyError:
+        remainders = self._registrations(key).get(handler)
+        if remainders is None:
             log.debug(
                 "Handler %s is not registered for %s.%s",
                 handler,
                 element,
                 property,
-                exc_info=True,
             )
+            return
 
-        if not handlers:
-            del self._handlers[key]
+        if property.upper == "*" or property.upper > 1:
+            for remainder in remainders:
+                for e in property.get(element):
+                    self._remove_handlers(e, remainder.property, handler)
+        else:
+            for remainder in remainders:
+                if e := property.get(element):
+                    self._remove_handlers(e, remainder.property, handler)
+
+        self._unregister(key, handler)
 
     @event_handler(ElementUpdated)
     def on_element_change_event(self, event):
-        if not (handlers := self._handlers.get((event.element, event.property))):
+        key = (event.element, event.property)
+        if not (handlers := self._registrations(key)):
             return
         try:
-            for handler in set(handlers.keys()):
+            for handler in list(handlers):
                 handler(event)
         finally:
             # Handle add/removal of handlers based on the kind of event
@@ -245,22 +301,23 @@ class ElementDispatcher(Service):
                 isinstance(event, (AssociationSet, AssociationDeleted))
                 and event.old_value
             ):
-                for handler, remainders in handlers.items():
+                for handler, remainders in list(self._registrations(key).items()):
                     for remainder in remainders:
-                        self._remove_handlers(event.old_value, remainder[0], handler)
+                        self._remove_handlers(
+                            event.old_value, remainder.property, handler
+                        )
 
             if (
                 isinstance(event, (AssociationSet, AssociationAdded))
                 and event.new_value
             ):
-                for handler, remainders in handlers.items():
+                for handler, remainders in list(self._registrations(key).items()):
                     for remainder in remainders:
                         self._add_handlers(event.new_value, remainder, handler)
 
     @event_handler(ModelReady)
     def on_model_loaded(self, event):
-        for (elem, prop), value in list(self._handlers.items()):
-            prefix = (prop,)
-            for h, remainders in list(value.items()):
+        for elem, prop in list(self._handlers):
+            for h, remainders in list(self._registrations((elem, prop)).items()):
                 for remainder in remainders:
-                    self._add_handlers(elem, prefix + remainder, h)
+                    self._add_handlers(elem, self._watch_path(prop, remainder), h)
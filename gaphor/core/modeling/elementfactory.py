@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import heapq
 from collections import OrderedDict
 from contextlib import contextmanager
-from typing import Callable, Iterator, Protocol, TypeVar, overload
+from itertools import count
+from typing import Callable, Iterator, Protocol, TypeGuard, TypeVar, overload
 
 from gaphor.abc import Service
 from gaphor.core.eventmanager import EventManager, event_handler
@@ -20,11 +22,15 @@ from gaphor.core.modeling.element import (
 )
 from gaphor.core.modeling.elementdispatcher import ElementDispatcher, EventWatcher
 from gaphor.core.modeling.event import (
+    AssociationSet,
+    AttributeUpdated,
     ElementCreated,
     ElementDeleted,
+    ElementsCreated,
     ModelFlushed,
 )
 from gaphor.core.modeling.presentation import Presentation
+from gaphor.core.modeling.query import AttributeIndex, compile_criteria, indexable
 
 T = TypeVar("T", bound=Element)
 P = TypeVar("P", bound=Presentation)
@@ -48,6 +54,14 @@ class RecordingEventManager:
             self.event_manager.handle(*self.events)
 
 
+class BulkEventRecorder(RecordingEventManager):
+    """Records events while elements are created in bulk."""
+
+    def __init__(self, event_manager):
+        super().__init__(event_manager)
+        self.created: dict[Id, ElementCreated] = {}
+
+
 class ElementFactory(Service):
     """The ElementFactory is used to create elements and do lookups to
     elements.
@@ -68,6 +82,13 @@ class ElementFactory(Service):
         self.event_manager: EventHandler | None = event_manager
         self.element_dispatcher = element_dispatcher
         self._elements: dict[Id, Element] = OrderedDict()
+        # Elements by their exact type. Values are (sequence number, element)
+        # tuples, so elements of different types can be yielded in creation order.
+        self._elements_by_type: dict[type[Element], dict[Id, tuple[int, Element]]] = {}
+        self._types_cache: dict[type, list[type[Element]]] = {}
+        self._sequence = count()
+        self._indexes: dict[str, AttributeIndex] = {}
+        self._bulk: BulkEventRecorder | None = None
         if event_manager:
             event_manager.subscribe(self._on_unlink_event)
 
@@ -106,11 +127,26 @@ class ElementFactory(Service):
         else:
             raise TypeError(f"Type {type} is not a valid model element")
 
+        if (bulk := self._bulk) is not None and self.event_manager is bulk:
+            element = type(id=id, **type_args)  # type: ignore[arg-type]
+            self._elements[id] = element
+            self._index_element(element)
+            bulk.created[id] = ElementCreated(self, element, diagram)
+            return element
+
+        if not self.event_manager:
+            # Events are blocked, e.g. while a model is loaded.
+            element = type(id=id, **type_args)  # type: ignore[arg-type]
+            self._elements[id] = element
+            self._index_element(element)
+            return element
+
         # Avoid events that reference this element before its created-event is emitted.
         event_recorder = RecordingEventManager(self.event_manager)
         with self.block_events(event_recorder):
             element = type(id=id, **type_args)  # type: ignore[arg-type]
         self._elements[id] = element
+        self._index_element(element)
         self.handle(ElementCreated(self, element, diagram))
         event_recorder.replay()
         return element
@@ -150,7 +186,7 @@ class ElementFactory(Service):
         if expression is None:
             yield from self._elements.values()
         elif isinstance(expression, type):
-            yield from (e for e in self._elements.values() if isinstance(e, expression))
+            yield from self._select_type(expression)
         else:
             yield from (e for e in self._elements.values() if expression(e))
 
@@ -166,6 +202,86 @@ class ElementFactory(Service):
         """
         return list(self.select(expression))
 
+    def _index_element(self, element: Element) -> None:
+        element_type = type(element)
+        try:
+            elements = self._elements_by_type[element_type]
+        except KeyError:
+            elements = self._elements_by_type[element_type] = {}
+            self._types_cache.clear()
+        elements[element.id] = (next(self._sequence), element)
+
+    def _types(self, type_: type) -> list[type[Element]]:
+        """All element types in this factory that are a (sub)class of
+        ``type_``."""
+        try:
+            return self._types_cache[type_]
+        except KeyError:
+            types = self._types_cache[type_] = [
+                t for t in self._elements_by_type if issubclass(t, type_)
+            ]
+            return types
+
+    def _select_type(self, type_: type[T]) -> Iterator[T]:
+        buckets = [b for t in self._types(type_) if (b := self._elements_by_type[t])]
+        if not buckets:
+            return
+        elif len(buckets) == 1:
+            yield from (e for _, e in buckets[0].values())  # type: ignore[misc]
+        else:
+            yield from (e for _, e in heapq.merge(*(b.values() for b in buckets)))  # type: ignore[misc]
+
+    def add_index(self, name: str) -> None:
+        """Maintain an index on attribute ``name``.
+
+        Indexes are used by :meth:`query`. They can be created for attributes,
+        enumerations and single-valued associations, including derived unions
+        such as ``owner``.
+        """
+        if name in self._indexes:
+            return
+        index = AttributeIndex(name)
+        for element in self._elements.values():
+            if index.applies_to(element):
+                index.update(element, getattr(element, name))
+        self._indexes[name] = index
+
+    def remove_index(self, name: str) -> None:
+        """Stop maintaining an index on attribute ``name``."""
+        self._indexes.pop(name, None)
+
+    def query(self, type_: type[T], /, **criteria: object) -> Iterator[T]:
+        """Iterate elements of ``type_`` whose attributes match ``criteria``.
+
+        A criterion is an attribute value, or a :class:`~gaphor.core.modeling.query.one_of`
+        set of values, e.g. ``query(Class, name=one_of("A", "B"))``.
+        If an index exists for one of the attributes, it is used to find
+        the elements. Otherwise all elements of ``type_`` are checked.
+        """
+        predicate = compile_criteria(criteria)
+        index = next(
+            (
+                (self._indexes[name], value)
+                for name, value in indexable(criteria)
+                if name in self._indexes
+            ),
+            None,
+        )
+        if index is None:
+            yield from (e for e in self._select_type(type_) if predicate(e))
+            return
+
+        attribute_index, value = index
+        found = [
+            e
+            for e in attribute_index.lookup(value)
+            if isinstance(e, type_) and e.id in self._elements and predicate(e)
+        ]
+        yield from sorted(found, key=self._sequence_number)
+
+    def _sequence_number(self, element: Element) -> int:
+        return self._elements_by_type[type(element)][element.id][0]
+
     def keys(self) -> Iterator[Id]:
         """Return a list with all id's in the factory."""
         return iter(self._elements.keys())
@@ -214,12 +330,67 @@ class ElementFactory(Service):
         finally:
             self.event_manager = current_event_manager
 
+    @contextmanager
+    def bulk(self):
+        """Create many elements at once.
+
+        Events are deferred. When the block is left, the ElementCreated
+        events are emitted as one ElementsCreated event. The other events
+        are emitted after that, in the order they were raised. Events for
+        elements that were created and unlinked in the block are dropped.
+
+        Bulk blocks can be nested. Events are emitted when the outer
+        block is left.
+        """
+        if self._bulk is not None or not self.event_manager:
+            yield self
+            return
+
+        event_manager = self.event_manager
+        recorder = self._bulk = self.event_manager = BulkEventRecorder(event_manager)
+        try:
+            yield self
+        finally:
+            self.event_manager = event_manager
+            self._bulk = None
+            self._emit_bulk(recorder)
+
+    def _emit_bulk(self, recorder: BulkEventRecorder) -> None:
+        created = recorder.created
+
+        def is_new(element: object) -> TypeGuard[Element]:
+            return (
+                isinstance(element, Element)
+                and (event := created.get(element.id)) is not None
+                and event.element is element
+            )
+
+        events = [
+            event
+            for event in recorder.events
+            if not is_new(element := getattr(event, "element", None))
+            or self._elements.get(element.id) is element
+        ]
+
+        if new := [e for e in created.values() if e.element in self]:
+            self.handle(ElementsCreated(self, new))
+        if events and self.event_manager:
+            self.event_manager.handle(*events)
+
     def handle(self, event: object) -> None:
         """Handle events coming from elements."""
-        if self.event_manager:
-            self.event_manager.handle(event)
-        elif isinstance(event, UnlinkEvent):
+        if (
+            self._indexes
+            and isinstance(event, (AttributeUpdated, AssociationSet))
+            and (index := self._indexes.get(event.property.name))
+        ):
+            index.update(event.element, event.new_value)
+        if isinstance(event, UnlinkEvent) and (
+            not self.event_manager or self.event_manager is self._bulk
+        ):
             self._on_unlink_event(event)
+        elif self.event_manager:
+            self.event_manager.handle(event)
 
     @event_handler(UnlinkEvent)
     def _on_unlink_event(self, event):
@@ -230,6 +401,9 @@ class ElementFactory(Service):
             del self._elements[element.id]
         except KeyError:
             return
+        del self._elements_by_type[type(element)][element.id]
+        for index in self._indexes.values():
+            index.remove(element)
         if self.event_manager:
             self.event_manager.handle(
                 ElementDeleted(self, event.element, event.diagram)
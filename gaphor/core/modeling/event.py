@@ -7,19 +7,38 @@ class RevertibleEvent:
 
     This event can be used as "low level" event for anything that should
     be revertible/undoable.
+
+    An event is reverted from its :meth:`revert_state`. The undo manager
+    records that state instead of the event, so the event's element is
+    not kept alive.
     """
 
     def __init__(self, element):
         self.element = element
 
-    def revert(self, target):
-        """Reverse whatever caused the event.
+    def revert_state(self) -> tuple:
+        """The values needed to revert the event.
+
+        They are passed to :meth:`revert_from_state`. Elements should be
+        referred to by id.
+        """
+        return ()
+
+    @classmethod
+    def revert_from_state(cls, target, *state) -> None:
+        """Reverse whatever caused the event, from its :meth:`revert_state`.
 
         `target` Is the element the action should be performed upon,
         which may be a different element than the one that caused the
         event.
         """
-        raise NotImplementedError("Method {self}.revert() has not been implemented")
+        raise NotImplementedError(
+            f"Method {cls.__name__}.revert_from_state() has not been implemented"
+        )
+
+    def revert(self, target):
+        """Reverse whatever caused the event."""
+        self.revert_from_state(target, *self.revert_state())
 
 
 class ElementUpdated:
@@ -46,6 +65,10 @@ class AttributeUpdated(ElementUpdated):
         self.old_value = old_value
         self.new_value = new_value
 
+    @property
+    def coalesce_key(self):
+        return (self.element.id, self.property)
+
 
 class AssociationUpdated(ElementUpdated):
     """An association element has changed."""
@@ -77,6 +100,10 @@ class AssociationSet(AssociationUpdated):
         self.old_value = old_value
         self.new_value = new_value
 
+    @property
+    def coalesce_key(self):
+        return (self.element.id, self.property)
+
 
 class AssociationAdded(AssociationUpdated):
     """An association element has been added."""
@@ -212,6 +239,28 @@ class ElementCreated(ServiceEvent):
         self.diagram = diagram
 
 
+class ElementsCreated(ServiceEvent):
+    """Elements have been created in bulk.
+
+    This event replaces the ElementCreated events of the new elements.
+    Events emitted for those elements while they were being set up
+    follow this event.
+    """
+
+    def __init__(self, service, created):
+        """Constructor.
+
+        The created parameter is a list of ElementCreated events, in
+        order of creation.
+        """
+        super().__init__(service)
+        self.created = created
+
+    @property
+    def elements(self):
+        return [event.element for event in self.created]
+
+
 class ElementDeleted(ServiceEvent):
     """An element has been deleted."""
 
@@ -259,3 +308,15 @@ class DiagramUpdateRequested:
 
     def __init__(self, diagram):
         self.diagram = diagram
+
+
+class DiagramUpdated:
+    """Event fired when diagram items have been updated.
+
+    ``items`` are the items that were updated, or moved when
+    constraints were solved.
+    """
+
+    def __init__(self, diagram, items):
+        self.diagram = diagram
+        self.items = items
@@ -36,10 +36,7 @@ class Presentation(Matrices, Element, Generic[S]):
         self.diagram = diagram
         self._original_diagram: Diagram | None = diagram
 
-        def update(_event):
-            self.request_update()
-
-        self._watcher = self.watcher(default_handler=update)
+        self._watcher = self.watcher(default_handler=self._on_watched_change)
         self.watch("subject")
         self.watch("children")
         self.watch("diagram", self._on_diagram_changed)
@@ -76,6 +73,9 @@ class Presentation(Matrices, Element, Generic[S]):
         self._watcher.watch(path, handler)
         return self
 
+    def _on_watched_change(self, _event) -> None:
+        self.request_update()
+
     def change_parent(self, new_parent: Presentation | None) -> None:
         """Change the parent and update the item's matrix so the item visually
         remains in the same place."""
@@ -153,5 +153,13 @@ class MatrixUpdated(RevertibleEvent):
         self.old_value = old_value
         self.new_value = element.matrix.tuple()
 
-    def revert(self, target):
-        target.matrix.set(*self.old_value)
+    @property
+    def coalesce_key(self):
+        return (self.element.id, "matrix")
+
+    def revert_state(self):
+        return (self.old_value,)
+
+    @classmethod
+    def revert_from_state(cls, target, old_value):
+        target.matrix.set(*old_value)
@@ -32,6 +32,7 @@ from typing import (
     Generic,
     Iterable,
     Literal,
+    NamedTuple,
     Protocol,
     Sequence,
     TypeVar,
@@ -118,6 +119,9 @@ relation = Union[relation_one, relation_many]
 
 T = TypeVar("T")
 
+# Marks an unset value in an element's value list
+_UNSET = object()
+
 Lower = Union[Literal[0], Literal[1], Literal[2]]
 Upper = Union[Literal[1], Literal[2], Literal["*"]]
 
@@ -132,6 +136,10 @@ class umlproperty:
 
     In some cases properties call out and delegate actions to the ElementFactory,
     for example, in the case of event handling.
+
+    Values are stored in a list on the element, ``Element._values``. Each
+    property has a fixed position (slot) in that list per element class,
+    see :func:`property_slot`.
     """
 
     lower: Lower = 0
@@ -140,7 +148,9 @@ class umlproperty:
     def __init__(self, name: str):
         self.dependent_properties: set[derived | redefine] = set()
         self.name = name
-        self._name = f"_{name}"
+        self._slots: dict[type, int] = {}
+        # A new property may end up on any class
+        clear_property_tables()
 
     def __get__(self, obj, class_=None):
         return self.get(obj) if obj else self
@@ -155,7 +165,7 @@ class umlproperty:
         return str(self)
 
     def save(self, obj, save_func: Callable[[str, object], None]):
-        if hasattr(obj, self._name):
+        if self._has_value(obj):
             save_func(self.name, self.get(obj))
 
     def load(self, obj, value):
@@ -182,6 +192,46 @@ class umlproperty:
         for d in self.dependent_properties:
             d.propagate(event)
 
+    def _slot(self, obj) -> int:
+        try:
+            return self._slots[type(obj)]
+        except KeyError:
+            slot = self._slots[type(obj)] = property_slot(type(obj), self)
+            return slot
+
+    def _get_value(self, obj, default=None):
+        values = obj._values  # noqa: SLF001
+        try:
+            slot = self._slots[type(obj)]
+        except KeyError:
+            slot = self._slot(obj)
+        if slot < len(values) and (value := values[slot]) is not _UNSET:
+            return value
+        return default
+
+    def _has_value(self, obj) -> bool:
+        return self._get_value(obj, _UNSET) is not _UNSET
+
+    def _set_value(self, obj, value) -> None:
+        slot = self._slot(obj)
+        values = obj._values  # noqa: SLF001
+        if slot < len(values):
+            values[slot] = value
+        else:
+            padding = [_UNSET] * (slot - len(values))
+            obj._values = [*values, *padding, value]  # noqa: SLF001
+
+    def _del_value(self, obj) -> bool:
+        """Unset the value, returns ``False`` if no value was set."""
+        slot = self._slot(obj)
+        values = obj._values  # noqa: SLF001
+        if slot >= len(values) or values[slot] is _UNSET:
+            return False
+        values[slot] = _UNSET
+        while values and values[-1] is _UNSET:
+            values.pop()
+        return True
+
 
 class attribute(umlproperty, Generic[T]):
     """Attribute.
@@ -210,7 +260,7 @@ class attribute(umlproperty, Generic[T]):
         return f"<attribute {self.name}: {self.type} = {self.default}>"
 
     def get(self, obj):
-        return getattr(obj, self._name, self.default)
+        return self._get_value(obj, self.default)
 
     def set(self, obj, value):
         if (
@@ -231,19 +281,15 @@ class attribute(umlproperty, Generic[T]):
             return
 
         old = self.get(obj)
-        if value == self.default and hasattr(obj, self._name):
-            delattr(obj, self._name)
+        if value == self.default:
+            self._del_value(obj)
         else:
-            setattr(obj, self._name, value)
+            self._set_value(obj, value)
         self.handle(AttributeUpdated(obj, self, old, value))
 
     def delete(self, obj, value=None):
         old = self.get(obj)
-        try:
-            delattr(obj, self._name)
-        except AttributeError:
-            pass
-        else:
+        if self._del_value(obj):
             self.handle(AttributeUpdated(obj, self, old, self.default))
 
 
@@ -268,7 +314,7 @@ class enumeration(umlproperty):
         return f"<enumeration {self.name}: {self.values} = {self.default}>"
 
     def get(self, obj):
-        return getattr(obj, self._name, self.default)
+        return self._get_value(obj, self.default)
 
     def load(self, obj, value: str | None):
         self.set(obj, self.default if value is None else value)
@@ -284,18 +330,14 @@ class enumeration(umlproperty):
             return
 
         if value == self.default:
-            delattr(obj, self._name)
+            self._del_value(obj)
         else:
-            setattr(obj, self._name, value)
+            self._set_value(obj, value)
         self.handle(AttributeUpdated(obj, self, old, value))
 
     def delete(self, obj, value=None):
         old = self.get(obj)
-        try:
-            delattr(obj, self._name)
-        except AttributeError:
-            pass
-        else:
+        if self._del_value(obj):
             self.handle(AttributeUpdated(obj, self, old, self.default))
 
 
@@ -330,9 +372,8 @@ class association(umlproperty):
         self.stub: associationstub | None = None
 
     def save(self, obj, save_func: Callable[[str, object], None]):
-        if hasattr(obj, self._name):
-            if v := self.get(obj):
-                save_func(self.name, v)
+        if v := self._get_value(obj):
+            save_func(self.name, v)
 
     def load(self, obj, value):
         if self.opposite:
@@ -358,15 +399,15 @@ class association(umlproperty):
         return self._get_one(obj) if self.upper == 1 else self._get_many(obj)
 
     def _get_one(self, obj) -> T | None:
-        return getattr(obj, self._name, None)
+        return self._get_value(obj)  # type: ignore[no-any-return]
 
     def _get_many(self, obj) -> collection[T]:
-        v: collection[T] | None = getattr(obj, self._name, None)
+        v: collection[T] | None = self._get_value(obj)
         if v is None:
             # Create the empty collection here since it may
             # be used to add.
             v = collection(self, obj, self.type)
-            setattr(obj, self._name, v)
+            self._set_value(obj, v)
         return v
 
     def set(
@@ -402,11 +443,11 @@ class association(umlproperty):
             self._del_one(obj, old, do_notify=False)
 
         if value is not None:
-            setattr(obj, self._name, value)
+            self._set_value(obj, value)
             try:
                 self._set_opposite(obj, value, from_opposite)
             except Exception:
-                setattr(obj, self._name, old)
+                self._set_value(obj, old)
                 raise
 
         self.handle(AssociationSet(obj, self, old, value))
@@ -421,23 +462,17 @@ class association(umlproperty):
         c: collection = self._get_many(obj)
         if value in c:
             if from_load:
-                c.items.remove(value)
-                if index is None:
-                    c.items.append(value)
-                else:
-                    c.items.insert(index, value)
+                c.remove_item(value)
+                c.insert_item(index, value)
             return
 
-        if index is None:
-            c.items.append(value)
-        else:
-            c.items.insert(index, value)
+        c.insert_item(index, value)
 
         try:
             self._set_opposite(obj, value, from_opposite)
         except Exception:
-            if value in c.items:
-                c.items.remove(value)
+            if value in c:
+                c.remove_item(value)
             raise
 
         self.handle(AssociationAdded(obj, self, value))
@@ -470,13 +505,8 @@ class association(umlproperty):
 
         self._del_opposite(obj, value, from_opposite)
 
-        try:
-            delattr(obj, self._name)
-        except AttributeError:
-            pass
-        else:
-            if do_notify:
-                self.handle(AssociationSet(obj, self, value, None))
+        if self._del_value(obj) and do_notify:
+            self.handle(AssociationSet(obj, self, value, None))
 
     def _del_many(self, obj, value, from_opposite=False, do_notify=True):
         if not value:
@@ -486,10 +516,8 @@ class association(umlproperty):
 
         c: collection
         if c := self._get_many(obj):
-            items: list = c.items
             try:
-                index = items.index(value)
-                items.remove(value)
+                index = c.remove_item(value)
             except ValueError:
                 pass
             else:
@@ -497,8 +525,8 @@ class association(umlproperty):
                     self.handle(AssociationDeleted(obj, self, value, index))
 
             # Remove items collection if empty
-            if not items:
-                delattr(obj, self._name)
+            if not c:
+                self._del_value(obj)
 
     def _del_opposite(self, obj, value, from_opposite):
         if not from_opposite and self.opposite:
@@ -554,32 +582,34 @@ class associationstub(umlproperty):
         pass
 
     def unlink(self, obj):
-        values = getattr(obj, self._name, [])
+        values = self._get_value(obj, ())
         for value in set(values):
             self.association.delete(value, obj)
 
     def set(self, obj, value):
-        try:
-            getattr(obj, self._name).add(value)
-        except AttributeError:
-            setattr(obj, self._name, {value})
+        if (values := self._get_value(obj)) is not None:
+            values.add(value)
+        else:
+            self._set_value(obj, {value})
 
     def delete(self, obj, value, from_opposite=False):
-        try:
-            c = getattr(obj, self._name)
-        except AttributeError:
-            pass
-        else:
-            c.discard(value)
+        if (values := self._get_value(obj)) is not None:
+            values.discard(value)
 
 
 class unioncache:
-    """Small cache helper object for derivedunions."""
+    """Small cache helper object for derivedunions.
+
+    A cache is stored on the element it applies to. It is dropped as
+    soon as one of the subsets of the derived property changes for that
+    element.
+    """
+
+    __slots__ = ("owner", "data")
 
-    def __init__(self, owner: object, data: object, version: int) -> None:
+    def __init__(self, owner: object, data: object) -> None:
         self.owner = owner
         self.data = data
-        self.version = version
 
 
 class derived(umlproperty, Generic[T]):
@@ -606,7 +636,6 @@ class derived(umlproperty, Generic[T]):
         *subsets: relation,
     ) -> None:
         super().__init__(name)
-        self.version = 1
         self.type = type
         self.lower = lower
         self.upper = upper
@@ -629,7 +658,7 @@ class derived(umlproperty, Generic[T]):
         )
 
     def postload(self, obj):
-        self.version += 1
+        self.invalidate(obj)
 
     def save(self, obj, save_func):
         pass
@@ -644,27 +673,27 @@ class derived(umlproperty, Generic[T]):
         """
         u = self.filter(obj)
         if self.upper == 1:
-            uc = unioncache(self, u[0] if u else None, self.version)
+            uc = unioncache(self, u[0] if u else None)
         else:
             c = collection(self, obj, self.type)
-            c.items.extend(u)  # type: ignore[arg-type]
-            uc = unioncache(self, c, self.version)
-        setattr(obj, self._name, uc)
+            c.extend_items(u)  # type: ignore[arg-type]
+            uc = unioncache(self, c)
+        if self.subsets:
+            self._set_value(obj, uc)
         return uc
 
     def get(self, obj):
-        if self.subsets:
-            try:
-                uc = getattr(obj, self._name)
-                if uc.version != self.version:
-                    uc = self._update(obj)
-                assert self is uc.owner
-            except AttributeError:
-                uc = self._update(obj)
-        else:
+        if (uc := self._get_value(obj)) is None:
             uc = self._update(obj)
+        else:
+            assert self is uc.owner
         return uc.data
 
+    def invalidate(self, obj):
+        """Drop the cached value for ``obj``, it's recalculated on the next
+        access."""
+        self._del_value(obj)
+
     def set(self, obj, value):
         raise AttributeError(f"Cannot set values on union {self.name}: {self.type}")
 
@@ -685,15 +714,15 @@ class derived(umlproperty, Generic[T]):
 
         # mimic the events for Set/Add/Delete
         if self.upper == 1:
-            old_value = hasattr(event.element, self._name) and self.get(event.element)
+            old_value = self._has_value(event.element) and self.get(event.element)
             # Make sure unions are created again
-            self.version += 1
+            self.invalidate(event.element)
             new_value = self.get(event.element)
             if old_value != new_value:
                 self.handle(DerivedSet(event.element, self, old_value, new_value))
         else:
             # Make sure unions are created again
-            self.version += 1
+            self.invalidate(event.element)
 
             if isinstance(event, AssociationSet):
                 self.handle(DerivedDeleted(event.element, self, event.old_value))
@@ -765,7 +794,7 @@ class derivedunion(derived[T]):
         if event.property not in self.subsets:
             return
         # Make sure unions are created again
-        self.version += 1
+        self.invalidate(event.element)
 
         if not isinstance(event, AssociationUpdated):
             return
@@ -905,3 +934,92 @@ class redefine(umlproperty):
                     + str(event)
                     + " for redefined association"
                 )
+
+
+class PropertyTables(NamedTuple):
+    """The properties defined on a class, split by kind.
+
+    All tables are in ``dir()`` (alphabetical) order. ``persistent``
+    contains the attributes and associations, the properties that hold
+    state that can be saved and unlinked.
+    """
+
+    all: tuple[umlproperty, ...]
+    persistent: tuple[umlproperty, ...]
+    attributes: tuple[umlproperty, ...]
+    associations: tuple[umlproperty, ...]
+    derived: tuple[umlproperty, ...]
+
+
+_property_tables: dict[type, PropertyTables] = {}
+
+
+def property_tables(cls: type) -> PropertyTables:
+    """Return the (cached) property tables for a class."""
+    try:
+        return _property_tables[cls]
+    except KeyError:
+        tables = _property_tables[cls] = _build_property_tables(cls)
+        return tables
+
+
+_property_layouts: dict[type, dict[umlproperty, int]] = {}
+
+
+def property_slot(cls: type, prop: umlproperty) -> int:
+    """The position of the value of ``prop`` in ``Element._values``, for
+    elements of class ``cls``.
+
+    Slots are numbered per class, in the order properties are first
+    used. Values that are never set take no space. Slots are never
+    reassigned, also not when property tables are cleared.
+    """
+    layout = _property_layouts.setdefault(cls, {})
+    try:
+        return layout[prop]
+    except KeyError:
+        slot = layout[prop] = len(layout)
+        return slot
+
+
+def clear_property_tables() -> None:
+    """Invalidate all property tables.
+
+    Should be called when properties are added to classes after tables
+    have been built, e.g. when modeling languages are registered.
+    """
+    _property_tables.clear()
+
+
+def _build_property_tables(cls: type) -> PropertyTables:
+    all = []
+    persistent = []
+    attributes = []
+    associations = []
+    derived_ = []
+    for propname in dir(cls):
+        if propname.startswith("_"):
+            continue
+        prop = getattr(cls, propname)
+        if not isinstance(prop, umlproperty):
+            continue
+        all.append(prop)
+        kind = prop.original if isinstance(prop, redefine) else prop
+        if isinstance(prop, redefine) and prop.original.name != prop.name:
+            # Redefines only delegate to an original with the same name
+            continue
+        if isinstance(kind, (attribute, enumeration)):
+            attributes.append(prop)
+            persistent.append(prop)
+        elif isinstance(kind, (association, associationstub)):
+            associations.append(prop)
+            persistent.append(prop)
+        elif isinstance(kind, derived):
+            derived_.append(prop)
+    return PropertyTables(
+        tuple(all),
+        tuple(persistent),
+        tuple(attributes),
+        tuple(associations),
+        tuple(derived_),
+    )
@@ -0,0 +1,98 @@
+"""Attribute indexes and queries for the element factory.
+
+An :class:`~gaphor.core.modeling.ElementFactory` can index elements on
+attribute values, for example ``name``. Queries use such an index to find
+candidate elements. If no index is available, elements are scanned.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Hashable, Iterable, Iterator
+
+from gaphor.core.modeling.element import Element, Id
+from gaphor.core.modeling.properties import umlproperty
+
+
+class one_of(frozenset[object]):
+    """Query criterion that matches any of the provided values.
+
+    >>> criterion = one_of("Class", "Package")
+    >>> "Class" in criterion
+    True
+    """
+
+    def __new__(cls, *values: object):
+        return super().__new__(cls, values)  # type: ignore[arg-type]
+
+
+_missing = object()
+
+
+class AttributeIndex:
+    """Elements by the value of an attribute or single-valued association.
+
+    Elements are only indexed by values that are not ``None``.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._elements: dict[object, dict[Id, Element]] = {}
+        self._values: dict[Id, object] = {}
+
+    def applies_to(self, element: Element) -> bool:
+        return isinstance(getattr(type(element), self.name, None), umlproperty)
+
+    def update(self, element: Element, value: object) -> None:
+        self.remove(element)
+        if value is not None:
+            self._values[element.id] = value
+            try:
+                self._elements[value][element.id] = element
+            except KeyError:
+                self._elements[value] = {element.id: element}
+
+    def remove(self, element: Element) -> None:
+        old = self._values.pop(element.id, _missing)
+        if old is not _missing:
+            bucket = self._elements[old]
+            del bucket[element.id]
+            if not bucket:
+                del self._elements[old]
+
+    def lookup(self, value: object) -> Iterator[Element]:
+        """Iterate elements with ``value``.
+
+        The index can be out of date for elements that are in an
+        intermediate state, hence values should be checked by the
+        caller.
+        """
+        values = value if isinstance(value, one_of) else (value,)
+        for v in values:
+            if bucket := self._elements.get(v):
+                yield from list(bucket.values())
+
+
+def compile_criteria(criteria: dict[str, object]) -> Callable[[Element], bool]:
+    """Turn query criteria (attribute name and value) into a predicate."""
+    checks: list[Callable[[Element], bool]] = []
+    for name, value in criteria.items():
+        if isinstance(value, one_of):
+            checks.append(lambda e, n=name, v=value: getattr(e, n, _missing) in v)  # type: ignore[misc]
+        else:
+            checks.append(lambda e, n=name, v=value: getattr(e, n, _missing) == v)  # type: ignore[misc]
+
+    def predicate(element: Element) -> bool:
+        return all(check(element) for check in checks)
+
+    return predicate
+
+
+def indexable(criteria: dict[str, object]) -> Iterable[tuple[str, object]]:
+    """Criteria that can be looked up in an index."""
+    return (
+        (name, value)
+        for name, value in criteria.items()
+        if value is not None
+        and isinstance(value, Hashable)
+        and not (isinstance(value, one_of) and None in value)
+    )
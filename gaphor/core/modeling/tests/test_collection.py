@@ -126,3 +126,54 @@ def test_swap():
     c.swap("a", "c")
     assert c.items == ["c", "b", "a"]
     assert o.events
+
+
+def test_index_after_insert_and_remove():
+    c: collection[str] = collection(None, None, str)
+    c.items = ["a", "b", "c"]  # type: ignore[assignment]
+
+    c.insert_item(0, "d")
+    assert c.remove_item("b") == 2
+
+    assert c.items == ["d", "a", "c"]
+    assert c.index("c") == 2
+    assert "b" not in c
+
+
+def test_index_of_missing_item():
+    c: collection[str] = collection(None, None, str)
+
+    with pytest.raises(ValueError):
+        c.index("a")
+
+
+def test_swap_updates_index():
+    o = MockElement()
+    c: collection[str] = collection(None, o, str)
+    c.items = ["a", "b", "c"]  # type: ignore[assignment]
+    c.swap("a", "c")
+
+    assert c.index("a") == 2
+    assert c.index("c") == 0
+
+
+def test_order_updates_index():
+    o = MockElement()
+    c: collection[str] = collection(None, o, str)
+    c.items = ["c", "b", "a"]  # type: ignore[assignment]
+    c.order(lambda e: e)
+
+    assert c.items == ["a", "b", "c"]
+    assert c.index("a") == 0
+
+
+def test_large_collection_is_indexed():
+    items = [object() for _ in range(collection.INDEX_THRESHOLD * 2)]
+    c: collection[object] = collection(None, None, object)
+    c.items = items
+
+    c.remove_item(items[3])
+
+    assert items[3] not in c
+    assert c.index(items[4]) == 3
+    assert c.index(items[-1]) == len(items) - 2
@@ -1,7 +1,8 @@
 import gaphas
 import pytest
 
-from gaphor.core.modeling import Diagram, Presentation, StyleSheet
+from gaphor.core import event_handler
+from gaphor.core.modeling import Diagram, DiagramUpdated, Presentation, StyleSheet
 
 
 class Example(gaphas.Element, Presentation):
@@ -128,3 +129,57 @@ def test_order_grouped_presentations(diagram):
     example_1.parent = example_2
 
     assert list(diagram.get_all_items()) == [example_2, example_1]
+
+
+class UpdatedExample(Example):
+    def __init__(self, diagram, id):
+        super().__init__(diagram, id)
+        self.updates = 0
+
+    def update(self, context):
+        self.updates += 1
+
+
+def test_deferred_update(diagram):
+    example = diagram.create(UpdatedExample)
+    updates = example.updates
+
+    diagram.defer_update()
+
+    assert example.updates == updates
+
+    diagram.update()
+
+    assert example.updates == updates + 1
+
+
+@pytest.fixture
+def updated_events(event_manager):
+    events = []
+
+    @event_handler(DiagramUpdated)
+    def handler(event):
+        events.append(event)
+
+    event_manager.subscribe(handler)
+    return events
+
+
+def test_update_emits_updated_items(diagram, updated_events):
+    example = diagram.create(Example)
+    diagram.request_update(example)
+
+    diagram.update()
+
+    assert updated_events[-1].diagram is diagram
+    assert updated_events[-1].items == [example]
+
+
+def test_no_updated_items_without_update_requests(diagram, updated_events):
+    diagram.create(Example)
+    diagram.update()
+    updated_events.clear()
+
+    diagram.update()
+
+    assert not updated_events
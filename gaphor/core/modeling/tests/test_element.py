@@ -1,6 +1,7 @@
 import pytest
 
 from gaphor.core.modeling.element import Element
+from gaphor.core.modeling.properties import association, attribute, derivedunion
 
 
 def test_element_note():
@@ -15,3 +16,43 @@ def test_element_can_not_set_random_property():
 
     with pytest.raises(AttributeError):
         e.random_property = 1
+
+
+def test_property_tables_are_split_by_kind():
+    class A(Element):
+        pass
+
+    A.attr = attribute("attr", str)
+    A.assoc = association("assoc", Element)
+    A.union = derivedunion("union", Element, 0, "*", A.assoc)
+
+    tables = A.property_tables()
+
+    assert A.attr in tables.attributes
+    assert A.assoc in tables.associations
+    assert A.union in tables.derived
+    assert A.union not in tables.persistent
+    assert list(A.umlproperties()) == list(tables.all)
+
+
+def test_property_tables_are_updated_for_new_properties():
+    class A(Element):
+        pass
+
+    assert A.property_tables() is A.property_tables()
+
+    A.attr = attribute("attr", str)
+
+    assert A.attr in A.umlproperties()
+
+
+def test_property_tables_are_ordered_by_name():
+    class A(Element):
+        pass
+
+    A.b = attribute("b", str)
+    A.a = attribute("a", str)
+
+    names = [p.name for p in A.property_tables().attributes]
+
+    assert names == sorted(names)
@@ -133,6 +133,58 @@ def test_register_handler_twice(
     assert len(event.events) == 1
 
 
+def test_path_is_compiled_once_per_type(dispatcher, element_factory, event):
+    compiled = []
+    compile_path = dispatcher._compile_path
+
+    def spy(*args):
+        compiled.append(args)
+        return compile_path(*args)
+
+    dispatcher._compile_path = spy
+    for _ in range(3):
+        element = element_factory.create(UML.Class)
+        dispatcher.subscribe(event.handler, element, "ownedOperation.name")
+    element = element_factory.create(UML.Interface)
+    dispatcher.subscribe(event.handler, element, "ownedOperation.name")
+
+    assert compiled == [
+        (UML.Class, "ownedOperation.name"),
+        (UML.Interface, "ownedOperation.name"),
+    ]
+
+
+def test_compiled_paths_are_shared(dispatcher, element_factory, event):
+    a = element_factory.create(UML.Class)
+    b = element_factory.create(UML.Class)
+    dispatcher.subscribe(event.handler, a, "ownedOperation.name")
+    dispatcher.subscribe(event.handler, b, "ownedOperation.name")
+
+    (remainder_a,) = dispatcher._registrations((a, UML.Class.ownedOperation))[
+        event.handler
+    ]
+    (remainder_b,) = dispatcher._registrations((b, UML.Class.ownedOperation))[
+        event.handler
+    ]
+
+    assert remainder_a is remainder_b
+
+
+def test_unregister_one_of_multiple_handlers(dispatcher, uml_class, handler, event):
+    dispatcher.subscribe(event.handler, uml_class, "name")
+    dispatcher.subscribe(handler, uml_class, "name")
+
+    dispatcher.unsubscribe(event.handler)
+    uml_class.name = "Name"
+
+    assert not event.events
+    assert len(handler.events) == 1
+
+    dispatcher.unsubscribe(handler)
+
+    assert not dispatcher._handlers
+
+
 def test_unregister_handler(dispatcher, uml_class, uml_operation, uml_parameter, event):
     # First some setup:
     element = uml_class
@@ -4,14 +4,19 @@ from collections.abc import Container, Iterable
 import pytest
 
 from gaphor.core import event_handler
+from gaphor.core.modeling import Element
 from gaphor.core.modeling.event import (
+    AssociationSet,
     ElementCreated,
     ElementDeleted,
+    ElementsCreated,
+    ElementUpdated,
     ModelFlushed,
     ServiceEvent,
 )
 from gaphor.core.modeling.presentation import Presentation
-from gaphor.UML import Operation, Parameter
+from gaphor.core.modeling.query import one_of
+from gaphor.UML import Class, Classifier, Operation, Package, Parameter, Property
 
 
 def test_element_factory_is_an_iterable(element_factory):
@@ -89,6 +94,94 @@ def test_unlink(element_factory):
     assert not list(element_factory.values()), list(element_factory.values())
 
 
+def test_select_by_type(element_factory):
+    klass = element_factory.create(Class)
+    element_factory.create(Parameter)
+
+    assert element_factory.lselect(Class) == [klass]
+
+
+def test_select_by_type_includes_subclasses_in_creation_order(element_factory):
+    c1 = element_factory.create(Class)
+    element_factory.create(Parameter)
+    p = element_factory.create(Property)
+    c2 = element_factory.create(Class)
+
+    assert element_factory.lselect(Classifier) == [c1, c2]
+    assert element_factory.lselect(Property) == [p]
+    assert [type(e) for e in element_factory.select(Element)] == [
+        Class,
+        Parameter,
+        Property,
+        Class,
+    ]
+
+
+def test_select_by_type_after_unlink(element_factory):
+    c1 = element_factory.create(Class)
+    c2 = element_factory.create(Class)
+
+    c1.unlink()
+
+    assert element_factory.lselect(Class) == [c2]
+
+
+def test_query_without_index(element_factory):
+    c1 = element_factory.create(Class)
+    c1.name = "Foo"
+    c2 = element_factory.create(Class)
+    c2.name = "Bar"
+
+    assert list(element_factory.query(Class, name="Foo")) == [c1]
+    assert list(element_factory.query(Class, name=one_of("Foo", "Bar"))) == [c1, c2]
+
+
+def test_query_with_name_index(element_factory):
+    element_factory.add_index("name")
+    c1 = element_factory.create(Class)
+    c1.name = "Foo"
+    c2 = element_factory.create(Class)
+    c2.name = "Foo"
+    p = element_factory.create(Parameter)
+    p.name = "Foo"
+
+    assert list(element_factory.query(Class, name="Foo")) == [c1, c2]
+    assert list(element_factory.query(Element, name="Foo")) == [c1, c2, p]
+
+
+def test_name_index_follows_updates(element_factory):
+    element_factory.add_index("name")
+    c = element_factory.create(Class)
+    c.name = "Foo"
+    c.name = "Bar"
+
+    assert list(element_factory.query(Class, name="Foo")) == []
+    assert list(element_factory.query(Class, name="Bar")) == [c]
+
+    c.unlink()
+
+    assert list(element_factory.query(Class, name="Bar")) == []
+
+
+def test_owner_index(element_factory):
+    c = element_factory.create(Class)
+    o = element_factory.create(Operation)
+    element_factory.add_index("owner")
+
+    c.ownedOperation = o
+
+    assert list(element_factory.query(Operation, owner=c)) == [o]
+
+
+def test_index_is_built_for_existing_elements(element_factory):
+    c = element_factory.create(Class)
+    c.name = "Foo"
+
+    element_factory.add_index("name")
+
+    assert list(element_factory.query(Class, name="Foo")) == [c]
+
+
 # Event handlers are registered as persisting top level handlers, since no
 # unsubscribe functionality is provided.
 handled = False
@@ -176,3 +269,94 @@ def test_indirect_delete_of_element(event_manager, element_factory):
     with pytest.raises(TypeError):
         assert operation.model
     assert operation not in element_factory
+
+
+def test_bulk_emits_one_event(element_factory):
+    with element_factory.bulk():
+        classes = [element_factory.create(Class) for _ in range(3)]
+
+    assert len(events) == 1
+    assert isinstance(last_event, ElementsCreated)
+    assert last_event.elements == classes
+
+
+@pytest.fixture
+def updates(event_manager):
+    updates = []
+
+    @event_handler(ElementUpdated)
+    def on_element_updated(event):
+        updates.append(event)
+
+    event_manager.subscribe(on_element_updated)
+    yield updates
+    event_manager.unsubscribe(on_element_updated)
+
+
+def test_bulk_defers_updates_of_new_elements(element_factory, updates):
+    with element_factory.bulk():
+        c = element_factory.create(Class)
+        c.name = "Name"
+        assert not events
+        assert not updates
+
+    assert isinstance(events[0], ElementsCreated)
+    assert [e.property for e in updates] == [Class.name]
+    assert updates[0].element is c
+
+
+def test_bulk_emits_association_set_events_of_new_elements(
+    element_factory, event_manager
+):
+    association_set = []
+
+    @event_handler(AssociationSet)
+    def on_association_set(event):
+        association_set.append(event)
+
+    event_manager.subscribe(on_association_set)
+    package = element_factory.create(Package)
+
+    with element_factory.bulk():
+        c = element_factory.create(Class)
+        c.package = package
+
+    event_manager.unsubscribe(on_association_set)
+
+    assert any(
+        e.element is c and e.property is Class.package for e in association_set
+    )
+
+
+def test_bulk_emits_updates_of_existing_elements(element_factory, updates):
+    package = element_factory.create(Package)
+    clear_events()
+
+    with element_factory.bulk():
+        c = element_factory.create(Class)
+        c.package = package
+
+    assert isinstance(last_event, ElementsCreated)
+    assert updates
+    assert all(e.element is package for e in updates)
+
+
+def test_bulk_drops_elements_unlinked_in_block(element_factory):
+    with element_factory.bulk():
+        c = element_factory.create(Class)
+        p = element_factory.create(Property)
+        p.unlink()
+
+    assert last_event.elements == [c]
+    assert p not in element_factory
+
+
+def test_nested_bulk(element_factory):
+    with element_factory.bulk():
+        a = element_factory.create(Class)
+        with element_factory.bulk():
+            b = element_factory.create(Class)
+        assert not events
+
+    assert len(events) == 1
+    assert last_event.elements == [a, b]
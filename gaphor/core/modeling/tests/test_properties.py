@@ -1,3 +1,5 @@
+# ruff: noqa: SLF001
+
 from __future__ import annotations
 
 import pytest
@@ -552,6 +554,52 @@ def test_derivedunion():
     assert d in a.u
 
 
+def test_derived_is_only_updated_for_changed_element():
+    class A(Element):
+        a: relation_many[A]
+        u: relation_many[A]
+
+    updates = []
+
+    def count_updates(obj):
+        updates.append(obj)
+        return list(obj.a)
+
+    A.a = association("a", A)
+    A.u = derived("u", A, 0, "*", count_updates, A.a)
+
+    elements = [A() for _ in range(10_000)]
+    for e in elements:
+        assert not e.u
+    updates.clear()
+
+    changed = elements[5_000]
+    changed.a = A()
+    for e in elements:
+        e.u  # noqa: B018
+
+    assert updates == [changed]
+
+
+def test_derivedunion_is_updated_after_subset_change():
+    class A(Element):
+        a: relation_many[A]
+        u: relation_many[A]
+
+    A.a = association("a", A)
+    A.u = derivedunion("u", A, 0, "*", A.a)
+
+    a1 = A()
+    a2 = A()
+    assert not a1.u
+    assert not a2.u
+
+    a1.a = b = A()
+
+    assert b in a1.u
+    assert not a2.u
+
+
 def test_derivedunion_notify_for_single_derived_property():
     class A(Element):
         pass
@@ -670,3 +718,54 @@ def test_composite():
     a.unlink()
     assert a.is_unlinked
     assert b.is_unlinked
+
+
+def test_property_values_are_stored_in_slots():
+    class A(Element):
+        name = attribute("name", str)
+        note2 = attribute("note2", str)
+
+    a = A()
+    assert a._values == ()
+
+    a.note2 = "n"
+    a.name = "a"
+    assert a._values == ["n", "a"]
+
+    del a.name
+    assert a._values == ["n"]
+
+    del a.note2
+    assert a._values == []
+
+
+def test_property_slots_are_kept_when_properties_are_added():
+    class A(Element):
+        name = attribute("name", str)
+
+    a = A()
+    a.name = "a"
+
+    A.other = attribute("other", str)
+    a.other = "o"
+
+    assert a.name == "a"
+    assert a.other == "o"
+    assert A().name is None
+
+
+def test_property_slots_are_per_class():
+    class A(Element):
+        name = attribute("name", str)
+        note2 = attribute("note2", str)
+
+    class B(A):
+        pass
+
+    a = A()
+    a.name = "a"
+    b = B()
+    b.note2 = "b"
+
+    assert a._values == ["a"]
+    assert b._values == ["b"]
@@ -1,6 +1,8 @@
 import pytest
 
 from gaphor.core.eventmanager import event_handler
+from gaphor.tests.raises import raises_exception_group
+from gaphor.transaction import Transaction
 
 
 class Event:
@@ -99,3 +101,161 @@ def test_priority_handler_error_in_handler_and_second_event(event_manager):
         event_manager.handle(event)
 
     assert other_events
+
+
+class ChangeEvent:
+    def __init__(self, element, value):
+        self.element = element
+        self.value = value
+
+    @property
+    def coalesce_key(self):
+        return self.element
+
+
+def create_batch_handler(event_type):
+    batches = []
+
+    @event_handler(event_type, batch=True)
+    def handler(events):
+        batches.append(events)
+
+    return handler, batches
+
+
+def test_batch_handler_outside_transaction(event_manager):
+    handler, batches = create_batch_handler(Event)
+    event_manager.subscribe(handler)
+    event = Event()
+
+    event_manager.handle(event)
+
+    assert batches == [[event]]
+
+
+def test_batch_handler_in_transaction(event_manager):
+    handler, batches = create_batch_handler(Event)
+    event_manager.subscribe(handler)
+    events = [Event(), Event()]
+
+    with Transaction(event_manager):
+        event_manager.handle(*events)
+        assert not batches
+
+    assert batches == [events]
+
+
+def test_batch_handler_receives_coalesced_events(event_manager):
+    handler, batches = create_batch_handler(ChangeEvent)
+    event_manager.subscribe(handler)
+    first = ChangeEvent("a", 1)
+    other = ChangeEvent("b", 1)
+    last = ChangeEvent("a", 2)
+
+    with Transaction(event_manager):
+        event_manager.handle(first, other, last)
+
+    assert batches == [[other, last]]
+
+
+def test_batch_handler_on_rollback(event_manager):
+    handler, batches = create_batch_handler(Event)
+    event_manager.subscribe(handler)
+    event = Event()
+
+    with Transaction(event_manager) as tx:
+        event_manager.handle(event)
+        tx.rollback()
+
+    assert batches == [[event]]
+
+
+def test_priority_handler_in_transaction(event_manager):
+    handler, events = create_handler(ChangeEvent)
+    event_manager.priority_subscribe(handler)
+    first = ChangeEvent("a", 1)
+    last = ChangeEvent("a", 2)
+
+    with Transaction(event_manager):
+        event_manager.handle(first, last)
+        assert events == [first, last]
+
+
+def test_unsubscribed_batch_handler(event_manager):
+    handler, batches = create_batch_handler(Event)
+    event_manager.subscribe(handler)
+
+    with Transaction(event_manager):
+        event_manager.handle(Event())
+        event_manager.unsubscribe(handler)
+
+    assert not batches
+
+
+def test_profile_handlers(event_manager):
+    handler, _events = create_handler(Event)
+    event_manager.subscribe(handler)
+    profile = event_manager.start_profiling()
+
+    event_manager.handle(Event())
+    event_manager.handle(Event())
+
+    assert event_manager.stop_profiling() is profile
+    (stats,) = profile.stats.values()
+    assert stats.calls == 2
+    assert stats.total >= stats.max > 0
+    assert "create_handler.<locals>.handler (Event)" in profile.report()
+
+
+def test_profile_nested_events(event_manager):
+    @event_handler(Event)
+    def handler(event):
+        event_manager.handle(OtherEvent(), OtherEvent())
+
+    event_manager.subscribe(handler)
+    profile = event_manager.start_profiling()
+
+    event_manager.handle(Event())
+
+    assert profile.max_queue_depth == 2
+    assert profile.max_nesting == 1
+
+
+def test_profile_handlers_subscribed_while_profiling(event_manager):
+    handler, events = create_handler(Event)
+    profile = event_manager.start_profiling()
+    event_manager.subscribe(handler)
+
+    event_manager.handle(Event())
+    event_manager.unsubscribe(handler)
+    event_manager.handle(Event())
+
+    (stats,) = profile.stats.values()
+    assert stats.calls == 1
+    assert len(events) == 1
+
+
+def test_stop_profiling_handlers(event_manager):
+    handler, events = create_handler(Event)
+    event_manager.subscribe(handler)
+    profile = event_manager.start_profiling()
+    event_manager.stop_profiling()
+
+    event_manager.handle(Event())
+
+    assert not profile.stats
+    assert len(events) == 1
+
+
+def test_profiled_handler_exception(event_manager):
+    @event_handler(Event)
+    def handler(event):
+        raise ValueError()
+
+    event_manager.subscribe(handler)
+    profile = event_manager.start_profiling()
+
+    with raises_exception_group(ValueError):
+        event_manager.handle(Event())
+
+    assert profile.stats
@@ -436,11 +436,15 @@ class ItemConnected(RevertibleEvent):
         self.connected_id = connected.id
         self.port_index = connected.ports().index(port)
 
-    def revert(self, target):
+    def revert_state(self):
+        return (self.handle_index,)
+
+    @classmethod
+    def revert_from_state(cls, target, handle_index):
         # Reverse only the diagram level connection.
         # Associations have their own handlers
         connections = target.diagram.connections
-        handle = target.handles()[self.handle_index]
+        handle = target.handles()[handle_index]
 
         connector = ConnectorAspect(target, handle, connections)
         connector.disconnect_handle()
@@ -453,15 +457,19 @@ class ItemDisconnected(RevertibleEvent):
         self.connected_id = connected.id
         self.port_index = connected.ports().index(port)
 
-    def revert(self, target):
+    def revert_state(self):
+        return (self.handle_index, self.connected_id, self.port_index)
+
+    @classmethod
+    def revert_from_state(cls, target, handle_index, connected_id, port_index):
         # Reverse only the diagram level connection.
         # Associations have their own handlers
-        handle = target.handles()[self.handle_index]
+        handle = target.handles()[handle_index]
         connections = target.diagram.connections
-        connected = target.diagram.lookup(self.connected_id)
+        connected = target.diagram.lookup(connected_id)
 
         sink = ConnectionSink(connected)
-        sink.port = connected.ports()[self.port_index]
+        sink.port = connected.ports()[port_index]
         connector = ConnectorAspect(target, handle, connections)
         connector.connect_handle(sink)
 
@@ -473,13 +481,17 @@ class ItemTemporaryDisconnected(RevertibleEvent):
         self.connected_id = connected.id
         self.port_index = connected.ports().index(port)
 
-    def revert(self, target):
-        handle = target.handles()[self.handle_index]
+    def revert_state(self):
+        return (self.handle_index, self.connected_id, self.port_index)
+
+    @classmethod
+    def revert_from_state(cls, target, handle_index, connected_id, port_index):
+        handle = target.handles()[handle_index]
         connections = target.diagram.connections
-        connected = target.diagram.lookup(self.connected_id)
+        connected = target.diagram.lookup(connected_id)
 
         sink = ConnectionSink(connected)
-        sink.port = connected.ports()[self.port_index]
+        sink.port = connected.ports()[port_index]
         connector = ConnectorAspect(target, handle, connections)
         connector.reconnect_handle(sink)
 
@@ -491,9 +503,13 @@ class ItemReconnected(RevertibleEvent):
         self.connected_id = connected.id
         self.port_index = connected.ports().index(port)
 
-    def revert(self, target):
+    def revert_state(self):
+        return (self.handle_index,)
+
+    @classmethod
+    def revert_from_state(cls, target, handle_index):
         connections = target.diagram.connections
-        handle = target.handles()[self.handle_index]
+        handle = target.handles()[handle_index]
 
         cinfo = connections.get_connection(handle)
         connections.solver.remove_constraint(cinfo.constraint)
@@ -232,14 +232,15 @@ def _paste(copy_data: Opaque, diagram: Diagram, full: bool) -> set[Presentation]
         if looked_up := diagram.lookup(ref):
             return looked_up
 
-    for old_id in copy_data.elements.keys():
-        if old_id in new_elements:
-            continue
-        element_lookup(old_id)
-
-    for element in new_elements.values():
-        assert element
-        element.postload()
+    with model.bulk():
+        for old_id in copy_data.elements.keys():
+            if old_id in new_elements:
+                continue
+            element_lookup(old_id)
+
+        for element in new_elements.values():
+            assert element
+            element.postload()
 
     return {
         e
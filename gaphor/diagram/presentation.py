@@ -71,8 +71,16 @@ class HandlePositionEvent(RevertibleEvent):
         self.old_value = old_value
         self.new_value = handle.pos.tuple()
 
-    def revert(self, target):
-        target.handles()[self.handle_index].pos = self.old_value
+    @property
+    def coalesce_key(self):
+        return (self.element.id, "handle", self.handle_index)
+
+    def revert_state(self):
+        return (self.handle_index, self.old_value)
+
+    @classmethod
+    def revert_from_state(cls, target, handle_index, old_value):
+        target.handles()[handle_index].pos = old_value
         target.request_update()
 
 
@@ -53,9 +53,12 @@ class LineSplitSegmentEvent(RevertibleEvent):
         self.segment = segment
         self.count = count
 
-    def revert(self, target):
-        segment = Segment(target, target.diagram)
-        segment.merge_segment(self.segment, self.count)
+    def revert_state(self):
+        return (self.segment, self.count)
+
+    @classmethod
+    def revert_from_state(cls, target, segment, count):
+        Segment(target, target.diagram).merge_segment(segment, count)
 
 
 class LineMergeSegmentEvent(RevertibleEvent):
@@ -64,6 +67,9 @@ class LineMergeSegmentEvent(RevertibleEvent):
         self.segment = segment
         self.count = count
 
-    def revert(self, target):
-        segment = Segment(target, target.diagram)
-        segment.split_segment(self.segment, self.count)
+    def revert_state(self):
+        return (self.segment, self.count)
+
+    @classmethod
+    def revert_from_state(cls, target, segment, count):
+        Segment(target, target.diagram).split_segment(segment, count)
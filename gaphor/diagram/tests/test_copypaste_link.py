@@ -1,5 +1,6 @@
 from gaphor import UML
-from gaphor.core.modeling import Diagram
+from gaphor.core import event_handler
+from gaphor.core.modeling import Diagram, ElementCreated, ElementsCreated
 from gaphor.diagram.copypaste import copy, copy_full, paste, paste_link
 from gaphor.diagram.general.simpleitem import Box, Ellipse, Line
 from gaphor.diagram.tests.fixtures import connect, copy_clear_and_paste_link
@@ -187,3 +188,26 @@ def test_copy_to_new_diagram(diagram, element_factory):
 
     assert len(list(new_diagram.get_all_items())) == 1
     assert next(new_diagram.get_all_items()).diagram is new_diagram
+
+
+def test_paste_emits_one_elements_created_event(
+    diagram, element_factory, event_manager
+):
+    events = []
+
+    @event_handler(ElementCreated, ElementsCreated)
+    def on_created(event):
+        events.append(event)
+
+    cls = element_factory.create(UML.Class)
+    cls_item1 = diagram.create(ClassItem, subject=cls)
+    cls_item2 = diagram.create(ClassItem, subject=cls)
+    buffer = copy_full({cls_item1, cls_item2})
+
+    event_manager.subscribe(on_created)
+    new_items = paste_link(buffer, diagram)
+    event_manager.unsubscribe(on_created)
+
+    assert len(events) == 1
+    assert isinstance(events[0], ElementsCreated)
+    assert set(events[0].elements) == new_items
@@ -73,12 +73,31 @@ class SessionShutdown(ServiceEvent):
     """The session is emitting this event when it's ready to shut down."""
 
 
-class ModelSaved:
+class ModelSaving:
+    """The state of the model is captured, to be saved.
+
+    Changes made after this event, while the model is written, are not
+    part of the saved model.
+    """
+
     def __init__(self, service, filename: Path | None = None):
         self.service = service
         self.filename = filename
 
 
+class ModelSaved:
+    """The model is saved.
+
+    ``modified`` is set if the model has been changed while it was
+    written.
+    """
+
+    def __init__(self, service, filename: Path | None = None, modified=False):
+        self.service = service
+        self.filename = filename
+        self.modified = modified
+
+
 class ModelChangedOnDisk:
     def __init__(self, service, filename: Path | None = None):
         self.service = service
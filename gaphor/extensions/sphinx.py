@@ -13,7 +13,8 @@ from gaphor.core.modeling import Diagram, ElementFactory
 from gaphor.diagram.export import save_pdf, save_svg
 from gaphor.i18n import gettext
 from gaphor.services.modelinglanguage import ModelingLanguageService
-from gaphor.storage import storage
+from gaphor.storage import modelindex, storage
+from gaphor.storage.checksum import sha256sum
 
 log = logging.getLogger(__name__)
 
@@ -66,30 +67,22 @@ class DiagramDirective(sphinx.util.docutils.SphinxDirective):
             )
 
         self.env.note_dependency(model_file)
-        model = load_model(Path(self.env.srcdir) / model_file)
+        model_path = Path(self.env.srcdir) / model_file
+        entry = load_index(model_path).find_diagram(name)
 
-        outdir = (Path(self.env.app.doctreedir) / ".." / "gaphor").resolve()
-        outdir.mkdir(exist_ok=True)
-
-        diagram = next(
-            model.select(
-                lambda e: isinstance(e, Diagram) and ".".join(e.qualifiedName) == name
-            ),
-            None,
-        )
-
-        if not diagram:
-            diagram = next(
-                model.select(lambda e: isinstance(e, Diagram) and e.name == name), None
-            )
-
-        if not diagram:
+        if not entry:
             return self.logging_error_node(
                 gettext(
                     "No diagram '{name}' in model '{model_name}' ({model_file})."
                 ).format(name=name, model_name=model_name, model_file=model_file)
             )
 
+        outdir = (Path(self.env.app.doctreedir) / ".." / "gaphor").resolve()
+        outdir.mkdir(exist_ok=True)
+
+        diagram = load_model(model_path).lookup(entry.id)
+        assert isinstance(diagram, Diagram)
+
         outfile = outdir / f"{diagram.id}"
         save_svg(outfile.with_suffix(".svg"), diagram)
         save_pdf(outfile.with_suffix(".pdf"), diagram)
@@ -113,15 +106,32 @@ class DiagramDirective(sphinx.util.docutils.SphinxDirective):
 
 
 @functools.cache
-def load_model(model_file: str) -> ElementFactory:
+def load_index(model_file: Path) -> modelindex.ModelIndex:
+    """The index of a model file, to find diagrams without loading it."""
+    checksum = sha256sum(model_file)
+    if index := modelindex.load(model_file, checksum):
+        return index
+
+    index = modelindex.model_index(load_model(model_file), checksum)
+    try:
+        modelindex.save(model_file, index)
+    except OSError:
+        log.warning(f"Unable to save model index for {model_file}")
+    return index
+
+
+@functools.cache
+def load_model(model_file: Path) -> ElementFactory:
     element_factory = ElementFactory()
 
     modeling_language = ModelingLanguageService()
 
     with open(model_file, encoding="utf-8") as file_obj:
+        # Only diagrams that are rendered are updated
         storage.load(
             file_obj,
             element_factory,
             modeling_language,
+            lazy_diagrams=True,
         )
     return element_factory
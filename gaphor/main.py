@@ -22,6 +22,8 @@ def main(argv=None) -> int:
 
         args = parse_args(argv[1:], commands)
 
+        if args.profile_events:
+            return run_event_profiler(args)
         return run_profiler(args) if args.profiler else args.command(args)  # type: ignore[no-any-return]
 
 
@@ -37,6 +39,18 @@ def run_profiler(args):
     return exit_code
 
 
+def run_event_profiler(args) -> int:
+    from gaphor.core.eventmanager import EventManager, EventProfile
+
+    profile = EventManager.profile = EventProfile()
+    try:
+        exit_code: int = run_profiler(args) if args.profiler else args.command(args)
+    finally:
+        EventManager.profile = None
+        print(profile.report())  # noqa: T201
+    return exit_code
+
+
 def parse_args(args: list[str], commands: dict[str, argparse.ArgumentParser]):
     defaults = default_parser()
     parser = argparse.ArgumentParser(
@@ -99,6 +113,11 @@ def default_parser():
     parser.add_argument(
         "--profiler", help="run in profiler (cProfile)", action="store_true"
     )
+    parser.add_argument(
+        "--profile-events",
+        help="report time spent in event handlers",
+        action="store_true",
+    )
     return parser
 
 
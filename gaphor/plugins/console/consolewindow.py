@@ -58,10 +58,13 @@ class ConsoleWindow(UIComponent, ActionProvider):
         window.set_default_size(700, 480)
 
         element_factory = self.component_registry.get_service("element_factory")
+        event_manager = self.component_registry.get_service("event_manager")
         console = GTKInterpreterConsole(
             locals={
                 "service": self.component_registry.get_service,
                 "select": element_factory.lselect,
+                "start_profiling": event_manager.start_profiling,
+                "stop_profiling": event_manager.stop_profiling,
             }
         )
         box = Gtk.Box(orientation="vertical")
@@ -3,6 +3,7 @@ from gi.repository import GLib, Gtk
 
 import gaphor.services.componentregistry
 import gaphor.ui.menufragment
+from gaphor.core.eventmanager import EventManager
 from gaphor.core.modeling import ElementFactory
 from gaphor.plugins.console.consolewindow import ConsoleWindow
 
@@ -16,6 +17,7 @@ class MainWindowStub:
 def component_registry():
     component_registry = gaphor.services.componentregistry.ComponentRegistry()
     component_registry.register("element_factory", ElementFactory())
+    component_registry.register("event_manager", EventManager())
     return component_registry
 
 
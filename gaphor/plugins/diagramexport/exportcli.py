@@ -9,7 +9,8 @@ from typing import List
 from gaphor.application import Session
 from gaphor.core.modeling import Diagram
 from gaphor.diagram.export import escape_filename, save_pdf, save_png, save_svg
-from gaphor.storage import storage
+from gaphor.storage import modelindex, storage
+from gaphor.storage.checksum import sha256sum
 
 log = logging.getLogger(__name__)
 
@@ -23,6 +24,19 @@ def pkg2dir(package):
     return "/".join(name)
 
 
+def index_path(diagram: modelindex.DiagramEntry) -> str:
+    """Diagram name including package path, from the model index."""
+    odir = "/".join(diagram.qualified_name[:-1])
+    return f"{odir}/{escape_filename(diagram.name)}"
+
+
+def update_index(filename: Path, factory, checksum: str) -> None:
+    try:
+        modelindex.save(filename, modelindex.model_index(factory, checksum))
+    except OSError:
+        log.warning("Unable to save model index for %s", filename, exc_info=True)
+
+
 def export_parser():
     parser = argparse.ArgumentParser(description="Export diagrams from a Gaphor model.")
 
@@ -74,11 +88,26 @@ def export_command(args):
     name_re = re.compile(args.regex, re.IGNORECASE) if args.regex else None
     # we should have some gaphor files to be processed at this point
     for model in args.model:
+        filename = Path(model)
+        checksum = sha256sum(filename)
+        index = modelindex.load(filename, checksum)
+        if (
+            name_re
+            and index
+            and not any(name_re.search(index_path(d)) for d in index.diagrams)
+        ):
+            log.debug("no diagrams to export in %s", model)
+            continue
+
         log.debug("loading model %s", model)
         with open(model, encoding="utf-8") as file_obj:
-            storage.load(file_obj, factory, modeling_language)
+            # Only diagrams that are rendered are updated
+            storage.load(file_obj, factory, modeling_language, lazy_diagrams=True)
         log.debug("ready for rendering")
 
+        if not index:
+            update_index(filename, factory, checksum)
+
         for diagram in factory.select(Diagram):
             odir = pkg2dir(diagram.owner)
 
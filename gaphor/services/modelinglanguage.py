@@ -3,6 +3,7 @@ from typing import Dict, Iterable
 from gaphor.abc import ActionProvider, ModelingLanguage, Service
 from gaphor.action import action
 from gaphor.core import event_handler
+from gaphor.core.modeling.properties import clear_property_tables
 from gaphor.entrypoint import initialize
 from gaphor.services.properties import PropertyChanged
 
@@ -30,6 +31,8 @@ class ModelingLanguageService(Service, ActionProvider, ModelingLanguage):
         self._modeling_languages: Dict[str, ModelingLanguage] = initialize(
             "gaphor.modelinglanguages"
         )
+        # Modeling languages can extend existing classes with new properties
+        clear_property_tables()
         if event_manager:
             self.event_manager.subscribe(self.on_property_changed)
 
@@ -4,7 +4,7 @@ import pytest
 
 from gaphor.core import event_handler
 from gaphor.core.modeling import Element
-from gaphor.core.modeling.event import AssociationUpdated
+from gaphor.core.modeling.event import AssociationUpdated, RevertibleEvent
 from gaphor.core.modeling.properties import association, attribute, derivedunion
 from gaphor.services.undomanager import NotInTransactionException
 from gaphor.tests.raises import raises_exception_group
@@ -282,6 +282,22 @@ def test_element_factory_rollback(element_factory, undo_manager):
     assert element_factory.size() == 0
 
 
+def test_element_factory_bulk_undo(element_factory, undo_manager):
+    undo_manager.begin_transaction()
+    with element_factory.bulk():
+        a = element_factory.create(Element)
+        b = element_factory.create(Element)
+    undo_manager.commit_transaction()
+    assert element_factory.size() == 2
+
+    undo_manager.undo_transaction()
+    assert element_factory.size() == 0
+
+    undo_manager.redo_transaction()
+    assert element_factory.lookup(a.id)
+    assert element_factory.lookup(b.id)
+
+
 def test_uml_associations(event_manager, element_factory, undo_manager):
     class A(Element):
         is_unlinked = False
@@ -470,3 +486,141 @@ def test_redo_stack(event_manager, element_factory, undo_manager):
     assert element_factory.size() == 2
 
     assert element_factory.lookup(p.id)
+
+
+def test_undo_actions_do_not_refer_to_elements(
+    event_manager, element_factory, undo_manager
+):
+    with Transaction(event_manager):
+        a = element_factory.create(Element)
+        b = element_factory.create(Element)
+        a.note = "note"
+    with Transaction(event_manager):
+        a.unlink()
+        b.unlink()
+
+    for transaction in undo_manager._undo_stack:
+        for _action, args in transaction._actions:
+            assert not any(isinstance(arg, Element) for arg in args)
+
+    undo_manager.undo_transaction()
+
+    assert element_factory.lookup(a.id)
+    assert element_factory.lookup(b.id)
+
+
+def test_undo_stack_depth(event_manager, element_factory, undo_manager):
+    undo_manager._stack_depth = 3
+
+    for _ in range(5):
+        with Transaction(event_manager):
+            element_factory.create(Element)
+
+    assert len(undo_manager._undo_stack) == 3
+    assert undo_manager._stack_size == sum(t.size for t in undo_manager._undo_stack)
+
+
+def test_undo_stack_size(event_manager, element_factory, undo_manager):
+    with Transaction(event_manager):
+        element_factory.create(Element)
+    undo_manager._max_stack_size = undo_manager._stack_size * 2
+
+    for _ in range(5):
+        with Transaction(event_manager):
+            element_factory.create(Element)
+
+    assert len(undo_manager._undo_stack) == 2
+    assert undo_manager._stack_size <= undo_manager._max_stack_size
+
+    undo_manager.undo_transaction()
+    undo_manager.undo_transaction()
+
+    assert not undo_manager.can_undo()
+    assert element_factory.size() == 4
+
+
+def test_undo_stack_keeps_last_transaction(
+    event_manager, element_factory, undo_manager
+):
+    undo_manager._max_stack_size = 0
+
+    with Transaction(event_manager):
+        element_factory.create(Element)
+
+    assert len(undo_manager._undo_stack) == 1
+
+    undo_manager.undo_transaction()
+
+    assert element_factory.size() == 0
+    assert undo_manager._stack_size == 0
+
+
+class PositionChanged(RevertibleEvent):
+    def __init__(self, element, old_value):
+        super().__init__(element)
+        self.old_value = old_value
+
+    @property
+    def coalesce_key(self):
+        return (self.element.id, "position")
+
+    def revert_state(self):
+        return (self.old_value,)
+
+    @classmethod
+    def revert_from_state(cls, target, old_value):
+        target.note = old_value
+
+
+def test_coalesce_reversible_events(event_manager, element_factory, undo_manager):
+    with Transaction(event_manager):
+        a = element_factory.create(Element)
+
+    with Transaction(event_manager):
+        for old in ["", "1", "2"]:
+            a.handle(PositionChanged(a, old))
+        a.note = "3"
+
+    # One action for the position, one for the attribute change
+    assert len(undo_manager._undo_stack[-1]._actions) == 2
+
+    undo_manager.undo_transaction()
+
+    assert a.note == ""
+
+
+def test_coalesce_interleaved_reversible_events(
+    event_manager, element_factory, undo_manager
+):
+    with Transaction(event_manager):
+        a = element_factory.create(Element)
+        b = element_factory.create(Element)
+
+    with Transaction(event_manager):
+        for old in ["a", "b", "c"]:
+            a.handle(PositionChanged(a, f"a{old}"))
+            b.handle(PositionChanged(b, f"b{old}"))
+
+    assert len(undo_manager._undo_stack[-1]._actions) == 2
+
+    undo_manager.undo_transaction()
+
+    assert a.note == "aa"
+    assert b.note == "ba"
+
+
+def test_coalesce_reversible_events_until_other_action(
+    event_manager, element_factory, undo_manager
+):
+    with Transaction(event_manager):
+        a = element_factory.create(Element)
+        b = element_factory.create(Element)
+
+    with Transaction(event_manager):
+        a.handle(PositionChanged(a, "1"))
+        a.handle(PositionChanged(b, "2"))
+        a.handle(PositionChanged(a, "3"))
+        b.note = "b"
+        a.handle(PositionChanged(a, "4"))
+
+    assert len(undo_manager._undo_stack[-1]._actions) == 4
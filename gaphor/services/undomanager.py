@@ -2,16 +2,17 @@
 
 Undoing and redoing actions is managed through the UndoManager.
 
-An undo action should be a callable object (called with no arguments).
+An undo action is a callable object, with the arguments it should be
+called with. Undo actions record element ids and plain values, not the
+elements themselves.
 
-An undo action should return a callable object that acts as redo function.
-If None is returned the undo action is considered to be the redo action as well.
-
-NOTE: it would be nice to use actions in conjunction with functools.partial.
+Undoing an action emits change events of its own. Those are recorded as
+the redo actions.
 """
 
 import logging
-from typing import Callable, List
+import sys
+from typing import Callable, Hashable, List, Tuple
 
 from gaphor.abc import ActionProvider, Service
 from gaphor.action import action
@@ -25,6 +26,7 @@ from gaphor.core.modeling.event import (
     AttributeUpdated,
     ElementCreated,
     ElementDeleted,
+    ElementsCreated,
     ModelFlushed,
     ModelReady,
     RevertibleEvent,
@@ -44,6 +46,23 @@ from gaphor.transaction import Transaction
 logger = logging.getLogger(__name__)
 
 
+def estimated_size(value) -> int:
+    """Estimate the memory used by an undo record, in bytes.
+
+    Only containers and plain values are counted. Other objects, like
+    properties and element types, are shared with the model.
+    """
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimated_size(v) for v in value)
+    elif isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimated_size(k) + estimated_size(v) for k, v in value.items()
+        )
+    elif isinstance(value, (str, bytes, int, float)):
+        return sys.getsizeof(value)
+    return 0
+
+
 class ActionStack:
     """A transaction.
 
@@ -52,13 +71,39 @@ class ActionStack:
     played back when a transaction is executed. This executing a
     transaction has the effect of performing the actions recorded, which
     will typically undo actions performed by the user.
+
+    Actions are stored as a function and its arguments. The undo manager
+    only records element ids and plain values, so a transaction does not
+    keep (deleted) elements alive.
+
+    Actions can have a coalesce key, such as an element id and a
+    property. In a run of actions with a key, only the first action per
+    key is recorded: it restores the state from before all of them. Keys
+    may interleave, so dragging several items is one action per item.
+    An action without a key ends the run, since it may depend on the
+    state in between.
     """
 
     def __init__(self):
-        self._actions: List[Callable[[], None]] = []
+        self._actions: List[Tuple[Callable, tuple]] = []
+        self._coalesce_keys: set[Hashable] = set()
+        self.size = sys.getsizeof(self._actions)
+
+    def add(self, action, *args, coalesce_key=None):
+        if coalesce_key is None:
+            self._coalesce_keys.clear()
+        elif coalesce_key in self._coalesce_keys:
+            return
+        else:
+            self._coalesce_keys.add(coalesce_key)
+
+        delta = (action, args)
+        self._actions.append(delta)
+        self.size += estimated_size(delta) + sys.getsizeof(action)
 
-    def add(self, action):
-        self._actions.append(action)
+    def close(self):
+        """No more actions will be added."""
+        self._coalesce_keys.clear()
 
     def can_execute(self):
         return bool(self._actions)
@@ -66,9 +111,9 @@ class ActionStack:
     def execute(self):
         self._actions.reverse()
 
-        for act in self._actions:
-            logger.debug(act.__doc__)
-            act()
+        for act, args in self._actions:
+            logger.debug("%s%r", getattr(act, "__name__", act), args)
+            act(*args)
 
 
 class UndoManagerStateChanged(ServiceEvent):
@@ -118,7 +163,9 @@ class UndoManager(Service, ActionProvider):
         self.element_factory: RepositoryProtocol = element_factory
         self._undo_stack: List[ActionStack] = []
         self._redo_stack: List[ActionStack] = []
-        self._stack_depth = 20
+        self._stack_depth = 1000
+        self._stack_size = 0
+        self._max_stack_size = 16 * 1024 * 1024
         self._current_transaction = None
 
         event_manager.subscribe(self.ready)
@@ -131,6 +178,7 @@ class UndoManager(Service, ActionProvider):
 
         event_manager.priority_subscribe(self.undo_reversible_event)
         event_manager.priority_subscribe(self.undo_create_element_event)
+        event_manager.priority_subscribe(self.undo_create_elements_event)
         event_manager.priority_subscribe(self.undo_delete_element_event)
         event_manager.priority_subscribe(self.undo_attribute_change_event)
         event_manager.priority_subscribe(self.undo_association_set_event)
@@ -149,6 +197,7 @@ class UndoManager(Service, ActionProvider):
 
         self.event_manager.unsubscribe(self.undo_reversible_event)
         self.event_manager.unsubscribe(self.undo_create_element_event)
+        self.event_manager.unsubscribe(self.undo_create_elements_event)
         self.event_manager.unsubscribe(self.undo_delete_element_event)
         self.event_manager.unsubscribe(self.undo_attribute_change_event)
         self.event_manager.unsubscribe(self.undo_association_set_event)
@@ -157,6 +206,7 @@ class UndoManager(Service, ActionProvider):
 
     def clear_undo_stack(self):
         del self._undo_stack[:]
+        self._stack_size = 0
 
     def clear_redo_stack(self):
         del self._redo_stack[:]
@@ -179,17 +229,22 @@ class UndoManager(Service, ActionProvider):
         assert not self._current_transaction
         self._current_transaction = ActionStack()
 
-    def add_undo_action(self, action):
-        """Add an action to undo."""
+    def add_undo_action(self, action, *args, coalesce_key=None):
+        """Add an action to undo.
+
+        The action is called with ``args`` when the transaction is undone.
+        Actions with the same ``coalesce_key`` are recorded only once
+        until an action without a key is added (see :class:`ActionStack`).
+        """
         if self._current_transaction:
-            self._current_transaction.add(action)
+            self._current_transaction.add(action, *args, coalesce_key=coalesce_key)
             self._action_executed()
         else:
             with Transaction(self.event_manager, context="rollback"):
-                action()
+                action(*args)
 
             raise NotInTransactionException(
-                f"Updating state outside of a transaction: {action.__doc__}."
+                f"Updating state outside of a transaction: {getattr(action, '__name__', action)}."
             )
 
     @event_handler(TransactionCommit)
@@ -203,15 +258,14 @@ class UndoManager(Service, ActionProvider):
         if event is None:
             event = _UndoManagerTransactionCommitted(None)
 
+        self._current_transaction.close()
         if event.context != "rollback" and self._current_transaction.can_execute():
             if event.context == "undo":
                 self._redo_stack.append(self._current_transaction)
             else:
                 if event.context != "redo":
                     self.clear_redo_stack()
-                self._undo_stack.append(self._current_transaction)
-                while len(self._undo_stack) > self._stack_depth:
-                    del self._undo_stack[0]
+                self._push_undo(self._current_transaction)
 
         self._current_transaction = None
 
@@ -254,6 +308,7 @@ class UndoManager(Service, ActionProvider):
             self.commit_transaction()
 
         transaction = self._undo_stack.pop()
+        self._stack_size -= transaction.size
         with Transaction(self.event_manager, context="undo"):
             transaction.execute()
 
@@ -275,6 +330,21 @@ class UndoManager(Service, ActionProvider):
 
         self._action_executed()
 
+    def _push_undo(self, transaction: ActionStack) -> None:
+        """Add a transaction to the undo stack.
+
+        The oldest transactions are dropped if the stack holds more than
+        ``_stack_depth`` transactions, or if their estimated size exceeds
+        ``_max_stack_size`` bytes. The last transaction is always kept.
+        """
+        self._undo_stack.append(transaction)
+        self._stack_size += transaction.size
+        while len(self._undo_stack) > 1 and (
+            len(self._undo_stack) > self._stack_depth
+            or self._stack_size > self._max_stack_size
+        ):
+            self._stack_size -= self._undo_stack.pop(0).size
+
     def can_undo(self):
         return bool(self._current_transaction or self._undo_stack)
 
@@ -296,33 +366,42 @@ class UndoManager(Service, ActionProvider):
     #
     # Undo Handlers
     #
+    # Each handler records the function that reverts a change, with
+    # the ids and values it needs. Elements are looked up by id when
+    # the change is undone.
+    #
 
     @event_handler(RevertibleEvent)
     def undo_reversible_event(self, event: RevertibleEvent):
-        element_id = event.element.id
-
-        def undo_reversible_event():
-            element = self.lookup(element_id)
-            event.revert(element)
-
-        undo_reversible_event.__doc__ = (
-            f"Reverse event {event.__class__.__name__} for element {event.element}."
+        self.add_undo_action(
+            self._revert_event,
+            type(event),
+            event.element.id,
+            event.revert_state(),
+            coalesce_key=getattr(event, "coalesce_key", None),
         )
 
-        self.add_undo_action(undo_reversible_event)
+    def _revert_event(self, event_type, element_id, state):
+        event_type.revert_from_state(self.lookup(element_id), *state)
 
     @event_handler(ElementCreated)
     def undo_create_element_event(self, event: ElementCreated):
-        element_id = event.element.id
+        self.add_undo_action(self._unlink_element, event.element.id)
 
-        def undo_create_event():
-            element = self.lookup(element_id)
-            element.unlink()
+    def _unlink_element(self, element_id):
+        self.lookup(element_id).unlink()
 
-        undo_create_event.__doc__ = f"Undo create element {event.element}."
-        del event
+    @event_handler(ElementsCreated)
+    def undo_create_elements_event(self, event: ElementsCreated):
+        self.add_undo_action(
+            self._unlink_elements, tuple(element.id for element in event.elements)
+        )
 
-        self.add_undo_action(undo_create_event)
+    def _unlink_elements(self, element_ids):
+        # Elements can be unlinked already as part of their owner
+        for element_id in reversed(element_ids):
+            if element := self.element_factory.lookup(element_id):
+                element.unlink()
 
     @event_handler(ElementDeleted)
     def undo_delete_element_event(self, event: ElementDeleted):
@@ -330,7 +409,6 @@ class UndoManager(Service, ActionProvider):
         element_id = event.element.id
 
         if isinstance(event.element, Presentation):
-            diagram_id = event.diagram.id
             data = {}
 
             def save_func(name, value):
@@ -338,103 +416,89 @@ class UndoManager(Service, ActionProvider):
 
             event.element.save(save_func)
 
-            def undo_delete_event():
-                # If diagram is not there, for some reason, recreate it.
-                # It's probably removed in the same transaction.
-                try:
-                    diagram: Diagram = self.lookup(diagram_id)  # type: ignore[assignment]
-                except ValueError:
-                    diagram = self.element_factory.create_as(Diagram, diagram_id)
-
-                element = diagram.create_as(element_type, element_id)
-                for name, ser in data.items():
-                    for value in deserialize(ser, lambda ref: None):
-                        element.load(name, value)
-
+            self.add_undo_action(
+                self._recreate_presentation,
+                element_type,
+                element_id,
+                event.diagram.id,
+                data,
+            )
         else:
+            self.add_undo_action(self._recreate_element, element_type, element_id)
 
-            def undo_delete_event():
-                self.element_factory.create_as(element_type, element_id)
+    def _recreate_presentation(self, element_type, element_id, diagram_id, data):
+        # If diagram is not there, for some reason, recreate it.
+        # It's probably removed in the same transaction.
+        try:
+            diagram: Diagram = self.lookup(diagram_id)  # type: ignore[assignment]
+        except ValueError:
+            diagram = self.element_factory.create_as(Diagram, diagram_id)
 
-        undo_delete_event.__doc__ = f"Recreate element {element_type} ({element_id})."
-        del event
+        element = diagram.create_as(element_type, element_id)
+        for name, ser in data.items():
+            for value in deserialize(ser, lambda ref: None):
+                element.load(name, value)
 
-        self.add_undo_action(undo_delete_event)
+    def _recreate_element(self, element_type, element_id):
+        self.element_factory.create_as(element_type, element_id)
 
     @event_handler(AttributeUpdated)
     def undo_attribute_change_event(self, event: AttributeUpdated):
-        attribute = event.property
-        element_id = event.element.id
-        value = event.old_value
-
-        def undo_attribute_change_event():
-            element = self.lookup(element_id)
-            attribute.set(element, value)
-
-        undo_attribute_change_event.__doc__ = (
-            f"Revert {event.element}.{attribute.name} to {value}."
+        self.add_undo_action(
+            self._set_attribute, event.property, event.element.id, event.old_value
         )
-        del event
 
-        self.add_undo_action(undo_attribute_change_event)
+    def _set_attribute(self, attribute, element_id, value):
+        attribute.set(self.lookup(element_id), value)
 
     @event_handler(AssociationSet)
     def undo_association_set_event(self, event: AssociationSet):
         association = event.property
         if type(association) is not association_property:
             return
-        element_id = event.element.id
-        value_id = event.old_value and event.old_value.id
-
-        def undo_association_set_event():
-            element = self.lookup(element_id)
-            value = value_id and self.lookup(value_id)
-            association.set(element, value, from_opposite=True)
-
-        undo_association_set_event.__doc__ = (
-            f"Revert {event.element}.{association.name} to {event.old_value}."
+        self.add_undo_action(
+            self._set_association,
+            association,
+            event.element.id,
+            event.old_value and event.old_value.id,
         )
-        del event
 
-        self.add_undo_action(undo_association_set_event)
+    def _set_association(self, association, element_id, value_id):
+        element = self.lookup(element_id)
+        value = value_id and self.lookup(value_id)
+        association.set(element, value, from_opposite=True)
 
     @event_handler(AssociationAdded)
     def undo_association_add_event(self, event: AssociationAdded):
         association = event.property
         if type(association) is not association_property:
             return
-        element_id = event.element.id
-        value_id = event.new_value.id
-
-        def undo_association_add_event():
-            element = self.lookup(element_id)
-            value = self.lookup(value_id)
-            association.delete(element, value, from_opposite=True)
-
-        undo_association_add_event.__doc__ = (
-            f"{event.element}.{association.name} delete {event.new_value}."
+        self.add_undo_action(
+            self._delete_association,
+            association,
+            event.element.id,
+            event.new_value.id,
         )
-        del event
 
-        self.add_undo_action(undo_association_add_event)
+    def _delete_association(self, association, element_id, value_id):
+        element = self.lookup(element_id)
+        value = self.lookup(value_id)
+        association.delete(element, value, from_opposite=True)
 
     @event_handler(AssociationDeleted)
     def undo_association_delete_event(self, event: AssociationDeleted):
         association = event.property
         if type(association) is not association_property:
             return
-        element_id = event.element.id
-        value_id = event.old_value.id
-        index = event.index
-
-        def undo_association_delete_event():
-            element = self.lookup(element_id)
-            value = self.lookup(value_id)
-            association.set(element, value, index=index, from_opposite=True)
-
-        undo_association_delete_event.__doc__ = (
-            f"{event.element}.{association.name} add {event.old_value}."
+        self.add_undo_action(
+            self._add_association,
+            association,
+            event.element.id,
+            event.old_value.id,
+            event.index,
         )
-        del event
 
-        self.add_undo_action(undo_association_delete_event)
+    def _add_association(self, association, element_id, value_id, index):
+        element = self.lookup(element_id)
+        value = self.lookup(value_id)
+        association.set(element, value, index=index, from_opposite=True)
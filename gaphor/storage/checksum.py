@@ -0,0 +1,49 @@
+"""File checksums.
+
+Checksums identify the version of a model file, for instance for session
+recovery and for exported diagrams. They are cached, so a file is only
+read again when it has changed.
+"""
+
+import hashlib
+import os
+import time
+from pathlib import Path
+
+# Checksums by absolute path: size, modification time, inode and checksum
+_checksums: dict[str, tuple[int, int, int, str]] = {}
+
+CHECKSUM_BUFFER_SIZE = 1 << 20
+
+# Files modified more recently (in nanoseconds) may change again without a
+# different modification time. Their checksums are not cached.
+RECENTLY_MODIFIED = 2_000_000_000
+
+
+def sha256sum(filename: Path) -> str:
+    """The SHA-256 checksum of a file, hex encoded.
+
+    Checksums are cached. A file is only read again if its size,
+    modification time or inode changed, or if it was modified very
+    recently.
+    """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    if (cached := _checksums.get(path)) and cached[:3] == key:
+        return cached[3]
+
+    checksum = _file_digest(path)
+    if time.time_ns() - stat.st_mtime_ns > RECENTLY_MODIFIED:
+        _checksums[path] = (*key, checksum)
+    return checksum
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    buffer = bytearray(CHECKSUM_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while size := f.readinto(buffer):
+            digest.update(view[:size])
+    return digest.hexdigest()
@@ -0,0 +1,127 @@
+"""An index of model files, to look up diagrams without loading a model.
+
+The index of a model file contains the diagrams in the model, with
+their qualified names and owners, and the number of elements per type.
+It is stored in the cache directory, next to the snapshots, and is
+refreshed when a model is loaded or saved.
+
+Like a snapshot, the index contains the checksum of the model file. It
+is only used if that checksum matches.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+from gaphor import settings
+from gaphor.core.modeling import Diagram, ElementFactory
+
+INDEX_VERSION = 1
+
+log = logging.getLogger(__name__)
+
+
+class DiagramEntry(NamedTuple):
+    id: str
+    name: str
+    qualified_name: tuple[str, ...]
+    owner: str | None
+    diagram_type: str | None
+
+
+class ModelIndex(NamedTuple):
+    checksum: str
+    element_counts: dict[str, int]
+    diagrams: tuple[DiagramEntry, ...]
+
+    def find_diagram(self, name: str) -> DiagramEntry | None:
+        """Find a diagram by qualified name (dot separated), or by name."""
+        for d in self.diagrams:
+            if ".".join(d.qualified_name) == name:
+                return d
+        return next((d for d in self.diagrams if d.name == name), None)
+
+
+def index_dir() -> Path:
+    d = settings.get_cache_dir() / "index"
+    d.mkdir(exist_ok=True)
+    return d
+
+
+def index_file(filename: Path) -> Path:
+    """The index file for a model file."""
+    return index_dir() / f"{settings.file_hash(filename.absolute())}.json"
+
+
+def model_index(element_factory: ElementFactory, checksum: str) -> ModelIndex:
+    """Create the index of a model.
+
+    ``checksum`` is the SHA-256 checksum of the model file.
+    """
+    return ModelIndex(
+        checksum,
+        dict(Counter(type(e).__name__ for e in element_factory.values())),
+        tuple(
+            DiagramEntry(
+                d.id,
+                d.name or "",
+                tuple(d.qualifiedName),
+                d.element.id if d.element else None,
+                d.diagramType,
+            )
+            for d in element_factory.select(Diagram)
+        ),
+    )
+
+
+def save(filename: Path, index: ModelIndex) -> None:
+    """Write the index of a model file."""
+    path = index_file(filename)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as out:
+        json.dump(
+            {
+                "version": INDEX_VERSION,
+                "checksum": index.checksum,
+                "element_counts": index.element_counts,
+                "diagrams": [d._asdict() for d in index.diagrams],
+            },
+            out,
+        )
+    tmp_path.replace(path)
+
+
+def load(filename: Path, checksum: str) -> ModelIndex | None:
+    """Read the index of a model file.
+
+    Returns ``None`` if there is no index, or if it does not match
+    ``checksum``.
+    """
+    try:
+        with index_file(filename).open(encoding="utf-8") as f:
+            data = json.load(f)
+        if data["version"] != INDEX_VERSION or data["checksum"] != checksum:
+            return None
+        return ModelIndex(
+            checksum,
+            data["element_counts"],
+            tuple(
+                DiagramEntry(
+                    d["id"],
+                    d["name"],
+                    tuple(d["qualified_name"]),
+                    d["owner"],
+                    d["diagram_type"],
+                )
+                for d in data["diagrams"]
+            ),
+        )
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError):
+        log.warning("Model index for %s is invalid", filename, exc_info=True)
+        return None
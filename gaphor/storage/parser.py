@@ -23,10 +23,11 @@ from __future__ import annotations
 
 import logging
 import os
-from collections import OrderedDict
-from xml.sax import SAXParseException, handler, xmlreader
+from sys import intern
+from xml.parsers.expat import ErrorString, ExpatError, ParserCreate
+from xml.sax import SAXParseException
 
-from defusedxml.sax import make_parser
+from defusedxml import EntitiesForbidden, ExternalReferenceForbidden
 
 from gaphor.core.modeling import Element
 from gaphor.storage.upgrade_canvasitem import upgrade_canvasitem
@@ -39,6 +40,8 @@ log = logging.getLogger(__name__)
 class base:
     """Simple base class for element, and canvas."""
 
+    __slots__ = ("values", "references")
+
     def __init__(self):
         self.values: dict[str, str] = {}
         self.references: dict[str, str | list[str]] = {}
@@ -63,6 +66,8 @@ class base:
 
 
 class element(base):
+    __slots__ = ("id", "type", "element")
+
     def __init__(self, id: str, type: str, canvas: canvas | None = None):
         base.__init__(self)
         self.id = id
@@ -71,7 +76,7 @@ class element(base):
 
 
 class canvas(base):
-    pass
+    __slots__ = ()
 
 
 XMLNS = "http://gaphor.sourceforge.net/model"
@@ -102,197 +107,134 @@ class MergeConflictDetected(Exception):
 State = int
 
 
-class GaphorLoader(handler.ContentHandler):
+class GaphorLoader:
     """Create a list of elements.
 
     an element may contain a canvas and a canvas may contain canvas
     items. Each element can have values and references to other
     elements.
+
+    The loader receives its callbacks from an expat parser, see
+    :func:`new_parser`.
     """
 
     def __init__(self):
-        handler.ContentHandler.__init__(self)
         self.version = None
         self.gaphor_version = ""
-        self.startDocument()
-
-    def push(self, element, state):
-        """Add an element to the item stack."""
-        self._stack.append((element, state))
+        self.elements: dict[str, element] = {}
+        self._stack: list[tuple] = []
+        self._text: list[str] = []
+        self._names: dict[str, str | None] = {}
 
-    def pop(self):
-        """Return the last item on the stack.
-
-        The item is removed from the stack.
-        """
-        return self._stack.pop()[0]
-
-    def peek(self, depth=1):
-        """Return the last item on the stack.
-
-        The item is not removed.
-        """
-        return self._stack[-1 * depth][0]
-
-    def state(self):
-        """Return the current state of the parser."""
+    def _local_name(self, name: str) -> str | None:
+        """Tag name without namespace, or None for tags in other namespaces."""
         try:
-            return self._stack[-1][1]
-        except IndexError:
-            return ROOT
-
-    def startDocument(self):
-        """Start of document: all our attributes are initialized."""
-        self.version = None
-        self.gaphor_version = ""
-        self.elements: dict[str, element] = OrderedDict()
-        self._stack: list[tuple[element | canvas, State]] = []
-        self.text = ""
-        self._start_element_handlers = (
-            self.start_element,
-            self.start_canvas,
-            self.start_canvas_item,
-            self.start_attribute,
-            self.start_reference,
-            self.start_attribute_value,
-            self.start_root,
-            self.invalid_tag,
-        )
-
-    def endDocument(self):
-        if len(self._stack) != 0:
-            raise ParserException("Invalid XML document.")
-
-    def startElement(self, name, attrs):
-        self.text = ""
+            return self._names[name]
+        except KeyError:
+            ns, _, local_name = name.rpartition(" ")
+            tag = intern(local_name) if not ns or ns == XMLNS else None
+            self._names[name] = tag
+            return tag
 
-        state = self.state()
+    def start_element(self, name, attrs):
+        if not (name := self._local_name(name)):
+            return
 
-        for h in self._start_element_handlers:
-            if h(state, name, attrs):
-                break
+        stack = self._stack
+        state = stack[-1][1] if stack else ROOT
 
-    def start_element(self, state, name, attrs):
-        # Read an element class. The name of the tag is the class name:
         if state == GAPHOR:
+            # Read an element class. The name of the tag is the class name:
             if "id" not in attrs:
                 log.exception(f"File corrupt: Element {name} has no id")
-            id = attrs["id"]
+            id = intern(attrs["id"])
             e = element(id, name)
-            if id in self.elements.keys():
+            if id in self.elements:
                 log.exception(
                     f"File corrupt: duplicate element. Remove element {name} with id {id} and try again"
                 )
             self.elements[id] = e
-            self.push(e, name == "Diagram" and DIAGRAM or ELEMENT)
-            return True
-
-    def start_canvas(self, state, name, attrs):
-        # NB. Only used for pre-2.5 models.
-        # Special treatment for the <canvas> tag in a Diagram:
-        if state == DIAGRAM and name == "canvas":
-            c = canvas()
-            self.push(c, CANVAS)
-            return True
-
-    def start_canvas_item(self, state, name, attrs):
-        # NB. Only used for pre-2.5 models.
-        # Items in a canvas are referenced by the <item> tag:
-        if state in (CANVAS, ITEM) and name == "item":
-            id = attrs["id"]
-            ci = element(id, attrs["type"])
-            assert id not in self.elements.keys(), f"{id} already defined"
-            parent_or_canvas = self.peek()
-            if state == ITEM:
-                ci.references["parent"] = parent_or_canvas.id
-                ci.references["diagram"] = parent_or_canvas.references["diagram"]
+            stack.append((e, DIAGRAM if name == "Diagram" else ELEMENT))
+        elif state == ATTR:
+            if name == "val":
+                # We need to get the text within the <val> tag:
+                self._text.clear()
+                stack.append((None, VAL))
+            elif name == "ref":
+                # Reference with multiplicity 1:
+                stack[-2][0].references[stack[-1][0]] = intern(attrs["refid"])
+                stack.append((None, REF))
+            elif name == "reflist":
+                stack.append((stack[-1][0], REFLIST))
             else:
-                ci.references["diagram"] = self.peek(2).id
-            self.elements[id] = ci
-            self.push(ci, ITEM)
-            return True
-
-    def start_attribute(self, state, name, attrs):
-        # Store the attribute name on the stack, so we can use it later
-        # to store the <ref>, <reflist> or <val> content:
-        if state in (ELEMENT, DIAGRAM, CANVAS, ITEM):
-            # handle 'normal' attributes
-            self.push(name, ATTR)
-            return True
-
-    def start_reference(self, state, name, attrs):
-        # Reference list:
-        if state == ATTR and name == "reflist":
-            self.push(self.peek(), REFLIST)
-            return True
-
-        # Reference with multiplicity 1:
-        elif state == ATTR and name == "ref":
-            n = self.peek()
-            self.peek(2).references[n] = attrs["refid"]
-            self.push(None, REF)
-            return True
-
-        # Reference with multiplicity *:
+                self.invalid_tag(state, name)
         elif state == REFLIST and name == "ref":
-            n = self.peek()
-            # Fetch the element instance from the stack
-            r = self.peek(3).references
-            refid = attrs["refid"]
+            # Reference with multiplicity *:
+            references = stack[-3][0].references
+            attr = stack[-1][0]
+            refid = intern(attrs["refid"])
             try:
-                r[n].append(refid)
+                references[attr].append(refid)
             except KeyError:
-                r[n] = [refid]
-            self.push(None, REF)
-            return True
-
-    def start_attribute_value(self, state, name, attrs):
-        # We need to get the text within the <val> tag:
-        if state == ATTR and name == "val":
-            self.push(None, VAL)
-            return True
-
-    def start_root(self, state, name, attrs):
-        # The <gaphor> tag is the toplevel tag:
-        if state == ROOT and name == "gaphor":
+                references[attr] = [refid]
+            stack.append((None, REF))
+        elif state == DIAGRAM and name == "canvas":
+            # NB. Only used for pre-2.5 models.
+            # Special treatment for the <canvas> tag in a Diagram:
+            stack.append((canvas(), CANVAS))
+        elif state in (CANVAS, ITEM) and name == "item":
+            # NB. Only used for pre-2.5 models.
+            # Items in a canvas are referenced by the <item> tag:
+            self.start_canvas_item(state, attrs)
+        elif state in (ELEMENT, DIAGRAM, CANVAS, ITEM):
+            # Store the attribute name on the stack, so we can use it later
+            # to store the <ref>, <reflist> or <val> content:
+            stack.append((name, ATTR))
+        elif state == ROOT and name == "gaphor":
+            # The <gaphor> tag is the toplevel tag:
             assert attrs["version"] == "3.0"
             self.version = attrs["version"]
             self.gaphor_version = attrs.get("gaphor-version") or attrs.get(
                 "gaphor_version"
             )
-            self.push(None, GAPHOR)
-            return True
-
-    def invalid_tag(self, state, name, attrs):
+            stack.append((None, GAPHOR))
+        else:
+            self.invalid_tag(state, name)
+
+    def start_canvas_item(self, state, attrs):
+        id = attrs["id"]
+        ci = element(id, attrs["type"])
+        assert id not in self.elements, f"{id} already defined"
+        parent_or_canvas = self._stack[-1][0]
+        if state == ITEM:
+            ci.references["parent"] = parent_or_canvas.id
+            ci.references["diagram"] = parent_or_canvas.references["diagram"]
+        else:
+            ci.references["diagram"] = self._stack[-2][0].id
+        self.elements[id] = ci
+        self._stack.append((ci, ITEM))
+
+    def invalid_tag(self, state, name):
         raise ParserException(f"Invalid XML: tag <{name}> not known (state = {state})")
 
-    def endElement(self, name):
-        # Put the text on the value
-        if self.state() == VAL:
-            # Two levels up: the attribute name
-            n = self.peek(2)
-            # Three levels up: the element instance
-            self.peek(3).values[n] = self.text
-        elif self.state() == ITEM:
-            item = self.pop()
+    def end_element(self, name):
+        if not self._local_name(name):
+            return
+
+        stack = self._stack
+        item, state = stack.pop()
+        if state == VAL:
+            # Put the text on the value.
+            # One level up: the attribute name, two levels up: the element instance
+            stack[-2][0].values[stack[-1][0]] = "".join(self._text)
+        elif state == ITEM:
             new_canvasitems = upgrade_canvasitem(item, self.gaphor_version)
             for new_item in new_canvasitems:
                 self.elements[new_item.id] = new_item
-            return
-        self.pop()
-
-    def startElementNS(self, name, qname, attrs):
-        if not name[0] or name[0] == XMLNS:
-            a = {key[1]: val for key, val in list(attrs.items())}
-            self.startElement(name[1], a)
 
-    def endElementNS(self, name, qname):
-        if not name[0] or name[0] == XMLNS:
-            self.endElement(name[1])
-
-    def characters(self, content):
-        """Read characters."""
-        self.text = self.text + content
+    def end_document(self):
+        if len(self._stack) != 0:
+            raise ParserException("Invalid XML document.")
 
 
 def parse(filename) -> dict[str, element]:
@@ -304,21 +246,29 @@ def parse(filename) -> dict[str, element]:
     return loader.elements
 
 
-class ErrorHandler(handler.ErrorHandler):
-    def error(self, exception):
-        raise exception from None
+class _ErrorLocation:
+    """Locator for parse errors, as used by SAXParseException."""
+
+    def __init__(self, error: ExpatError):
+        self._error = error
+
+    def getColumnNumber(self):
+        return self._error.offset
 
-    def fatalError(self, exception):
-        raise exception from None
+    def getLineNumber(self):
+        return self._error.lineno
 
-    def warning(self, exception):
-        log.warning(exception)
+    def getPublicId(self):
+        return None
+
+    def getSystemId(self):
+        return None
 
 
 def parse_generator(file_obj, loader):
     """The generator based version of parse().
 
-    parses the file and load it with ContentHandler loader. Returns a
+    parses the file and load it with GaphorLoader loader. Returns a
     progress percentage.
     """
     assert file_obj.seekable()
@@ -328,27 +278,61 @@ def parse_generator(file_obj, loader):
     file_size = get_file_size(file_obj)
     count = 0
 
-    for line in file_obj:
+    while True:
+        lines = file_obj.readlines(CHUNK_SIZE)
+        data = "".join(lines)
         try:
-            parser.feed(line)
-        except SAXParseException as e:
-            if line.startswith("<<<<<"):
+            parser.Parse(data, not lines)
+        except ExpatError as e:
+            if any(line.startswith("<<<<<") for line in lines):
                 raise MergeConflictDetected from e
-            raise
-        count += len(line)
+            raise SAXParseException(
+                ErrorString(e.code),
+                e,
+                _ErrorLocation(e),  # type: ignore[arg-type]
+            ) from e
+        if not lines:
+            break
+        count += len(data)
         yield (count * 100) / file_size
 
+    loader.end_document()
+
+
+CHUNK_SIZE = 2**16
+
 
 def new_parser(loader):
-    parser = make_parser()
-    assert isinstance(parser, xmlreader.IncrementalParser)
+    """Create an expat parser that feeds ``loader``.
 
-    parser.setFeature(handler.feature_namespaces, 1)
-    parser.setContentHandler(loader)
-    parser.setErrorHandler(ErrorHandler())
+    Like defusedxml, entity declarations and external references are
+    refused.
+    """
+    parser = ParserCreate(namespace_separator=" ")
+    parser.buffer_text = True
+    parser.StartElementHandler = loader.start_element
+    parser.EndElementHandler = loader.end_element
+    parser.CharacterDataHandler = loader._text.append  # noqa: SLF001
+    parser.EntityDeclHandler = _forbid_entity_decl
+    parser.UnparsedEntityDeclHandler = _forbid_unparsed_entity_decl
+    parser.ExternalEntityRefHandler = _forbid_external_entity_ref
     return parser
 
 
+def _forbid_entity_decl(
+    name, is_parameter_entity, value, base, sysid, pubid, notation_name
+):
+    raise EntitiesForbidden(name, value, base, sysid, pubid, notation_name)
+
+
+def _forbid_unparsed_entity_decl(name, base, sysid, pubid, notation_name):
+    raise EntitiesForbidden(name, None, base, sysid, pubid, notation_name)
+
+
+def _forbid_external_entity_ref(context, base, sysid, pubid):
+    raise ExternalReferenceForbidden(context, base, sysid, pubid)
+
+
 def get_file_size(file_obj):
     orig_pos = file_obj.tell()
     file_size = file_obj.seek(0, os.SEEK_END)
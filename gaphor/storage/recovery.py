@@ -1,9 +1,32 @@
-import ast
-import hashlib
+"""Session recovery.
+
+Changes to a model are recorded in a journal, so they can be recovered
+when Gaphor was not shut down properly.
+
+A journal is a binary file. It starts with ``MAGIC``, followed by
+records. A record consists of a kind, the length of the payload and a
+CRC-32 checksum of the payload, followed by the payload: a value in
+:mod:`marshal` format. The first record is the header, with the path and
+checksum of the model file. Other records are transactions (a list of
+recorded events) and checkpoints (a model state).
+
+Records are written in batches. A record that is incomplete or has an
+invalid checksum marks the end of the journal. The journal is truncated
+there when it's read, so new records follow the last valid record. On
+recovery only the transactions after the last checkpoint are replayed.
+"""
+
 import logging
+import marshal
+import os
+import struct
+import zlib
 from collections.abc import Iterator
-from io import IOBase
+from io import BufferedWriter
 from pathlib import Path
+from typing import BinaryIO, cast
+
+from gi.repository import GLib
 
 from gaphor import settings
 from gaphor.abc import Service
@@ -16,6 +39,7 @@ from gaphor.core.modeling import (
     DerivedUpdated,
     ElementCreated,
     ElementDeleted,
+    ElementsCreated,
     ModelReady,
     RedefinedAdded,
     RedefinedDeleted,
@@ -32,15 +56,35 @@ from gaphor.diagram.presentation import HandlePositionEvent
 from gaphor.diagram.segment import LineMergeSegmentEvent, LineSplitSegmentEvent
 from gaphor.event import (
     ModelSaved,
+    ModelSaving,
     Notification,
     SessionCreated,
     SessionShutdown,
 )
 from gaphor.i18n import gettext
-from gaphor.transaction import Transaction, TransactionCommit, TransactionRollback
+from gaphor.storage import snapshot, storage
+from gaphor.storage.checksum import sha256sum
+from gaphor.transaction import (
+    TransactionBegin,
+    TransactionCommit,
+    TransactionRollback,
+)
 
 log = logging.getLogger(__name__)
 
+MAGIC = b"GAPHJRNL\x01"
+MARSHAL_VERSION = 4
+
+# Record kind, payload length and CRC-32 checksum of the payload
+RECORD = struct.Struct("<BII")
+HEADER, TRANSACTION, CHECKPOINT = range(3)
+
+# Delay in milliseconds before written transactions are flushed
+FLUSH_DELAY = 500
+
+# Number of transactions after which the journal is replaced by a checkpoint
+CHECKPOINT_INTERVAL = 1000
+
 
 def sessions_dir() -> Path:
     d = settings.get_cache_dir() / "sessions"
@@ -54,25 +98,25 @@ def all_sessions() -> Iterator[tuple[str, Path | None, Path | None]]:
     Returns a list of tuples: session id, filename path, template path.
     """
     for session_file in sessions_dir().glob("*.recovery"):
-        with session_file.open(encoding="utf-8") as f:
-            preamble_line = f.readline()
-        if preamble_line:
-            try:
-                preamble = ast.literal_eval(preamble_line)
-                path = Path(preamble.get("path"))
-                is_template = preamble.get("template", False)
-                if path.exists() and path.is_file():
-                    yield (
-                        (session_file.stem, None, Path(path))
-                        if is_template
-                        else (session_file.stem, Path(path), None)
-                    )
-                else:
-                    log.info("Session file does not reference an existing model file.")
-                    _move_aside(session_file)
-            except (SyntaxError, TypeError, AttributeError):
-                log.info("File has an invalid header: '%s'.", preamble_line)
-                _move_aside(session_file)
+        try:
+            with session_file.open("rb") as f:
+                preamble = _read_header(f)
+        except InvalidJournal as e:
+            log.info("File %s has an invalid header: %s.", session_file, e)
+            _move_aside(session_file)
+            continue
+
+        path = Path(preamble["path"])
+        is_template = preamble.get("template", False)
+        if path.exists() and path.is_file():
+            yield (
+                (session_file.stem, None, path)
+                if is_template
+                else (session_file.stem, path, None)
+            )
+        else:
+            log.info("Session file does not reference an existing model file.")
+            _move_aside(session_file)
 
 
 class Recovery(Service):
@@ -83,43 +127,87 @@ class Recovery(Service):
         self.session_id: str = "_"
         self.recorder = Recorder()
         self.event_log: EventLog | None = None
+        # The journal position when the model state was captured for saving
+        self._save_mark: tuple[EventLog, tuple[int, int]] | None = None
+        self._in_transaction = False
+        self._checkpoint_source = 0
 
+        event_manager.subscribe(self.on_transaction_begin)
         event_manager.subscribe(self.on_transaction_commit)
         event_manager.subscribe(self.on_transaction_rollback)
         event_manager.subscribe(self.on_model_loaded)
         event_manager.subscribe(self.on_model_ready)
+        event_manager.subscribe(self.on_model_saving)
         event_manager.subscribe(self.on_model_saved)
         event_manager.subscribe(self.on_session_shutdown)
 
         self.recorder.subscribe(event_manager)
 
     def shutdown(self):
+        self._cancel_checkpoint()
         if self.event_log:
             self.event_log.close()
 
+        self.event_manager.unsubscribe(self.on_transaction_begin)
         self.event_manager.unsubscribe(self.on_transaction_commit)
         self.event_manager.unsubscribe(self.on_transaction_rollback)
         self.event_manager.unsubscribe(self.on_model_loaded)
         self.event_manager.unsubscribe(self.on_model_ready)
+        self.event_manager.unsubscribe(self.on_model_saving)
         self.event_manager.unsubscribe(self.on_model_saved)
         self.event_manager.unsubscribe(self.on_session_shutdown)
 
         self.recorder.unsubscribe(self.event_manager)
 
+    @event_handler(TransactionBegin)
+    def on_transaction_begin(self, _event: TransactionBegin):
+        self._in_transaction = True
+
     @event_handler(TransactionCommit)
     def on_transaction_commit(self, event: TransactionCommit):
-        if (
-            self.event_log
-            and self.recorder.events
-            and event.context not in ("rollback", "recover")
-        ):
+        self._in_transaction = False
+        if self.event_log and self.recorder.events and event.context != "rollback":
             self.event_log.write(self.recorder.events)
+            if self.event_log.transactions_since_checkpoint >= CHECKPOINT_INTERVAL:
+                self._schedule_checkpoint()
         self.recorder.truncate()
 
     @event_handler(TransactionRollback)
     def on_transaction_rollback(self, _event):
+        self._in_transaction = False
         self.recorder.truncate()
 
+    def _schedule_checkpoint(self):
+        """Write a checkpoint once the application is idle.
+
+        Capturing and writing the model state takes a while, so it's
+        not done while a transaction is committed. Without a main loop,
+        e.g. in tests, the checkpoint is written directly.
+        """
+        if GLib.main_depth() == 0:
+            self._checkpoint()
+        elif not self._checkpoint_source:
+            self._checkpoint_source = GLib.idle_add(
+                self._on_checkpoint_idle, priority=GLib.PRIORITY_LOW
+            )
+
+    def _on_checkpoint_idle(self):
+        self._checkpoint_source = 0
+        # A transaction can span main loop iterations, e.g. while dragging.
+        # The next commit schedules the checkpoint again.
+        if not self._in_transaction:
+            self._checkpoint()
+        return GLib.SOURCE_REMOVE
+
+    def _checkpoint(self):
+        if self.event_log:
+            self.event_log.checkpoint(storage.model_state(self.element_factory))
+
+    def _cancel_checkpoint(self):
+        if self._checkpoint_source:
+            GLib.source_remove(self._checkpoint_source)
+            self._checkpoint_source = 0
+
     @event_handler(SessionCreated)
     def on_model_loaded(self, event: SessionCreated):
         self.session_id = event.session.session_id
@@ -128,15 +216,30 @@ class Recovery(Service):
         self.recorder.truncate()
 
     @event_handler(ModelReady)
-    def on_model_ready(self, _event):
-        if not self.event_log:
+    def on_model_ready(self, event: ModelReady):
+        if not self.event_log or event.service is self:
+            return
+
+        checkpoint, transactions = self.event_log.read_journal()
+        if not (checkpoint or transactions):
             return
 
-        events = []
+        # Journal records are applied with events blocked. Without an undo
+        # history, the original state is restored if replaying fails.
+        original_state = storage.model_state(self.element_factory)
         try:
-            with Transaction(self.event_manager, context="recover"):
-                for events in self.event_log.read():
+            with self.element_factory.block_events():
+                if checkpoint:
+                    for _ in snapshot.load_state_generator(
+                        checkpoint,
+                        self.element_factory,
+                        self.modeling_language,
+                        lazy_diagrams=True,
+                    ):
+                        pass
+                for events in transactions:
                     replay_events(events, self.element_factory, self.modeling_language)
+                storage.update_diagrams(self.element_factory, lazy=True)
         except Exception:
             log.error(
                 "Could not recover model changes from %s. Changes have been rolled back.",
@@ -145,24 +248,52 @@ class Recovery(Service):
             )
             log.warning("Replaying events failed.")
             self.event_log.move_aside()
+            for _ in snapshot.load_state_generator(
+                original_state,
+                self.element_factory,
+                self.modeling_language,
+                lazy_diagrams=True,
+            ):
+                pass
+            self.event_manager.handle(ModelReady(self))
+            return
 
-        if events:
-            self.event_manager.handle(
-                Notification(
-                    gettext(
-                        "This model contains unsaved changes. The changes have been restored."
-                    )
+        # The model is rebuilt once, after all changes are applied
+        self.event_manager.handle(
+            ModelReady(self, modified=True),
+            Notification(
+                gettext(
+                    "This model contains unsaved changes. The changes have been restored."
                 )
-            )
+            ),
+        )
+
+    @event_handler(ModelSaving)
+    def on_model_saving(self, _event: ModelSaving):
+        self._save_mark = (
+            (self.event_log, self.event_log.mark()) if self.event_log else None
+        )
 
     @event_handler(ModelSaved)
     def on_model_saved(self, event: ModelSaved):
+        # Changes made while the model was written are kept in the journal
+        checkpoint = None
+        transactions: list = []
         if self.event_log:
+            if self._save_mark and self._save_mark[0] is self.event_log:
+                checkpoint, transactions = self.event_log.journal_since(
+                    self._save_mark[1]
+                )
             self.event_log.clear()
+        self._save_mark = None
 
         if event.filename:
             self.event_log = EventLog(self.session_id, event.filename)
             self.event_log.clear()
+            if checkpoint:
+                self.event_log.checkpoint(checkpoint)
+            for events in transactions:
+                self.event_log.write(events)
         else:
             self.event_log = None
 
@@ -170,6 +301,7 @@ class Recovery(Service):
 
     @event_handler(SessionShutdown)
     def on_session_shutdown(self, _event: SessionShutdown):
+        self._cancel_checkpoint()
         if self.event_log:
             self.event_log.clear()
         self.recorder.truncate()
@@ -184,7 +316,11 @@ class EventLog:
         self._log_name = (sessions_dir() / session_id).with_suffix(".recovery")
 
         # The file that we use to save the events to:
-        self._file: IOBase | None = None
+        self._file: BufferedWriter | None = None
+        self._header: dict[str, str | bool] | None = None
+        self._flush_source = 0
+        self.checkpoints = 0
+        self.transactions_since_checkpoint = 0
 
     @property
     def log_file(self):
@@ -193,70 +329,149 @@ class EventLog:
     def clear(self):
         self.close()
         self._log_name.unlink(missing_ok=True)
+        self._header = None
+        self.transactions_since_checkpoint = 0
 
     def write(self, event):
+        """Write a transaction.
+
+        Transactions are flushed shortly after they're written, so
+        subsequent transactions are flushed together. Without a main
+        loop, transactions are flushed directly.
+        """
         if not (self._filename or self._template):
             return
 
         f = self._file
         if not f or f.closed:
-            f = self._file = self._log_name.open(mode="a", encoding="utf-8")
+            f = self._file = self._log_name.open(mode="ab")
 
         if f.tell() == 0:
-            if self._template:
-                filename = self._template.absolute()
-                is_template = True
-            else:
-                assert self._filename
-                filename = self._filename.absolute()
-                is_template = False
-
-            f.write(
-                repr(
-                    {
-                        "path": str(filename.absolute()),
-                        "sha256": sha256sum(filename),
-                        "template": is_template,
-                    }
-                )
-            )
-            f.write("\n")
+            f.write(MAGIC)
+            f.write(_record(HEADER, self._new_header()))
+
+        f.write(_record(TRANSACTION, event))
+        self.transactions_since_checkpoint += 1
+
+        if GLib.main_depth() == 0:
+            self.flush()
+        elif not self._flush_source:
+            self._flush_source = GLib.timeout_add(FLUSH_DELAY, self._on_flush_timeout)
+
+    def _on_flush_timeout(self):
+        self._flush_source = 0
+        self.flush()
+        return GLib.SOURCE_REMOVE
+
+    def flush(self):
+        """Write buffered transactions to disk."""
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def checkpoint(self, state: storage.ModelState):
+        """Replace the journal by a checkpoint: the current model state."""
+        header = self._header or self._new_header()
+        tmp_name = self._log_name.with_suffix(".tmp")
+        with tmp_name.open("wb") as f:
+            f.write(MAGIC)
+            f.write(_record(HEADER, header))
+            f.write(_record(CHECKPOINT, state))
+            f.flush()
+            os.fsync(f.fileno())
+        self.close()
+        tmp_name.replace(self._log_name)
+        self.checkpoints += 1
+        self.transactions_since_checkpoint = 0
+
+    def _new_header(self) -> dict[str, str | bool]:
+        if self._template:
+            filename = self._template.absolute()
+            is_template = True
+        else:
+            assert self._filename
+            filename = self._filename.absolute()
+            is_template = False
 
-        f.write(repr(event))
-        f.write("\n")
-        f.flush()
+        self._header = {
+            "path": str(filename),
+            "sha256": sha256sum(filename),
+            "template": is_template,
+        }
+        return self._header
 
     def read(self):
+        """Iterate the transactions after the last checkpoint."""
+        _checkpoint, transactions = self.read_journal()
+        yield from transactions
+
+    def read_journal(self) -> tuple[storage.ModelState | None, list]:
+        """Read the last checkpoint, and the transactions after it.
+
+        Reading stops at the first record that's incomplete or invalid.
+        """
         if not (self._filename or self._template):
-            return
+            return None, []
 
         self.close()
         try:
-            with self._log_name.open(mode="r", encoding="utf-8") as f:
-                preamble_line = f.readline()
-                preamble = ast.literal_eval(preamble_line)
-                if not isinstance(preamble, dict):
+            with self._log_name.open(mode="rb") as f:
+                header = _read_header(f)
+                filename = self._template if header.get("template") else self._filename
+                if not filename or sha256sum(filename) != header.get("sha256"):
                     raise ChecksumFailed()
-
-                filename = (
-                    self._template if preamble.get("template") else self._filename
-                )
-                if not filename or sha256sum(filename) != preamble.get("sha256"):
-                    raise ChecksumFailed()
-
-                for line in f:
-                    events = ast.literal_eval(line.rstrip("\r\n"))
-                    yield events
-
+                data_start = f.tell()
+                data = f.read()
         except FileNotFoundError:
             # Log does not exist, no problem
-            pass
-        except ChecksumFailed:
+            return None, []
+        except (InvalidJournal, ChecksumFailed):
             # Move file after it's closed.
             log.info("Recovery file hash does not match.")
             self.move_aside()
+            return None, []
+
+        checkpoint, transactions, end = _journal(data, self._log_name)
+        if end < len(data):
+            # Drop the invalid tail, so new transactions are appended
+            # after the last valid record.
+            with self._log_name.open(mode="r+b") as f:
+                f.truncate(data_start + end)
+        self._header = header
+        self.transactions_since_checkpoint = len(transactions)
+        return checkpoint, transactions
+
+    def mark(self) -> tuple[int, int]:
+        """The current position in the journal, see :meth:`journal_since`."""
+        return self.checkpoints, self.transactions_since_checkpoint
+
+    def journal_since(
+        self, mark: tuple[int, int]
+    ) -> tuple[storage.ModelState | None, list]:
+        """The checkpoint and transactions written after ``mark``.
+
+        The journal is not checked against the model file, since the model
+        file may have been replaced in the mean time. A checkpoint is only
+        returned if it has been written after ``mark``.
+        """
+        self.close()
+        try:
+            with self._log_name.open(mode="rb") as f:
+                _read_header(f)
+                data = f.read()
+        except (FileNotFoundError, InvalidJournal):
+            return None, []
+
+        checkpoint, transactions, _end = _journal(data, self._log_name)
+        checkpoints, transaction_count = mark
+        if checkpoints != self.checkpoints:
+            return checkpoint, transactions
+        return None, transactions[transaction_count:]
 
     def close(self):
+        if self._flush_source:
+            GLib.source_remove(self._flush_source)
+            self._flush_source = 0
         if self._file:
             self._file.close()
             self._file = None
@@ -270,23 +485,86 @@ class ChecksumFailed(Exception):
     pass
 
 
+class InvalidJournal(Exception):
+    pass
+
+
+def _record(kind: int, value) -> bytes:
+    payload = marshal.dumps(value, MARSHAL_VERSION)
+    return RECORD.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+
+def _read_header(f: BinaryIO) -> dict:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise InvalidJournal("not a recovery file")
+    try:
+        kind, length, crc = RECORD.unpack(f.read(RECORD.size))
+        payload = f.read(length)
+        if kind != HEADER or len(payload) != length or zlib.crc32(payload) != crc:
+            raise InvalidJournal("no header record")
+        header = marshal.loads(payload)
+    except (struct.error, ValueError, EOFError, TypeError) as e:
+        raise InvalidJournal("invalid header record") from e
+    if not isinstance(header, dict) or not isinstance(header.get("path"), str):
+        raise InvalidJournal("invalid header record")
+    return header
+
+
+def _read_records(
+    data: bytes, log_name: Path
+) -> Iterator[tuple[int, object, int]]:
+    """Iterate the valid records: kind, value and the offset after the record."""
+    offset = 0
+    while offset < len(data):
+        try:
+            kind, length, crc = RECORD.unpack_from(data, offset)
+            start = offset + RECORD.size
+            payload = data[start : start + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                raise ValueError("Invalid record checksum")
+            value = marshal.loads(payload)
+        except (struct.error, ValueError, EOFError, TypeError):
+            log.warning(
+                "Recovery file %s is incomplete, ignoring its last %d bytes",
+                log_name,
+                len(data) - offset,
+            )
+            return
+        offset = start + length
+        yield kind, value, offset
+
+
+def _journal(
+    data: bytes, log_name: Path
+) -> tuple[storage.ModelState | None, list, int]:
+    """The last checkpoint, the transactions after it, and the offset after
+    the last valid record."""
+    checkpoint: storage.ModelState | None = None
+    transactions: list = []
+    end = 0
+    for kind, payload, offset in _read_records(data, log_name):
+        if kind == CHECKPOINT:
+            checkpoint = cast(storage.ModelState, payload)
+            transactions = []
+        elif kind == TRANSACTION:
+            transactions.append(payload)
+        end = offset
+    return checkpoint, transactions, end
+
+
 def _move_aside(path: Path):
     backup = path.with_suffix(".recovery.bak")
     path.rename(backup)
     log.info("Session recovery file is renamed to %s.", backup)
 
 
-def sha256sum(filename: Path):
-    with open(filename, "rb", buffering=0) as f:
-        return hashlib.file_digest(f, "sha256").hexdigest()  # type: ignore[arg-type]
-
-
 class Recorder:
     def __init__(self):
         self.events = []
 
     def subscribe(self, event_manager):
         event_manager.subscribe(self.on_create_element_event)
+        event_manager.subscribe(self.on_create_elements_event)
         event_manager.subscribe(self.on_delete_element_event)
         event_manager.subscribe(self.on_attribute_change_event)
         event_manager.subscribe(self.on_association_set_event)
@@ -301,6 +579,7 @@ class Recorder:
 
     def unsubscribe(self, event_manager):
         event_manager.unsubscribe(self.on_create_element_event)
+        event_manager.unsubscribe(self.on_create_elements_event)
         event_manager.unsubscribe(self.on_delete_element_event)
         event_manager.unsubscribe(self.on_attribute_change_event)
         event_manager.unsubscribe(self.on_association_set_event)
@@ -327,6 +606,11 @@ class Recorder:
             )
         )
 
+    @event_handler(ElementsCreated)
+    def on_create_elements_event(self, event: ElementsCreated):
+        for created in event.created:
+            self.on_create_element_event(created)
+
     @event_handler(ElementDeleted)
     def on_delete_element_event(self, event: ElementDeleted):
         self.events.append(("u", event.element.id, event.diagram and event.diagram.id))
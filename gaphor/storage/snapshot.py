@@ -0,0 +1,429 @@
+"""Binary snapshots of models, for fast loading.
+
+A snapshot contains the elements of a model in a compact binary form.
+It can be loaded in an :class:`~gaphor.core.modeling.ElementFactory`
+without parsing and upgrading XML.
+
+The model file remains the source of truth. A snapshot contains the
+checksum of the model file it was created from, and is only used if
+that checksum matches. Since a snapshot contains an upgraded model, it
+also contains a fingerprint of the Gaphor version and the upgrades. It
+is not used by a version of Gaphor with other upgrades.
+
+The layout of a snapshot, in native byte order with 4 byte words, is::
+
+    magic       8 bytes  b"GAPHSNAP"
+    version     word
+    byte order  word     0x01020304
+    checksum    64 bytes SHA-256 of the model file, hex encoded
+    upgrades    32 bytes SHA-256 of the Gaphor version and upgrades
+    strings     word     number of strings
+    words       word     number of record words
+    offsets     words    string offsets, in bytes, strings + 1
+    records     words    element records
+    text        UTF-8    all strings
+
+Ids, type names, attribute names and values are stored in the string
+table, only once. Elements are stored as records of words, in the order
+of the element factory::
+
+    type, id, number of values, number of references,
+    (name, value) * values,
+    (name, count, ref * count) * references
+
+A count of ``SINGLE`` denotes a reference with multiplicity 1, followed
+by one reference.
+
+A snapshot file is memory mapped while it's loaded. Records and strings
+are decoded from the mapped file as elements are loaded.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from array import array
+from functools import cache
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from gaphor import application, settings
+from gaphor.core.modeling import Diagram, Element, ElementFactory, Presentation
+from gaphor.core.modeling.modelinglanguage import ModelingLanguage
+from gaphor.storage.storage import (
+    ELEMENT_UPGRADES,
+    REFERENCE,
+    VALUE,
+    ModelState,
+    UnknownModelElementError,
+    replace_file,
+    update_diagrams,
+)
+
+MAGIC = b"GAPHSNAP"
+SNAPSHOT_VERSION = 3
+BYTE_ORDER = 0x01020304
+SINGLE = 0xFFFFFFFF
+
+HEADER = struct.Struct("=8sII64s32sII")
+
+log = logging.getLogger(__name__)
+
+Record = tuple[str, str, list[tuple[str, str]], list[tuple[str, str | list[str]]]]
+
+
+class InvalidSnapshot(Exception):
+    pass
+
+
+@cache
+def upgrades_fingerprint() -> bytes:
+    """A digest of the Gaphor version and the element upgrades."""
+    digest = hashlib.sha256(application.distribution().version.encode("utf-8"))
+    for version, upgrade, _with_elements in ELEMENT_UPGRADES:
+        digest.update(
+            f"{version}:{upgrade.__module__}.{upgrade.__qualname__}\n".encode("utf-8")
+        )
+    return digest.digest()
+
+
+def snapshots_dir() -> Path:
+    d = settings.get_cache_dir() / "snapshots"
+    d.mkdir(exist_ok=True)
+    return d
+
+
+def snapshot_file(filename: Path) -> Path:
+    """The snapshot file for a model file."""
+    return snapshots_dir() / f"{settings.file_hash(filename.absolute())}.snapshot"
+
+
+def save(out: BinaryIO, state: ModelState, checksum: str) -> None:
+    """Write a snapshot of a model state.
+
+    ``checksum`` is the SHA-256 checksum of the model file.
+    """
+    strings: dict[str, int] = {}
+
+    def string(s: str) -> int:
+        try:
+            return strings[s]
+        except KeyError:
+            n = strings[s] = len(strings)
+            return n
+
+    words = array("I")
+    for type_name, id, properties in state:
+        values = array("I")
+        references = array("I")
+        nvalues = nreferences = 0
+        for kind, name, value in properties:
+            if kind == VALUE:
+                values.extend((string(name), string(value)))  # type: ignore[arg-type]
+                nvalues += 1
+            elif kind == REFERENCE:
+                references.extend((string(name), SINGLE, string(value)))  # type: ignore[arg-type]
+                nreferences += 1
+            else:
+                references.extend((string(name), len(value)))
+                references.extend(map(string, value))
+                nreferences += 1
+        words.extend((string(type_name), string(id), nvalues, nreferences))
+        words.extend(values)
+        words.extend(references)
+
+    text = [s.encode("utf-8") for s in strings]
+    offsets = array("I", [0])
+    offset = 0
+    for s in text:
+        offset += len(s)
+        offsets.append(offset)
+
+    out.write(
+        HEADER.pack(
+            MAGIC,
+            SNAPSHOT_VERSION,
+            BYTE_ORDER,
+            checksum.encode("ascii"),
+            upgrades_fingerprint(),
+            len(strings),
+            len(words),
+        )
+    )
+    out.write(offsets.tobytes())
+    out.write(words.tobytes())
+    out.write(b"".join(text))
+
+
+def save_file(path: Path, state: ModelState, checksum: str) -> None:
+    """Write a snapshot file, see :func:`~gaphor.storage.storage.replace_file`."""
+    with replace_file(path, "wb") as out:
+        save(out, state, checksum)
+
+
+class SnapshotRecords:
+    """The element records of snapshot data.
+
+    ``data`` is a bytes-like object, e.g. a memory mapped snapshot file.
+    Records are decoded from ``data`` while they are iterated, so the
+    data should not be released before :meth:`close` is called. Raises
+    :class:`InvalidSnapshot` if the snapshot can not be used for a model
+    file with ``checksum``, or if it turns out to be corrupt.
+    """
+
+    def __init__(self, data, checksum: str):
+        if len(data) < HEADER.size:
+            raise InvalidSnapshot("Snapshot is truncated")
+
+        magic, version, byte_order, digest, upgrades, nstrings, nwords = (
+            HEADER.unpack_from(data)
+        )
+        if magic != MAGIC or version != SNAPSHOT_VERSION or byte_order != BYTE_ORDER:
+            raise InvalidSnapshot("Snapshot has an unsupported format")
+        if digest != checksum.encode("ascii"):
+            raise InvalidSnapshot("Snapshot does not match the model file")
+        if upgrades != upgrades_fingerprint():
+            raise InvalidSnapshot("Snapshot is created with other model upgrades")
+
+        offsets_end = HEADER.size + (nstrings + 1) * 4
+        words_end = offsets_end + nwords * 4
+        if len(data) < words_end:
+            raise InvalidSnapshot("Snapshot is truncated")
+
+        self._view = memoryview(data)
+        self._offsets = self._view[HEADER.size : offsets_end].cast("I")
+        self._words = self._view[offsets_end:words_end].cast("I")
+        self._text = self._view[words_end:]
+        self._strings: dict[int, str] = {}
+        # Start of each record, by element id, in order of the element factory
+        self._positions: dict[str, int] = {}
+
+        try:
+            if len(self._text) != self._offsets[-1]:
+                raise InvalidSnapshot("Snapshot is truncated")
+            self._index(nwords)
+        except BaseException:
+            self.close()
+            raise
+
+    def _index(self, nwords: int) -> None:
+        words = self._words
+        positions = self._positions
+        i = 0
+        try:
+            while i < nwords:
+                positions[self.string(words[i + 1])] = i
+                nvalues, nreferences = words[i + 2], words[i + 3]
+                i += 4 + nvalues * 2
+                for _ in range(nreferences):
+                    count = words[i + 1]
+                    i += 3 if count == SINGLE else 2 + count
+        except IndexError as e:
+            raise InvalidSnapshot("Snapshot is corrupt") from e
+        if i != nwords:
+            raise InvalidSnapshot("Snapshot is corrupt")
+
+    def string(self, n: int) -> str:
+        try:
+            return self._strings[n]
+        except KeyError:
+            pass
+        try:
+            with self._text[self._offsets[n] : self._offsets[n + 1]] as text:
+                s = self._strings[n] = str(text, "utf-8")
+        except (IndexError, UnicodeDecodeError) as e:
+            raise InvalidSnapshot("Snapshot is corrupt") from e
+        return s
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[Record]:
+        return map(self._record, self._positions.values())
+
+    def record(self, id: str) -> Record:
+        return self._record(self._positions[id])
+
+    def _record(self, i: int) -> Record:
+        words = self._words
+        string = self.string
+        type_name, id, nvalues, nreferences = (
+            string(words[i]),
+            string(words[i + 1]),
+            words[i + 2],
+            words[i + 3],
+        )
+        i += 4
+        values = []
+        for _ in range(nvalues):
+            values.append((string(words[i]), string(words[i + 1])))
+            i += 2
+        references: list[tuple[str, str | list[str]]] = []
+        for _ in range(nreferences):
+            name, count = string(words[i]), words[i + 1]
+            if count == SINGLE:
+                references.append((name, string(words[i + 2])))
+                i += 3
+            else:
+                i += 2
+                references.append(
+                    (name, [string(words[n]) for n in range(i, i + count)])
+                )
+                i += count
+        return type_name, id, values, references
+
+    def close(self) -> None:
+        """Release the snapshot data."""
+        self._offsets.release()
+        self._words.release()
+        self._text.release()
+        self._view.release()
+
+
+def load_generator(
+    data,
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    checksum: str,
+    lazy_diagrams: bool = False,
+) -> Iterable[float]:
+    """Load a model from snapshot data.
+
+    This function is a generator. It will yield values from 0 to 100
+    (%) to indicate its progression.
+    """
+    records = SnapshotRecords(data, checksum)
+    try:
+        yield from _load_records(
+            records,
+            len(records),
+            records.record,
+            element_factory,
+            modeling_language,
+            lazy_diagrams,
+        )
+    finally:
+        records.close()
+
+
+def load_file_generator(
+    path: Path,
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    checksum: str,
+    lazy_diagrams: bool = False,
+) -> Iterable[float]:
+    """Load a model from a snapshot file.
+
+    The file is memory mapped while the model is loaded. Records are
+    decoded from the mapped file when they are loaded.
+    """
+    with path.open("rb") as f:
+        if not f.seek(0, os.SEEK_END):
+            raise InvalidSnapshot("Snapshot is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from load_generator(
+                data, element_factory, modeling_language, checksum, lazy_diagrams
+            )
+
+
+def load_state_generator(
+    state: ModelState,
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    lazy_diagrams: bool = False,
+) -> Iterable[float]:
+    """Load a model from a model state, e.g. a recovery checkpoint."""
+    records: list[Record] = []
+    for type_name, id, properties in state:
+        values: list[tuple[str, str]] = []
+        references: list[tuple[str, str | list[str]]] = []
+        for kind, name, value in properties:
+            if kind == VALUE:
+                values.append((name, value))  # type: ignore[arg-type]
+            elif kind == REFERENCE:
+                references.append((name, value))  # type: ignore[arg-type]
+            else:
+                references.append((name, list(value)))
+        records.append((type_name, id, values, references))
+    by_id = {record[1]: record for record in records}
+    yield from _load_records(
+        records,
+        len(records),
+        by_id.__getitem__,
+        element_factory,
+        modeling_language,
+        lazy_diagrams,
+    )
+
+
+def _load_records(
+    records: Iterable[Record],
+    count: int,
+    lookup: Callable[[str], Record],
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    lazy_diagrams: bool,
+) -> Iterable[float]:
+    """Load ``count`` records.
+
+    The records are iterated twice. Records of diagrams are looked up
+    when a presentation element is created before its diagram.
+    """
+    # Create, load and postload
+    size = count * 3
+    elements: dict[str, Element] = {}
+
+    def create_element(record: Record) -> Element:
+        type_name, id, _values, references = record
+        if element := elements.get(id):
+            return element
+        if not (cls := modeling_language.lookup_element(type_name)):
+            raise UnknownModelElementError(
+                f"Type {type_name} cannot be loaded: no such element"
+            )
+        if issubclass(cls, Presentation):
+            diagram_id = dict(references)["diagram"]
+            diagram = create_element(lookup(diagram_id))  # type: ignore[arg-type]
+            assert isinstance(diagram, Diagram)
+            element = element_factory.create_as(cls, id, diagram)
+        else:
+            element = element_factory.create_as(cls, id)
+        elements[id] = element
+        return element
+
+    element_factory.flush()
+    with element_factory.block_events():
+        for n, record in enumerate(records, start=1):
+            create_element(record)
+            if n % 30 == 0:
+                yield (n * 100) / size
+
+        loaded: list[Element] = []
+        for n, (_type_name, id, values, references) in enumerate(
+            records, start=count + 1
+        ):
+            element = elements[id]
+            loaded.append(element)
+            for name, value in values:
+                element.load(name, value)
+            for name, refids in references:
+                if isinstance(refids, list):
+                    for refid in refids:
+                        element.load(name, elements[refid])
+                else:
+                    element.load(name, elements[refids])
+            if n % 30 == 0:
+                yield (n * 100) / size
+
+        for n, element in enumerate(loaded, start=count * 2 + 1):
+            element.postload()
+            if n % 30 == 0:
+                yield (n * 100) / size
+
+        update_diagrams(element_factory, lazy_diagrams)
+
+    yield 100
@@ -2,19 +2,43 @@
 
 Three functions are exported: `load(file_obj)`loads a model from a
 file. `save(file_obj)` stores the current model in a file.
+`check_references(element_factory)` finds (and repairs) references to
+elements that are not part of the model.
 """
 
-__all__ = ["load", "save"]
+__all__ = ["load", "save", "check_references"]
 
 import io
 import logging
+import os
+import re
+import shutil
+from contextlib import contextmanager
 from functools import partial
-from typing import Callable, Iterable
+from pathlib import Path
+from secrets import token_hex
+from typing import IO, Callable, Iterable, Iterator, NamedTuple, cast
+from xml.sax.saxutils import escape, quoteattr
 
 from gaphor import application
-from gaphor.core.modeling import Diagram, Element, ElementFactory, Presentation
+from gaphor.core import event_handler
+from gaphor.core.modeling import (
+    Diagram,
+    DiagramUpdated,
+    Element,
+    ElementCreated,
+    ElementDeleted,
+    ElementFactory,
+    ElementsCreated,
+    ElementUpdated,
+    ModelFlushed,
+    ModelReady,
+    Presentation,
+    RevertibleEvent,
+)
 from gaphor.core.modeling.collection import collection
 from gaphor.core.modeling.modelinglanguage import ModelingLanguage
+from gaphor.core.modeling.properties import association
 from gaphor.core.modeling.stylesheet import StyleSheet
 from gaphor.storage.parser import GaphorLoader, element, parse_generator
 from gaphor.storage.xmlwriter import XMLWriter
@@ -24,6 +48,16 @@ NAMESPACE_MODEL = "http://gaphor.sourceforge.net/model"
 
 log = logging.getLogger(__name__)
 
+# Kinds of saved properties
+VALUE, REFERENCE, COLLECTION = range(3)
+
+# Element type name, id and saved properties (kind, name, value or id(s))
+ElementState = tuple[str, str, tuple[tuple[int, str, str | tuple[str, ...]], ...]]
+ModelState = tuple[ElementState, ...]
+
+# Models are written in large blocks
+BUFFER_SIZE = 1 << 20
+
 
 def save(out=None, element_factory=None, status_queue=None):
     for status in save_generator(out, element_factory):
@@ -34,8 +68,251 @@ def save(out=None, element_factory=None, status_queue=None):
 def save_generator(out, element_factory):
     """Save the current model using @writer, which is a
     gaphor.storage.xmlwriter.XMLWriter instance."""
+    yield from write_generator(out, model_state(element_factory))
+
+
+# Pre-rendered tags, by property name
+_value_tags: dict[str, tuple[str, str]] = {}
+_reference_tags: dict[str, tuple[str, str]] = {}
+_collection_tags: dict[str, tuple[str, str, str]] = {}
+
+_needs_escape = re.compile(r"[&<>]").search
+_needs_quoting = re.compile(r"[&<>\"'\n\r\t]").search
+
+
+def _attr(value: str) -> str:
+    return quoteattr(value) if _needs_quoting(value) else f'"{value}"'
+
+
+def element_xml(state: ElementState) -> str:
+    """Serialize the state of an element as XML.
+
+    The output is the same as when the element is written with
+    :class:`~gaphor.storage.xmlwriter.XMLWriter`: every tag on a
+    separate line, except for values.
+    """
+    clazz, id, properties = state
+    if not properties:
+        return f"<{clazz} id={_attr(id)}/>"
+
+    parts = [f"<{clazz} id={_attr(id)}>"]
+    append = parts.append
+    for kind, name, value in properties:
+        if kind == VALUE:
+            try:
+                start, end = _value_tags[name]
+            except KeyError:
+                start, end = _value_tags[name] = (
+                    f"\n<{name}>\n<val>",
+                    f"</val>\n</{name}>",
+                )
+            append(start)
+            append(escape(value) if _needs_escape(value) else value)  # type: ignore[arg-type]
+            append(end)
+        elif kind == REFERENCE:
+            try:
+                start, end = _reference_tags[name]
+            except KeyError:
+                start, end = _reference_tags[name] = (
+                    f"\n<{name}>\n<ref refid=",
+                    f"/>\n</{name}>",
+                )
+            append(start)
+            append(_attr(value))  # type: ignore[arg-type]
+            append(end)
+        else:
+            try:
+                start, end, empty = _collection_tags[name]
+            except KeyError:
+                start, end, empty = _collection_tags[name] = (
+                    f"\n<{name}>\n<reflist>",
+                    f"\n</reflist>\n</{name}>",
+                    f"\n<{name}>\n<reflist/>\n</{name}>",
+                )
+            if value:
+                append(start)
+                for refid in value:
+                    append("\n<ref refid=")
+                    append(_attr(refid))
+                    append("/>")
+                append(end)
+            else:
+                append(empty)
+    append(f"\n</{clazz}>")
+    return "".join(parts)
+
+
+def save_file(
+    filename: Path,
+    state: ModelState,
+    status_queue=None,
+    fragment: Callable[[ElementState], str] | None = None,
+) -> None:
+    """Write a model state to a file.
+
+    The model is written with :func:`replace_file`. If saving fails,
+    the original file is left intact.
+    """
+    with replace_file(filename, "w", encoding="utf-8", buffering=BUFFER_SIZE) as out:
+        for status in write_generator(out, state, fragment or element_xml):
+            if status_queue:
+                status_queue(status)
+
+
+@contextmanager
+def replace_file(filename: Path, mode: str = "w", **kwargs) -> Iterator[IO]:
+    """Write a file through a temporary file.
+
+    The temporary file has a unique name, next to ``filename``. It
+    replaces ``filename`` once it is complete and synced to disk. If
+    writing fails, the temporary file is removed. ``mode`` is a write
+    mode, ``"w"`` or ``"wb"``.
+    """
+    tmp_filename = filename.with_name(f".{filename.name}.{token_hex(4)}.tmp")
+    try:
+        # Create the temporary file exclusively
+        with tmp_filename.open(mode.replace("w", "x"), **kwargs) as out:
+            yield out
+            out.flush()
+            os.fsync(out.fileno())
+        if filename.exists():
+            shutil.copymode(filename, tmp_filename)
+        tmp_filename.replace(filename)
+    except BaseException:
+        tmp_filename.unlink(missing_ok=True)
+        raise
+
+
+class DanglingReference(NamedTuple):
+    """A reference to an element that is not in the element factory."""
+
+    element_id: str
+    name: str
+    reference_id: str | None
+
+
+def model_state(element_factory: ElementFactory) -> ModelState:
+    """Capture the state of all elements, as it is saved.
+
+    A model state is immutable. It can be written while the model
+    changes, e.g. from a different thread.
+    """
+    dangling: list[DanglingReference] = []
+    capture = _state_capture(element_factory, dangling)
+    state = tuple(capture(e) for e in element_factory.values())
+    _report_dangling_references(dangling)
+    return state
+
+
+def check_references(
+    element_factory: ElementFactory, repair: bool = False
+) -> list[DanglingReference]:
+    """Find references to elements that are not in the element factory.
+
+    Those references are skipped when a model is saved. With ``repair``,
+    they are removed from the model.
+    """
+    live_ids = set(element_factory.keys())
+    found: list[tuple[Element, str, Element]] = []
+    owner: Element
+
+    def check(name, value):
+        if isinstance(value, Element):
+            if value.id not in live_ids:
+                found.append((owner, name, value))
+        elif isinstance(value, collection):
+            found.extend((owner, name, v) for v in value if v.id not in live_ids)
+
+    for owner in element_factory.values():
+        owner.save(check)
+
+    if repair:
+        for e, name, value in found:
+            prop = getattr(type(e), name, None)
+            if isinstance(prop, association):
+                prop.delete(e, value)
+
+    return [DanglingReference(e.id, name, value.id) for e, name, value in found]
+
+
+def _report_dangling_references(dangling: list[DanglingReference]) -> None:
+    if dangling:
+        log.warning(
+            "Model has unknown references. References will be skipped:\n%s",
+            "\n".join(
+                f"  {d.element_id}.{d.name} -> {d.reference_id}" for d in dangling
+            ),
+        )
+
+
+def _state_capture(
+    element_factory: ElementFactory, dangling: list[DanglingReference]
+) -> Callable[[Element], ElementState]:
+    """Create a function that captures the state of an element.
+
+    A value may be a primitive (string, int), a
+    gaphor.core.modeling.collection (which contains a list of references
+    to other UML elements) or a Diagram (which contains diagram items).
+
+    References are resolved against the ids in the element factory when
+    the function is created. Unresolvable references are skipped and
+    added to ``dangling``.
+    """
+    live_ids = set(element_factory.keys())
+    properties: list[tuple[int, str, str | tuple[str, ...]]] = []
+    element_id = ""
+
+    def save_func(name, value):
+        if isinstance(value, Element):
+            if value.id in live_ids:
+                properties.append((REFERENCE, name, value.id))
+            else:
+                dangling.append(DanglingReference(element_id, name, value.id))
+        elif isinstance(value, collection):
+            if value:
+                refids = [v.id for v in value]
+                if not live_ids.issuperset(refids):
+                    dangling.extend(
+                        DanglingReference(element_id, name, refid)
+                        for refid in refids
+                        if refid not in live_ids
+                    )
+                    refids = [refid for refid in refids if refid in live_ids]
+                properties.append((COLLECTION, name, tuple(refids)))
+        elif value is not None:
+            # Write booleans as 0/1.
+            properties.append(
+                (
+                    VALUE,
+                    name,
+                    str(int(value)) if isinstance(value, bool) else str(value),
+                )
+            )
+
+    def capture(element: Element) -> ElementState:
+        nonlocal element_id
+        assert element.id
+        element_id = element.id
+        element.save(save_func)
+        state = (element.__class__.__name__, element.id, tuple(properties))
+        properties.clear()
+        return state
+
+    return capture
 
-    writer = XMLWriter(out)
+
+def write_generator(
+    out,
+    state: ModelState,
+    fragment: Callable[[ElementState], str] = element_xml,
+) -> Iterable[float]:
+    """Write a model state as XML.
+
+    Elements are serialized by ``fragment``, which defaults to
+    :func:`element_xml`.
+    """
+    header = io.StringIO()
+    writer = XMLWriter(header)
     writer.startDocument()
     writer.startPrefixMapping("", NAMESPACE_MODEL)
     writer.startElementNS(
@@ -46,87 +323,164 @@ def save_generator(out, element_factory):
             (NAMESPACE_MODEL, "gaphor-version"): application.distribution().version,
         },
     )
+    out.write(header.getvalue())
 
-    size = element_factory.size()
-    save_func = partial(save_element, element_factory=element_factory, writer=writer)
-    for n, e in enumerate(element_factory.values(), start=1):
-        clazz = e.__class__.__name__
-        assert e.id
-        writer.startElement(clazz, {"id": str(e.id)})
-        e.save(save_func)
-        writer.endElement(clazz)
+    # Elements are on separate lines, like XMLWriter does
+    if not state:
+        out.write("/>")
+        return
+
+    size = len(state)
+    chunk = [">"]
+    for n, element_state in enumerate(state, start=1):
+        chunk.append(fragment(element_state))
 
         if n % 25 == 0:
+            out.write("\n".join(chunk))
+            chunk = [""]
             yield (n * 100) / size
 
-    writer.endElementNS((NAMESPACE_MODEL, "gaphor"), None)
-    writer.endPrefixMapping("")
-    writer.endDocument()
+    chunk.append("</gaphor>")
+    out.write("\n".join(chunk))
 
 
-def save_element(name, value, element_factory, writer):
-    """Save attributes and references from items in the gaphor.UML module.
+class Fragments:
+    """The XML of elements, reused if their state did not change.
 
-    A value may be a primitive (string, int), a
-    gaphor.core.modeling.collection (which contains a list of references
-    to other UML elements) or a Diagram (which contains diagram items).
+    Fragments belong to a single save. They can be used from the thread
+    that writes the model.
     """
 
-    def resolvable(value):
-        if value.id and value in element_factory:
-            return True
-        log.warning(
-            f"Model has unknown reference {value.id}. Reference will be skipped."
-        )
-        return False
+    def __init__(self, cache: dict[str, tuple[ElementState, str]]):
+        self.cache = cache
+
+    def __call__(self, element_state: ElementState) -> str:
+        id = element_state[1]
+        cached = self.cache.get(id)
+        if cached and (cached[0] is element_state or cached[0] == element_state):
+            return cached[1]
+        xml = element_xml(element_state)
+        self.cache[id] = (element_state, xml)
+        return xml
 
-    def save_reference(name, value):
-        """Save a value as a reference to another element in the model.
 
-        This applies to both UML and canvas items.
+class IncrementalSaver:
+    """Capture and write model states incrementally.
+
+    Changed elements are tracked through model events. Presentations
+    are also marked as changed when they are updated in a diagram. Only
+    changed elements are captured again, and only their XML is created
+    again. The result is the same as a full save.
+    """
+
+    def __init__(self, element_factory: ElementFactory):
+        self.element_factory = element_factory
+        self._states: dict[str, ElementState] = {}
+        self._fragments: dict[str, tuple[ElementState, str]] = {}
+        self._changed: set[str] = set()
+
+    def subscribe(self, event_manager) -> None:
+        event_manager.subscribe(self._on_element_updated)
+        event_manager.subscribe(self._on_elements_created)
+        event_manager.subscribe(self._on_diagram_updated)
+        event_manager.subscribe(self._on_model_reset)
+
+    def unsubscribe(self, event_manager) -> None:
+        event_manager.unsubscribe(self._on_element_updated)
+        event_manager.unsubscribe(self._on_elements_created)
+        event_manager.unsubscribe(self._on_diagram_updated)
+        event_manager.unsubscribe(self._on_model_reset)
+
+    @event_handler(ElementUpdated, ElementCreated, ElementDeleted, RevertibleEvent)
+    def _on_element_updated(self, event) -> None:
+        self._changed.add(event.element.id)
+
+    @event_handler(ElementsCreated)
+    def _on_elements_created(self, event: ElementsCreated) -> None:
+        self._changed.update(e.id for e in event.elements)
+
+    @event_handler(DiagramUpdated)
+    def _on_diagram_updated(self, event: DiagramUpdated) -> None:
+        self._changed.update(item.id for item in event.items)
+
+    @event_handler(ModelReady, ModelFlushed)
+    def _on_model_reset(self, _event) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        """Forget all captured state. The next save is a full save."""
+        self._states = {}
+        self._fragments = {}
+        self._changed = set()
+
+    def model_state(self) -> ModelState:
+        """Capture the state of the model, as it is saved.
+
+        Only changed elements are captured. For other elements the state
+        captured previously is used. Elements that refer to a deleted
+        element are captured again, since a reference may not raise an
+        event on the referring element.
         """
-        if resolvable(value):
-            writer.startElement(name, {})
-            writer.startElement("ref", {"refid": value.id})
-            writer.endElement("ref")
-            writer.endElement(name)
-
-    def save_collection(name, value):
-        """Save a list of references."""
-        if value:
-            writer.startElement(name, {})
-            writer.startElement("reflist", {})
-            for v in value:
-                if resolvable(v):
-                    writer.startElement("ref", {"refid": v.id})
-                    writer.endElement("ref")
-            writer.endElement("reflist")
-            writer.endElement(name)
-
-    def save_value(name, value):
-        """Save a value (attribute)."""
-        if value is not None:
-            writer.startElement(name, {})
-            writer.startElement("val", {})
-            if isinstance(value, bool):
-                # Write booleans as 0/1.
-                writer.characters(str(int(value)))
-            else:
-                writer.characters(str(value))
-            writer.endElement("val")
-            writer.endElement(name)
+        dangling: list[DanglingReference] = []
+        capture = _state_capture(self.element_factory, dangling)
+        changed, self._changed = self._changed, set()
+        states = self._states
+        lookup = self.element_factory.lookup
+        if deleted := {id for id in changed if id in states and not lookup(id)}:
+            changed.update(_referring_states(states.values(), deleted))
+        new_states = {}
+        for e in self.element_factory.values():
+            if e.id in changed or not (element_state := states.get(e.id)):
+                element_state = capture(e)
+            new_states[e.id] = element_state
+
+        self._states = new_states
+        _report_dangling_references(dangling)
+        return tuple(new_states.values())
+
+    def fragments(self) -> Fragments:
+        """Fragments to write the last captured model state.
+
+        Once the model is written, pass them to :meth:`merge`.
+        """
+        fragments = self._fragments
+        return Fragments(
+            {id: cached for id in self._states if (cached := fragments.get(id))}
+        )
 
-    if isinstance(value, Element):
-        save_reference(name, value)
-    elif isinstance(value, collection):
-        save_collection(name, value)
-    else:
-        save_value(name, value)
+    def merge(self, fragments: Fragments) -> None:
+        """Keep the XML written by a save, for the next save.
+
+        This method should be called from the main thread.
+        """
+        cache = self._fragments | fragments.cache
+        self._fragments = {
+            id: cached for id in self._states if (cached := cache.get(id))
+        }
+
+
+def _referring_states(states: Iterable[ElementState], ids: set[str]) -> set[str]:
+    """The ids of element states with a reference to any of ``ids``."""
+    return {
+        id
+        for _clazz, id, properties in states
+        if any(
+            value in ids if kind == REFERENCE else not ids.isdisjoint(value)
+            for kind, _name, value in properties
+            if kind != VALUE
+        )
+    }
 
 
-def load_elements(elements, element_factory, modeling_language, gaphor_version="1.0.0"):
+def load_elements(
+    elements,
+    element_factory,
+    modeling_language,
+    gaphor_version="1.0.0",
+    lazy_diagrams=False,
+):
     for _ in load_elements_generator(
-        elements, element_factory, modeling_language, gaphor_version
+        elements, element_factory, modeling_language, gaphor_version, lazy_diagrams
     ):
         pass
 
@@ -136,9 +490,14 @@ def load_elements_generator(
     element_factory: ElementFactory,
     modeling_language: ModelingLanguage,
     gaphor_version: str,
+    lazy_diagrams: bool = False,
 ) -> Iterable[float]:
     """Load a file and create a model if possible.
 
+    With ``lazy_diagrams``, diagrams are not updated. Text layout,
+    styling and constraint solving are deferred until a diagram is
+    updated, e.g. when it is opened.
+
     Exceptions: IOError, ValueError.
     """
     log.debug(f"Loading {len(elements)} elements")
@@ -171,8 +530,15 @@ def load_elements_generator(
         assert elem.element
         elem.element.postload()
 
+    update_diagrams(element_factory, lazy_diagrams)
+
+
+def update_diagrams(element_factory: ElementFactory, lazy: bool) -> None:
     for diagram in element_factory.select(Diagram):
-        diagram.update()
+        if lazy:
+            diagram.defer_update()
+        else:
+            diagram.update()
 
 
 def _load_elements_and_canvasitems(
@@ -182,27 +548,13 @@ def _load_elements_and_canvasitems(
     gaphor_version: str,
     update_status_queue: Callable[[], Iterable[float]],
 ):
+    upgrade = upgrade_pipeline(gaphor_version, elements)
+
     def create_element(elem):
         if elem.element:
             return
-        if version_lower_than(gaphor_version, (2, 1, 0)):
-            elem = upgrade_element_owned_comment_to_comment(elem)
-        if version_lower_than(gaphor_version, (2, 3, 0)):
-            elem = upgrade_package_owned_classifier_to_owned_type(elem)
-            elem = upgrade_implementation_to_interface_realization(elem)
-            elem = upgrade_feature_parameters_to_owned_parameter(elem)
-            elem = upgrade_parameter_owner_formal_param(elem)
-        if version_lower_than(gaphor_version, (2, 5, 0)):
-            elem = upgrade_diagram_element(elem)
-        if version_lower_than(gaphor_version, (2, 6, 0)):
-            elem = upgrade_generalization_arrow_direction(elem)
-        if version_lower_than(gaphor_version, (2, 9, 0)):
-            elem = upgrade_flow_item_to_control_flow_item(elem, elements)
-        if version_lower_than(gaphor_version, (2, 19, 0)):
-            elem = upgrade_delete_property_information_flow(elem)
-            elem = upgrade_decision_node_item_show_type(elem)
-        if version_lower_than(gaphor_version, (2, 20, 0)):
-            elem = upgrade_note_on_model_element_only(elem, elements)
+        if upgrade:
+            elem = upgrade(elem)
         if not (cls := modeling_language.lookup_element(elem.type)):
             raise UnknownModelElementError(
                 f"Type {elem.type} cannot be loaded: no such element"
@@ -264,14 +616,20 @@ def _load_attributes_and_references(elements, update_status_queue):
 
 
 def load(
-    file_obj: io.TextIOBase, element_factory, modeling_language, status_queue=None
+    file_obj: io.TextIOBase,
+    element_factory,
+    modeling_language,
+    status_queue=None,
+    lazy_diagrams=False,
 ):
     """Load a file and create a model if possible.
 
     Optionally, a status queue function can be given, to which the
     progress is written (as status_queue(progress)).
     """
-    for status in load_generator(file_obj, element_factory, modeling_language):
+    for status in load_generator(
+        file_obj, element_factory, modeling_language, lazy_diagrams
+    ):
         if status_queue:
             status_queue(status)
 
@@ -280,6 +638,7 @@ def load_generator(
     file_obj: io.TextIOBase,
     element_factory: ElementFactory,
     modeling_language: ModelingLanguage,
+    lazy_diagrams: bool = False,
 ) -> Iterable[int]:
     """Load a file and create a model if possible.
 
@@ -296,6 +655,28 @@ def load_generator(
         else:
             yield percentage
 
+    for percentage in load_parsed_generator(
+        loader, element_factory, modeling_language, lazy_diagrams
+    ):
+        if percentage:
+            yield percentage / 2 + 50
+        else:
+            yield percentage
+
+    yield 100
+
+
+def load_parsed_generator(
+    loader: GaphorLoader,
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    lazy_diagrams: bool = False,
+) -> Iterable[float]:
+    """Create a model from a parsed model file.
+
+    This function is a generator. It will yield values from 0 to 100 (%)
+    to indicate its progression.
+    """
     elements = loader.elements
     gaphor_version = loader.gaphor_version
 
@@ -308,15 +689,13 @@ def load_generator(
 
     element_factory.flush()
     with element_factory.block_events():
-        for percentage in load_elements_generator(
-            elements, element_factory, modeling_language, gaphor_version
-        ):
-            if percentage:
-                yield percentage / 2 + 50
-            else:
-                yield percentage
-
-    yield 100
+        yield from load_elements_generator(
+            elements,
+            element_factory,
+            modeling_language,
+            gaphor_version,
+            lazy_diagrams,
+        )
 
 
 def version_lower_than(gaphor_version, version):
@@ -464,3 +843,53 @@ def upgrade_note_on_model_element_only(
                 subject.values["note"] = elem.values["note"]
             del elem.values["note"]
     return elem
+
+
+ElementUpgrade = Callable[[element], element]
+ElementsUpgrade = Callable[[element, dict[str, element]], element]
+
+# Upgrades of parsed elements: the version that introduced the change,
+# the upgrade function, and whether it needs all parsed elements.
+ELEMENT_UPGRADES: tuple[
+    tuple[tuple[int, int], ElementUpgrade | ElementsUpgrade, bool], ...
+] = (
+    ((2, 1), upgrade_element_owned_comment_to_comment, False),
+    ((2, 3), upgrade_package_owned_classifier_to_owned_type, False),
+    ((2, 3), upgrade_implementation_to_interface_realization, False),
+    ((2, 3), upgrade_feature_parameters_to_owned_parameter, False),
+    ((2, 3), upgrade_parameter_owner_formal_param, False),
+    ((2, 5), upgrade_diagram_element, False),
+    ((2, 6), upgrade_generalization_arrow_direction, False),
+    ((2, 9), upgrade_flow_item_to_control_flow_item, True),
+    ((2, 19), upgrade_delete_property_information_flow, False),
+    ((2, 19), upgrade_decision_node_item_show_type, False),
+    ((2, 20), upgrade_note_on_model_element_only, True),
+)
+
+
+def upgrade_pipeline(
+    gaphor_version: str, elements: dict[str, element]
+) -> ElementUpgrade | None:
+    """Compile the upgrades that apply to a model file.
+
+    The upgrades are selected once, based on the version of Gaphor that
+    saved the file. Returns ``None`` if the file needs no upgrades.
+    """
+    steps: list[ElementUpgrade] = []
+    for version, upgrade, with_elements in ELEMENT_UPGRADES:
+        if not version_lower_than(gaphor_version, version):
+            continue
+        if with_elements:
+            steps.append(partial(cast(ElementsUpgrade, upgrade), elements=elements))
+        else:
+            steps.append(cast(ElementUpgrade, upgrade))
+
+    if not steps:
+        return None
+
+    def pipeline(elem: element) -> element:
+        for step in steps:
+            elem = step(elem)
+        return elem
+
+    return pipeline
@@ -0,0 +1,53 @@
+import os
+
+from gaphor.storage import checksum
+from gaphor.storage.checksum import sha256sum
+
+
+def test_sha256sum(tmp_path):
+    tmp_file = tmp_path / "testfile"
+    with tmp_file.open(mode="wb") as f:
+        f.write(b"abcdefg")
+
+    assert (
+        sha256sum(tmp_file)
+        == "7d1a54127b222502f5b79b5fb0803061152a44f92b37e23c6527baf665d4da9a"
+    )
+
+
+def test_sha256sum_is_cached(tmp_path, monkeypatch):
+    tmp_file = tmp_path / "testfile"
+    tmp_file.write_bytes(b"abcdefg")
+    os.utime(tmp_file, ns=(0, 0))
+    digest = sha256sum(tmp_file)
+
+    def no_digest(path):
+        raise AssertionError("File should not be read")
+
+    monkeypatch.setattr(checksum, "_file_digest", no_digest)
+
+    assert sha256sum(tmp_file) == digest
+
+
+def test_sha256sum_of_changed_file(tmp_path):
+    tmp_file = tmp_path / "testfile"
+    tmp_file.write_bytes(b"abcdefg")
+    os.utime(tmp_file, ns=(0, 0))
+    checksum = sha256sum(tmp_file)
+
+    tmp_file.write_bytes(b"1234567")
+    os.utime(tmp_file, ns=(0, 1))
+
+    assert sha256sum(tmp_file) != checksum
+
+
+def test_sha256sum_of_recently_modified_file_is_not_cached(tmp_path):
+    tmp_file = tmp_path / "testfile"
+    tmp_file.write_bytes(b"abcdefg")
+    checksum = sha256sum(tmp_file)
+    stat = tmp_file.stat()
+
+    tmp_file.write_bytes(b"1234567")
+    os.utime(tmp_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert sha256sum(tmp_file) != checksum
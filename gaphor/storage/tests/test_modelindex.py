@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from gaphor import UML
+from gaphor.core.modeling import Diagram
+from gaphor.storage import modelindex
+
+CHECKSUM = "0" * 64
+MODEL = Path("model.gaphor")
+
+
+def test_model_index(element_factory):
+    package = element_factory.create(UML.Package)
+    package.name = "Package"
+    diagram = element_factory.create(Diagram)
+    diagram.name = "main"
+    diagram.element = package
+
+    index = modelindex.model_index(element_factory, CHECKSUM)
+
+    assert index.element_counts == {"Package": 1, "Diagram": 1}
+    assert index.diagrams == (
+        modelindex.DiagramEntry(
+            diagram.id, "main", ("Package", "main"), package.id, None
+        ),
+    )
+
+
+def test_find_diagram(element_factory):
+    package = element_factory.create(UML.Package)
+    package.name = "Package"
+    diagram = element_factory.create(Diagram)
+    diagram.name = "main"
+    diagram.element = package
+
+    index = modelindex.model_index(element_factory, CHECKSUM)
+
+    assert index.find_diagram("Package.main").id == diagram.id
+    assert index.find_diagram("main").id == diagram.id
+    assert index.find_diagram("other") is None
+
+
+def test_save_and_load_index(element_factory):
+    diagram = element_factory.create(Diagram)
+    diagram.name = "main"
+    index = modelindex.model_index(element_factory, CHECKSUM)
+
+    modelindex.save(MODEL, index)
+
+    assert modelindex.load(MODEL, CHECKSUM) == index
+
+
+def test_index_with_other_checksum_is_not_used(element_factory):
+    modelindex.save(MODEL, modelindex.model_index(element_factory, CHECKSUM))
+
+    assert modelindex.load(MODEL, "1" * 64) is None
+
+
+def test_missing_index():
+    assert modelindex.load(Path("missing.gaphor"), CHECKSUM) is None
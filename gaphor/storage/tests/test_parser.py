@@ -1,4 +1,5 @@
 from io import StringIO
+from xml.sax import SAXParseException
 
 import pytest
 from defusedxml import EntitiesForbidden
@@ -61,3 +62,16 @@ def test_parsing_of_xml_external_entities_should_fail():
 
     with pytest.raises(EntitiesForbidden):
         parse(model)
+
+
+def test_parsing_of_truncated_file_should_fail():
+    model = StringIO(
+        """<?xml version="1.0" encoding="utf-8"?>
+        <gaphor xmlns="http://gaphor.sourceforge.net/model" version="3.0" gaphor-version="2.9.2">
+         <Package id="0">
+          <name>
+           <val>Truncated"""
+    )
+
+    with pytest.raises(SAXParseException):
+        parse(model)
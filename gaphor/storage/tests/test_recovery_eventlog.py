@@ -1,6 +1,6 @@
 import pytest
 
-from gaphor.storage.recovery import EventLog, sha256sum
+from gaphor.storage.recovery import MAGIC, EventLog
 
 
 @pytest.fixture
@@ -16,17 +16,6 @@ def event_log(test_file):
     return event_log
 
 
-def test_sha256sum(tmp_path):
-    tmp_file = tmp_path / "testfile"
-    with tmp_file.open(mode="wb") as f:
-        f.write(b"abcdefg")
-
-    assert (
-        sha256sum(tmp_file)
-        == "7d1a54127b222502f5b79b5fb0803061152a44f92b37e23c6527baf665d4da9a"
-    )
-
-
 def test_read_event_log(event_log):
     event_log.write(["my", "line"])
 
@@ -35,6 +24,12 @@ def test_read_event_log(event_log):
     assert ["my", "line"] in lines
 
 
+def test_event_log_is_flushed_without_main_loop(event_log):
+    event_log.write(["my", "line"])
+
+    assert event_log.log_file.read_bytes().startswith(MAGIC)
+
+
 def test_should_not_read_if_file_changed(event_log, test_file):
     event_log.write(["my", "line"])
     test_file.write_bytes(b"123")
@@ -87,3 +82,92 @@ def test_move_aside_event_log(event_log):
 
     assert not event_log.log_file.exists()
     assert event_log.log_file.with_suffix(".recovery.bak").exists()
+
+
+def test_read_event_log_with_incomplete_record(event_log):
+    event_log.write(["my", "line"])
+    event_log.write(["another", "line"])
+    event_log.close()
+
+    data = event_log.log_file.read_bytes()
+    event_log.log_file.write_bytes(data[:-1])
+
+    lines = list(event_log.read())
+
+    assert lines == [["my", "line"]]
+
+
+def test_write_event_log_after_incomplete_record(event_log):
+    event_log.write(["my", "line"])
+    event_log.close()
+
+    with event_log.log_file.open("ab") as f:
+        f.write(b"\x01garbage")
+
+    assert list(event_log.read()) == [["my", "line"]]
+
+    event_log.write(["another", "line"])
+    lines = list(event_log.read())
+
+    assert lines == [["my", "line"], ["another", "line"]]
+
+
+def test_read_event_log_with_invalid_checksum(event_log):
+    event_log.write(["my", "line"])
+    event_log.write(["another", "line"])
+    event_log.close()
+
+    data = bytearray(event_log.log_file.read_bytes())
+    data[-2] ^= 0xFF
+    event_log.log_file.write_bytes(data)
+
+    lines = list(event_log.read())
+
+    assert lines == [["my", "line"]]
+
+
+def test_read_checkpoint(event_log):
+    state = (("Class", "1234", ((0, "name", "Klass"),)),)
+    event_log.write(["my", "line"])
+    event_log.checkpoint(state)
+    event_log.write(["another", "line"])
+
+    checkpoint, transactions = event_log.read_journal()
+
+    assert checkpoint == state
+    assert transactions == [["another", "line"]]
+    assert event_log.transactions_since_checkpoint == 1
+
+
+def test_journal_since_mark(event_log, test_file):
+    event_log.write(["my", "line"])
+    mark = event_log.mark()
+    event_log.write(["another", "line"])
+    test_file.write_bytes(b"saved")
+
+    checkpoint, transactions = event_log.journal_since(mark)
+
+    assert checkpoint is None
+    assert transactions == [["another", "line"]]
+
+
+def test_journal_since_mark_with_checkpoint(event_log):
+    state = (("Class", "1234", ((0, "name", "Klass"),)),)
+    event_log.write(["my", "line"])
+    mark = event_log.mark()
+    event_log.checkpoint(state)
+    event_log.write(["another", "line"])
+
+    checkpoint, transactions = event_log.journal_since(mark)
+
+    assert checkpoint == state
+    assert transactions == [["another", "line"]]
+
+
+def test_invalid_header(event_log):
+    event_log.log_file.write_text("{'path': 'model.gaphor'}\n", encoding="utf-8")
+
+    lines = list(event_log.read())
+
+    assert not lines
+    assert event_log.log_file.with_suffix(".recovery.bak").exists()
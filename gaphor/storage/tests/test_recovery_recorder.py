@@ -45,6 +45,22 @@ def test_record_create_presentation(
     assert new_model.lookup(comment.id)
 
 
+def test_record_bulk_create(
+    recorder, event_manager, element_factory, modeling_language
+):
+    with element_factory.bulk():
+        package = element_factory.create(UML.Package)
+        klass = element_factory.create(UML.Class)
+        klass.name = "Name"
+        klass.package = package
+
+    new_model = ElementFactory(event_manager)
+    replay_events(recorder.events[:], new_model, modeling_language)
+
+    assert new_model.lookup(klass.id).name == "Name"
+    assert new_model.lookup(klass.id).package is new_model.lookup(package.id)
+
+
 def test_record_delete_element(
     recorder, event_manager, element_factory, modeling_language
 ):
@@ -0,0 +1,172 @@
+from io import BytesIO
+
+import pytest
+
+from gaphor import UML
+from gaphor.core.modeling import Diagram, ElementFactory
+from gaphor.diagram.tests.fixtures import connect
+from gaphor.storage import snapshot, storage
+from gaphor.UML.classes import AssociationItem, ClassItem
+
+CHECKSUM = "0" * 64
+
+
+@pytest.fixture
+def snapshot_data(element_factory):
+    def save():
+        out = BytesIO()
+        snapshot.save(out, storage.model_state(element_factory), CHECKSUM)
+        return out.getvalue()
+
+    return save
+
+
+def test_load_snapshot(element_factory, modeling_language, snapshot_data, saver):
+    package = element_factory.create(UML.Package)
+    package.name = "안녕하세요 세계"
+    diagram = element_factory.create(Diagram)
+    diagram.element = package
+    klass = element_factory.create(UML.Class)
+    klass.package = package
+    klass.isAbstract = True
+    diagram.create(ClassItem, subject=klass)
+    expected = saver()
+
+    data = snapshot_data()
+    list(snapshot.load_generator(data, element_factory, modeling_language, CHECKSUM))
+
+    assert saver() == expected
+
+
+def test_load_snapshot_with_connected_items(
+    element_factory, modeling_language, snapshot_data, saver, create
+):
+    c1 = create(ClassItem, UML.Class)
+    c2 = create(ClassItem, UML.Class)
+    a = create(AssociationItem)
+    connect(a, a.head, c1)
+    connect(a, a.tail, c2)
+    expected = saver()
+
+    data = snapshot_data()
+    list(snapshot.load_generator(data, element_factory, modeling_language, CHECKSUM))
+
+    assert saver() == expected
+    assert next(element_factory.select(AssociationItem)).subject
+
+
+def test_load_snapshot_preserves_element_order(
+    element_factory, modeling_language, snapshot_data
+):
+    for _ in range(10):
+        element_factory.create(UML.Class)
+    ids = [e.id for e in element_factory.values()]
+
+    data = snapshot_data()
+    new_factory = ElementFactory()
+    list(snapshot.load_generator(data, new_factory, modeling_language, CHECKSUM))
+
+    assert [e.id for e in new_factory.values()] == ids
+
+
+def test_load_state(element_factory, modeling_language, saver, create):
+    c1 = create(ClassItem, UML.Class)
+    c2 = create(ClassItem, UML.Class)
+    a = create(AssociationItem)
+    connect(a, a.head, c1)
+    connect(a, a.tail, c2)
+    expected = saver()
+    state = storage.model_state(element_factory)
+
+    list(snapshot.load_state_generator(state, element_factory, modeling_language))
+
+    assert saver() == expected
+
+
+def test_snapshot_with_other_checksum_is_invalid(
+    element_factory, modeling_language, snapshot_data
+):
+    element_factory.create(UML.Class)
+    data = snapshot_data()
+
+    with pytest.raises(snapshot.InvalidSnapshot):
+        list(
+            snapshot.load_generator(data, element_factory, modeling_language, "1" * 64)
+        )
+
+    assert element_factory.size() == 1
+
+
+def test_snapshot_with_other_upgrades_is_invalid(
+    element_factory, modeling_language, snapshot_data, monkeypatch
+):
+    element_factory.create(UML.Class)
+    data = snapshot_data()
+
+    monkeypatch.setattr(
+        storage,
+        "ELEMENT_UPGRADES",
+        (*storage.ELEMENT_UPGRADES, ((99, 0), storage.upgrade_diagram_element, False)),
+    )
+    monkeypatch.setattr(snapshot, "ELEMENT_UPGRADES", storage.ELEMENT_UPGRADES)
+    snapshot.upgrades_fingerprint.cache_clear()
+
+    try:
+        with pytest.raises(snapshot.InvalidSnapshot):
+            list(
+                snapshot.load_generator(
+                    data, element_factory, modeling_language, CHECKSUM
+                )
+            )
+    finally:
+        snapshot.upgrades_fingerprint.cache_clear()
+
+
+@pytest.mark.parametrize("data", [b"", b"GAPHSNAP", b"NOT A SNAPSHOT" * 10])
+def test_invalid_snapshot(element_factory, modeling_language, data):
+    with pytest.raises(snapshot.InvalidSnapshot):
+        list(
+            snapshot.load_generator(data, element_factory, modeling_language, CHECKSUM)
+        )
+
+
+def test_truncated_snapshot(element_factory, modeling_language, snapshot_data):
+    element_factory.create(UML.Class)
+    data = snapshot_data()
+
+    with pytest.raises(snapshot.InvalidSnapshot):
+        list(
+            snapshot.load_generator(
+                data[: len(data) // 2], element_factory, modeling_language, CHECKSUM
+            )
+        )
+
+
+def test_load_snapshot_file(element_factory, modeling_language, test_models, tmp_path):
+    with (test_models / "all-elements.gaphor").open(encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+    size = element_factory.size()
+    snapshot_file = tmp_path / "model.snapshot"
+    snapshot.save_file(snapshot_file, storage.model_state(element_factory), CHECKSUM)
+
+    new_factory = ElementFactory()
+    list(
+        snapshot.load_file_generator(
+            snapshot_file, new_factory, modeling_language, CHECKSUM
+        )
+    )
+
+    assert new_factory.size() == size
+
+
+def test_save_snapshot_file_replaces_file(element_factory, tmp_path):
+    element_factory.create(UML.Class)
+    snapshot_dir = tmp_path / "snapshots"
+    snapshot_dir.mkdir()
+    snapshot_file = snapshot_dir / "model.snapshot"
+    snapshot_file.write_bytes(b"old")
+
+    snapshot.save_file(snapshot_file, storage.model_state(element_factory), CHECKSUM)
+
+    assert snapshot_file.read_bytes().startswith(snapshot.MAGIC)
+    assert list(snapshot_dir.iterdir()) == [snapshot_file]
@@ -6,10 +6,12 @@ from io import StringIO
 import pytest
 
 from gaphor import UML
-from gaphor.core.modeling import Comment, Diagram, StyleSheet
+from gaphor.core import event_handler
+from gaphor.core.modeling import Comment, Diagram, DiagramUpdated, StyleSheet
 from gaphor.diagram.general import CommentItem
 from gaphor.diagram.tests.fixtures import connect
 from gaphor.storage import storage
+from gaphor.transaction import Transaction
 from gaphor.UML.classes import AssociationItem, ClassItem, InterfaceItem
 
 
@@ -129,6 +131,41 @@ def test_load_uml_2(create, element_factory, saver, loader):
     assert d1
 
 
+def test_load_with_lazy_diagrams(create, element_factory, modeling_language, saver):
+    create(CommentItem, Comment)
+    iface = create(InterfaceItem, UML.Interface)
+    iface.matrix.translate(10, 10)
+    data = saver()
+
+    element_factory.flush()
+    storage.load(StringIO(data), element_factory, modeling_language, lazy_diagrams=True)
+
+    assert saver() == data
+    assert len(element_factory.lselect(InterfaceItem)) == 1
+
+
+def test_lazy_diagram_is_updated_on_commit(
+    create, element_factory, event_manager, modeling_language, saver, sanitizer_service
+):
+    create(ClassItem, UML.Class)
+    data = saver()
+    element_factory.flush()
+    storage.load(StringIO(data), element_factory, modeling_language, lazy_diagrams=True)
+    item = next(element_factory.select(ClassItem))
+    updated = []
+
+    @event_handler(DiagramUpdated)
+    def on_diagram_updated(event):
+        updated.extend(event.items)
+
+    event_manager.subscribe(on_diagram_updated)
+    with Transaction(event_manager):
+        item.subject.name = "Renamed"
+    event_manager.unsubscribe(on_diagram_updated)
+
+    assert item in updated
+
+
 def test_load_with_whitespace_name(diagram, element_factory, saver, loader):
     difficult_name = "    with space before and after  "
     diagram = element_factory.lselect()[0]
@@ -249,6 +286,186 @@ def test_load_and_save_of_a_model(element_factory, modeling_language, test_model
     assert copy == orig, "Saved model does not match copy"
 
 
+def test_model_state_is_not_affected_by_later_changes(element_factory):
+    klass = element_factory.create(UML.Class)
+    klass.name = "before"
+
+    state = storage.model_state(element_factory)
+    klass.name = "after"
+    out = StringIO()
+    for _ in storage.write_generator(out, state):
+        pass
+
+    assert "before" in out.getvalue()
+    assert "after" not in out.getvalue()
+
+
+def test_save_file(element_factory, tmp_path):
+    element_factory.create(UML.Class)
+    filename = tmp_path / "model.gaphor"
+    filename.write_text("original", encoding="utf-8")
+
+    storage.save_file(filename, storage.model_state(element_factory))
+
+    assert "<Class " in filename.read_text(encoding="utf-8")
+    assert list(tmp_path.iterdir()) == [filename]
+
+
+def test_save_file_keeps_original_file_on_failure(
+    element_factory, tmp_path, monkeypatch
+):
+    filename = tmp_path / "model.gaphor"
+    filename.write_text("original", encoding="utf-8")
+
+    def failing_write_generator(out, state, fragment):
+        out.write("partial")
+        yield 0
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(storage, "write_generator", failing_write_generator)
+
+    with pytest.raises(OSError):
+        storage.save_file(filename, storage.model_state(element_factory))
+
+    assert filename.read_text(encoding="utf-8") == "original"
+    assert list(tmp_path.iterdir()) == [filename]
+
+
+@pytest.mark.parametrize(
+    "properties,xml",
+    [
+        ((), '<Class id="id"/>'),
+        (
+            ((storage.VALUE, "name", "a < b & c"),),
+            '<Class id="id">\n<name>\n<val>a &lt; b &amp; c</val>\n</name>\n</Class>',
+        ),
+        (
+            ((storage.REFERENCE, "package", 'p"1'),),
+            '<Class id="id">\n<package>\n<ref refid=\'p"1\'/>\n</package>\n</Class>',
+        ),
+        (
+            ((storage.COLLECTION, "ownedAttribute", ("a", "b")),),
+            '<Class id="id">\n<ownedAttribute>\n<reflist>\n<ref refid="a"/>'
+            '\n<ref refid="b"/>\n</reflist>\n</ownedAttribute>\n</Class>',
+        ),
+        (
+            ((storage.COLLECTION, "ownedAttribute", ()),),
+            '<Class id="id">\n<ownedAttribute>\n<reflist/>\n</ownedAttribute>\n</Class>',
+        ),
+    ],
+)
+def test_element_xml(properties, xml):
+    assert storage.element_xml(("Class", "id", properties)) == xml
+
+
+@pytest.fixture
+def incremental_saver(element_factory, event_manager):
+    incremental_saver = storage.IncrementalSaver(element_factory)
+    incremental_saver.subscribe(event_manager)
+    yield incremental_saver
+    incremental_saver.unsubscribe(event_manager)
+
+
+def incremental_save(incremental_saver):
+    out = StringIO()
+    state = incremental_saver.model_state()
+    fragments = incremental_saver.fragments()
+    for _ in storage.write_generator(out, state, fragments):
+        pass
+    incremental_saver.merge(fragments)
+    return out.getvalue()
+
+
+def test_incremental_save_of_empty_model(incremental_saver, saver):
+    assert incremental_save(incremental_saver) == saver()
+
+
+def test_incremental_save_of_changed_model(
+    create, element_factory, incremental_saver, saver
+):
+    package = element_factory.create(UML.Package)
+    c1 = create(ClassItem, UML.Class)
+    c2 = create(ClassItem, UML.Class)
+    c1.subject.package = package
+    assert incremental_save(incremental_saver) == saver()
+
+    c1.subject.name = "Renamed & <escaped>"
+    c2.matrix.translate(10, 10)
+    assert incremental_save(incremental_saver) == saver()
+
+    a = create(AssociationItem)
+    connect(a, a.head, c1)
+    connect(a, a.tail, c2)
+    assert incremental_save(incremental_saver) == saver()
+
+    c2.subject.unlink()
+    c1.subject.package = None
+    assert incremental_save(incremental_saver) == saver()
+
+
+def test_incremental_save_after_deleting_a_referenced_element(
+    element_factory, incremental_saver, saver, caplog
+):
+    klass = element_factory.create(UML.Class)
+    prop = element_factory.create(UML.Property)
+    prop.type = klass
+    incremental_save(incremental_saver)
+
+    klass.unlink()
+
+    assert prop.type is klass
+    assert incremental_save(incremental_saver) == saver()
+    assert f"{prop.id}.type -> {klass.id}" in caplog.text
+
+
+def test_incremental_save_after_flush(element_factory, incremental_saver, saver):
+    element_factory.create(UML.Class)
+    incremental_save(incremental_saver)
+
+    element_factory.flush()
+    element_factory.create(UML.Package)
+
+    assert incremental_save(incremental_saver) == saver()
+
+
+def element_states(incremental_saver):
+    return {s[1]: s for s in incremental_saver.model_state()}
+
+
+def test_incremental_save_reuses_state_of_unchanged_presentations(
+    create, incremental_saver
+):
+    item = create(ClassItem, UML.Class)
+    states = element_states(incremental_saver)
+
+    assert element_states(incremental_saver)[item.id] is states[item.id]
+
+
+def test_incremental_save_of_updated_diagram_items(create, diagram, incremental_saver):
+    item = create(ClassItem, UML.Class)
+    states = element_states(incremental_saver)
+
+    diagram.update({item})
+    new_states = element_states(incremental_saver)
+
+    assert new_states[item.id] is not states[item.id]
+    assert new_states[item.id] == states[item.id]
+
+
+def test_incremental_save_reuses_xml_of_previous_save(
+    create, incremental_saver, monkeypatch
+):
+    create(ClassItem, UML.Class)
+    data = incremental_save(incremental_saver)
+
+    def element_xml(element_state):
+        raise AssertionError("Element XML should be reused")
+
+    monkeypatch.setattr(storage, "element_xml", element_xml)
+
+    assert incremental_save(incremental_saver) == data
+
+
 def test_can_not_load_models_older_that_0_17_0(
     element_factory, modeling_language, test_models
 ):
@@ -290,6 +507,44 @@ def test_save_with_invalidreference(element_factory, saver, caplog):
     assert "Model has unknown reference" in caplog.text
 
 
+def test_save_reports_unknown_references_once(element_factory, saver, caplog):
+    c = element_factory.create(UML.Class)
+    c.package = UML.Package()
+    p = element_factory.create(UML.Package)
+    UML.Class().package = p
+
+    saver()
+
+    assert len(caplog.records) == 1
+    assert c.id in caplog.text
+    assert p.id in caplog.text
+
+
+def test_check_references(element_factory):
+    c = element_factory.create(UML.Class)
+    p = UML.Package()
+    c.package = p
+
+    dangling = storage.check_references(element_factory)
+
+    assert dangling == [storage.DanglingReference(c.id, "package", p.id)]
+    assert c.package is p
+
+
+def test_check_and_repair_references(element_factory):
+    c = element_factory.create(UML.Class)
+    c.package = UML.Package()
+    p = element_factory.create(UML.Package)
+    UML.Class().package = p
+
+    dangling = storage.check_references(element_factory, repair=True)
+
+    assert len(dangling) == 2
+    assert c.package is None
+    assert not p.ownedType
+    assert storage.check_references(element_factory) == []
+
+
 def test_save_and_load_with_invalid_element_type(element_factory, saver, loader):
     element_factory.create(UML.Package)
 
@@ -0,0 +1,45 @@
+import shutil
+
+import pytest
+
+from gaphor.core.modeling import ElementFactory
+from gaphor.storage import storage
+from gaphor.storage.upgradecli import upgrade_model
+
+
+@pytest.fixture
+def old_model(test_models, tmp_path):
+    filename = tmp_path / "all-elements.gaphor"
+    shutil.copyfile(test_models / "all-elements.gaphor", filename)
+    return filename
+
+
+def test_upgrade_model(old_model, element_factory, modeling_language):
+    with old_model.open(encoding="utf-8") as f:
+        storage.load(f, element_factory, modeling_language)
+    size = element_factory.size()
+
+    assert upgrade_model(old_model, element_factory, modeling_language)
+
+    new_factory = ElementFactory()
+    with old_model.open(encoding="utf-8") as f:
+        storage.load(f, new_factory, modeling_language)
+
+    assert new_factory.size() == size
+    assert not upgrade_model(old_model, new_factory, modeling_language)
+
+
+def test_upgrade_model_dry_run(old_model, element_factory, modeling_language):
+    original = old_model.read_bytes()
+
+    assert upgrade_model(old_model, element_factory, modeling_language, dry_run=True)
+    assert old_model.read_bytes() == original
+    assert element_factory.size() == 0
+
+
+def test_no_upgrades_for_current_version():
+    assert storage.upgrade_pipeline("2.20.0", {}) is None
+
+
+def test_upgrades_for_older_version():
+    assert storage.upgrade_pipeline("2.8.2", {})
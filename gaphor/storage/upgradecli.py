@@ -0,0 +1,93 @@
+"""Upgrade model files to the current file format, in place."""
+
+import argparse
+import logging
+from pathlib import Path
+
+from gaphor.application import Session
+from gaphor.core.modeling import ElementFactory
+from gaphor.core.modeling.modelinglanguage import ModelingLanguage
+from gaphor.storage import storage
+from gaphor.storage.parser import GaphorLoader, parse_generator
+
+log = logging.getLogger(__name__)
+
+
+def upgrade_parser():
+    parser = argparse.ArgumentParser(
+        description="Upgrade Gaphor models to the current file format."
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        help="only list the models that need an upgrade",
+    )
+    parser.add_argument("model", nargs="+", help="model file(s) to upgrade")
+    parser.set_defaults(command=upgrade_command)
+
+    return parser
+
+
+def upgrade_command(args) -> int:
+    session = Session(
+        services=[
+            "event_manager",
+            "component_registry",
+            "element_factory",
+            "modeling_language",
+        ]
+    )
+    factory = session.get_service("element_factory")
+    modeling_language = session.get_service("modeling_language")
+
+    exit_code = 0
+    for model in args.model:
+        try:
+            upgraded = upgrade_model(
+                Path(model), factory, modeling_language, dry_run=args.dry_run
+            )
+        except Exception:
+            log.exception("Unable to upgrade model %s", model)
+            exit_code = 1
+        else:
+            if not upgraded:
+                log.info("Model %s is up to date", model)
+            elif args.dry_run:
+                log.info("Model %s needs an upgrade", model)
+            else:
+                log.info("Upgraded model %s", model)
+
+    session.shutdown()
+    return exit_code
+
+
+def upgrade_model(
+    filename: Path,
+    element_factory: ElementFactory,
+    modeling_language: ModelingLanguage,
+    dry_run: bool = False,
+) -> bool:
+    """Upgrade a model file in place.
+
+    Files that are already in the current format are only parsed. They
+    are not loaded and not written. Returns ``True`` if the file needs
+    an upgrade.
+    """
+    loader = GaphorLoader()
+    with filename.open(encoding="utf-8") as file_obj:
+        for _ in parse_generator(file_obj, loader):
+            pass
+
+    if not storage.upgrade_pipeline(loader.gaphor_version, loader.elements):
+        return False
+    if dry_run:
+        return True
+
+    for _ in storage.load_parsed_generator(
+        loader, element_factory, modeling_language, lazy_diagrams=True
+    ):
+        pass
+    storage.save_file(filename, storage.model_state(element_factory))
+    return True
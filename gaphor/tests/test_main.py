@@ -47,6 +47,13 @@ def test_quiet_logging():
     assert logging.getLogger("root").getEffectiveLevel() == logging.WARNING
 
 
+def test_profile_events(capsys):
+    exit_code = main([APP_NAME, "--profile-events"])
+
+    assert exit_code == 0
+    assert "max queue depth" in capsys.readouterr().out
+
+
 def test_gapplication_service(mock_gaphor_ui_run):
     main([APP_NAME, "--gapplication-service"])
 
@@ -133,6 +133,9 @@ class DiagramPage:
 
         self.update_drawing_style()
 
+        # Diagrams may have been loaded with their update deferred
+        self.diagram.update()
+
         # Set model only after the painters are set
         view.model = self.diagram
 
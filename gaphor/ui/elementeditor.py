@@ -16,6 +16,7 @@ from gaphor.core.modeling.event import (
     AssociationUpdated,
     AttributeUpdated,
     ElementCreated,
+    ElementsCreated,
     ModelReady,
 )
 from gaphor.core.styling import StyleNode
@@ -388,14 +389,17 @@ class PreferencesStack:
     def _model_ready(self, _event):
         self.update()
 
-    @event_handler(ElementCreated)
-    def _style_sheet_created(self, event: ElementCreated):
-        if isinstance(event.element, StyleSheet):
+    @event_handler(ElementCreated, ElementsCreated)
+    def _style_sheet_created(self, event: ElementCreated | ElementsCreated):
+        elements = (
+            event.elements if isinstance(event, ElementsCreated) else [event.element]
+        )
+        if any(isinstance(element, StyleSheet) for element in elements):
             self.update()
 
-    @event_handler(AttributeUpdated)
-    def _style_sheet_changed(self, event: AttributeUpdated):
-        if event.property is StyleSheet.styleSheet:
+    @event_handler(AttributeUpdated, batch=True)
+    def _style_sheet_changed(self, events: list[AttributeUpdated]):
+        if any(event.property is StyleSheet.styleSheet for event in events):
             self.update()
 
     @event_handler(DiagramSelectionChanged)
@@ -3,13 +3,17 @@
 from __future__ import annotations
 
 import logging
+import os
 import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
+from itertools import chain
 from pathlib import Path
 from typing import Callable
 
 from gaphas.decorators import g_async
-from gi.repository import Adw, Gio, Gtk
+from gi.repository import Adw, Gio, GLib, Gtk
 
 from gaphor import UML
 from gaphor.abc import ActionProvider, Service
@@ -20,11 +24,14 @@ from gaphor.core.modeling import Diagram, ElementFactory, ModelReady, StyleSheet
 from gaphor.event import (
     ModelChangedOnDisk,
     ModelSaved,
+    ModelSaving,
     SessionCreated,
     SessionShutdown,
     SessionShutdownRequested,
+    TransactionCommit,
 )
-from gaphor.storage import storage
+from gaphor.storage import modelindex, snapshot, storage
+from gaphor.storage.checksum import sha256sum
 from gaphor.storage.mergeconflict import split_ours_and_theirs
 from gaphor.storage.parser import MergeConflictDetected
 from gaphor.ui.errorhandler import error_handler
@@ -34,6 +41,9 @@ from gaphor.ui.statuswindow import StatusWindow
 DEFAULT_EXT = ".gaphor"
 MAX_RECENT = 10
 
+# Snapshots and indexes not used for this many seconds are removed
+CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
 log = logging.getLogger(__name__)
 
 
@@ -80,14 +90,25 @@ class FileManager(Service, ActionProvider):
         self.main_window = main_window
         self._filename: Path | None = None
         self._monitor: Gio.Monitor | None = None
+        self._save_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="save"
+        )
+        self._saver = storage.IncrementalSaver(element_factory)
+        # Number of committed transactions, to detect changes while saving
+        self._transactions = 0
 
+        self._saver.subscribe(event_manager)
         event_manager.subscribe(self._on_session_shutdown_request)
         event_manager.subscribe(self._on_session_created)
+        event_manager.subscribe(self._on_transaction_commit)
 
     def shutdown(self):
         """Called when shutting down the file manager service."""
         self.event_manager.unsubscribe(self._on_session_shutdown_request)
         self.event_manager.unsubscribe(self._on_session_created)
+        self.event_manager.unsubscribe(self._on_transaction_commit)
+        self._saver.unsubscribe(self.event_manager)
+        self._save_executor.shutdown()
 
     @property
     def filename(self) -> Path | None:
@@ -113,13 +134,21 @@ class FileManager(Service, ActionProvider):
         storage.load(translated_model, self.element_factory, self.modeling_language)
         self.event_manager.handle(ModelReady(self))
 
-    def load(self, filename: Path, on_load_done: Callable[[], None] | None = None):
+    def load(
+        self,
+        filename: Path,
+        on_load_done: Callable[[], None] | None = None,
+        cache: bool = True,
+    ):
         """Load the Gaphor model from the supplied file name.
 
         A status window displays the loading progress. The load
         generator updates the progress queue.  The loader is passed to a
         GIdleThread which executes the load generator. If loading is
         successful, the filename is set.
+
+        With ``cache``, the model is loaded from its snapshot if it is up
+        to date, and a snapshot is written otherwise.
         """
         # First claim file name, so any other files will be opened in a different session
         self.filename = filename
@@ -137,7 +166,7 @@ class FileManager(Service, ActionProvider):
             else:
                 self.event_manager.handle(ModelReady(self))
 
-        for _ in self._load_async(filename, status_window.progress, done):
+        for _ in self._load_async(filename, status_window.progress, done, cache=cache):
             pass
 
     @action("file-reload")
@@ -216,18 +245,14 @@ class FileManager(Service, ActionProvider):
         progress: Callable[[int], None] | None = None,
         done=None,
         element_factory=None,
+        cache=False,
     ):
         factory = element_factory or self.element_factory
         try:
-            with filename.open(encoding="utf-8", errors="replace") as file_obj:
-                for percentage in storage.load_generator(
-                    file_obj,
-                    factory,
-                    self.modeling_language,
-                ):
-                    if progress:
-                        progress(percentage)
-                    yield percentage
+            for percentage in self._load_generator(filename, factory, cache):
+                if progress:
+                    progress(percentage)
+                yield percentage
         except MergeConflictDetected:
             self.filename = None
             self.resolve_merge_conflict(filename)
@@ -247,6 +272,57 @@ class FileManager(Service, ActionProvider):
             if done:
                 done()
 
+    def _load_generator(
+        self, filename: Path, element_factory: ElementFactory, cache: bool
+    ):
+        """Load a model, from its snapshot if that is up to date.
+
+        The model file is loaded if there's no usable snapshot. A new
+        snapshot is written afterwards, by the save thread. Without
+        ``cache``, e.g. for the temporary files of a merge, snapshots
+        are neither read nor written. Diagrams are updated once they are
+        opened.
+        """
+        if cache:
+            checksum = sha256sum(filename)
+            snapshot_filename = snapshot.snapshot_file(filename)
+            try:
+                yield from snapshot.load_file_generator(
+                    snapshot_filename,
+                    element_factory,
+                    self.modeling_language,
+                    checksum,
+                    lazy_diagrams=True,
+                )
+                touch_cache(filename)
+                return
+            except (FileNotFoundError, snapshot.InvalidSnapshot):
+                pass
+            except Exception:
+                log.warning(
+                    "Unable to load snapshot %s, loading model file",
+                    snapshot_filename,
+                    exc_info=True,
+                )
+
+        with filename.open(encoding="utf-8", errors="replace") as file_obj:
+            yield from storage.load_generator(
+                file_obj, element_factory, self.modeling_language, lazy_diagrams=True
+            )
+
+        if not cache:
+            return
+
+        state = storage.model_state(element_factory)
+        index = modelindex.model_index(element_factory, checksum)
+
+        def save_cache(_progress):
+            save_snapshot(filename, state, checksum)
+            save_index(filename, index)
+            prune_cache()
+
+        self._in_background(save_cache, _ignore, _ignore)
+
     def resolve_merge_conflict(self, filename: Path):
         temp_dir = tempfile.TemporaryDirectory()
         ancestor_filename = Path(temp_dir.name) / f"ancestor-{filename.name}"
@@ -271,9 +347,9 @@ class FileManager(Service, ActionProvider):
             if answer == "cancel":
                 self.event_manager.handle(SessionShutdown(self))
             elif answer == "current":
-                self.load(current_filename, on_load_done=done)
+                self.load(current_filename, on_load_done=done, cache=False)
             elif answer == "incoming":
-                self.load(incoming_filename, on_load_done=done)
+                self.load(incoming_filename, on_load_done=done, cache=False)
             elif answer == "manual":
                 self.merge(
                     ancestor_filename,
@@ -301,10 +377,14 @@ class FileManager(Service, ActionProvider):
     def save(self, filename, on_save_done=None):
         """Save the current UML model to the specified file name.
 
-        Before writing the model file, this will verify that there are
-        no orphan references.  It will also verify that the filename has
-        the correct extension.  A status window is displayed while the
-        GIdleThread is executed.  This thread actually saves the model.
+        The state of the model is captured first. It is written to the
+        file by a worker thread, so the model can be edited while it is
+        saved. XML of elements that did not change since the previous
+        save is reused. A status window is displayed in the mean time. The file
+        is only replaced once the new model is completely written.
+
+        :obj:`ModelSaving` is emitted when the state is captured. The
+        :obj:`ModelSaved` event tells if the model has been changed since.
         """
 
         if not filename or (filename.exists() and not filename.is_file()):
@@ -316,34 +396,69 @@ class FileManager(Service, ActionProvider):
             parent=self.parent_window,
         )
 
-        @g_async()
-        def async_saver():
-            try:
-                with filename.open("w", encoding="utf-8") as out:
-                    for percentage in storage.save_generator(out, self.element_factory):
-                        status_window.progress(percentage)
-                        yield
-                self.event_manager.handle(ModelSaved(self, filename))
-            except Exception as e:
+        try:
+            state = self._saver.model_state()
+            fragments = self._saver.fragments()
+            index = modelindex.model_index(self.element_factory, "")
+        except Exception:
+            status_window.destroy()
+            raise
+
+        transactions = self._transactions
+        self.event_manager.handle(ModelSaving(self, filename))
+
+        def save(progress):
+            storage.save_file(filename, state, progress, fragments)
+            checksum = sha256sum(filename)
+            save_snapshot(filename, state, checksum)
+            save_index(filename, index._replace(checksum=checksum))
+
+        def done(error):
+            status_window.destroy()
+            self._saver.merge(fragments)
+            if error:
+                log.error("Unable to save model %s", filename, exc_info=error)
                 error_handler(
                     message=gettext("Unable to save model “{filename}”.").format(
                         filename=filename
                     ),
-                    secondary_message=error_message(e),
+                    secondary_message=error_message(error),
                     window=self.parent_window,
                 )
-                raise
-            else:
-                self.filename = filename
-                self._update_monitor()
-            finally:
-                status_window.destroy()
+                return
+
+            self.event_manager.handle(
+                ModelSaved(self, filename, modified=self._transactions != transactions)
+            )
+            self.filename = filename
+            self._update_monitor()
             if on_save_done:
                 on_save_done()
 
         self._cancel_monitor()
-        for _ in async_saver():
-            pass
+        self._in_background(save, status_window.progress, done)
+
+    def _in_background(self, work, progress, done):
+        """Run ``work(progress)`` on the save thread.
+
+        ``progress`` and ``done`` are called from the main loop. Without
+        a main loop, e.g. in tests, the work is done directly, like
+        ``g_async`` does.
+        """
+        if GLib.main_depth() == 0:
+            try:
+                work(progress)
+            except Exception as e:
+                done(e)
+            else:
+                done(None)
+            return
+
+        def report(percentage):
+            GLib.idle_add(progress, percentage)
+
+        future = self._save_executor.submit(work, report)
+        future.add_done_callback(lambda f: GLib.idle_add(done, f.exception()))
 
     @property
     def parent_window(self):
@@ -402,6 +517,11 @@ class FileManager(Service, ActionProvider):
             load_default_model(self.element_factory)
             self.event_manager.handle(ModelReady(self))
 
+    @event_handler(TransactionCommit)
+    def _on_transaction_commit(self, event: TransactionCommit) -> None:
+        if event.context != "rollback":
+            self._transactions += 1
+
     @event_handler(SessionShutdownRequested)
     def _on_session_shutdown_request(self, event: SessionShutdownRequested) -> None:
         """Ask user to close window if the model has changed.
@@ -438,6 +558,58 @@ class FileManager(Service, ActionProvider):
             confirm_shutdown()
 
 
+def save_snapshot(filename: Path, state: storage.ModelState, checksum: str):
+    """Save a snapshot of the model, so it loads faster next time.
+
+    Snapshots are an optimization: failures are logged, not raised.
+    """
+    try:
+        snapshot.save_file(snapshot.snapshot_file(filename), state, checksum)
+    except Exception:
+        log.warning("Unable to save snapshot for %s", filename, exc_info=True)
+
+
+def save_index(filename: Path, index: modelindex.ModelIndex):
+    """Save the index of the model, for lookups without loading the model.
+
+    Like snapshots, failures are logged, not raised.
+    """
+    try:
+        modelindex.save(filename, index)
+    except Exception:
+        log.warning("Unable to save model index for %s", filename, exc_info=True)
+
+
+def touch_cache(filename: Path):
+    """Mark the snapshot and index of a model as used, so they're not
+    pruned."""
+    for path in (snapshot.snapshot_file(filename), modelindex.index_file(filename)):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+def prune_cache(max_age: float = CACHE_MAX_AGE):
+    """Remove snapshots and indexes that have not been used for
+    ``max_age`` seconds, e.g. of models that have been moved or
+    deleted."""
+    expires = time.time() - max_age
+    for path in chain(
+        snapshot.snapshots_dir().glob("*.snapshot"),
+        modelindex.index_dir().glob("*.json"),
+    ):
+        try:
+            if path.stat().st_mtime < expires:
+                path.unlink()
+        except OSError:
+            log.debug("Unable to prune %s", path, exc_info=True)
+
+
+def _ignore(*_args):
+    pass
+
+
 def resolve_merge_conflict_dialog(window: Gtk.Window, handler) -> None:
     dialog = Adw.MessageDialog.new(
         window,
@@ -14,6 +14,7 @@ from gaphor.core.modeling import (
     Element,
     ElementCreated,
     ElementDeleted,
+    ElementsCreated,
     ElementUpdated,
     ModelFlushed,
     ModelReady,
@@ -55,6 +56,7 @@ class ModelBrowser(UIComponent, ActionProvider):
 
     def open(self):
         self.event_manager.subscribe(self.on_element_created)
+        self.event_manager.subscribe(self.on_elements_created)
         self.event_manager.subscribe(self.on_element_deleted)
         self.event_manager.subscribe(self.on_owner_changed)
         self.event_manager.subscribe(self.on_owned_element_changed)
@@ -128,6 +130,7 @@ class ModelBrowser(UIComponent, ActionProvider):
 
     def close(self):
         self.event_manager.unsubscribe(self.on_element_created)
+        self.event_manager.unsubscribe(self.on_elements_created)
         self.event_manager.unsubscribe(self.on_element_deleted)
         self.event_manager.unsubscribe(self.on_owner_changed)
         self.event_manager.unsubscribe(self.on_owned_element_changed)
@@ -258,6 +261,12 @@ class ModelBrowser(UIComponent, ActionProvider):
     def on_element_created(self, event: ElementCreated):
         self.model.add_element(event.element)
 
+    @event_handler(ElementsCreated)
+    def on_elements_created(self, event: ElementsCreated):
+        model = self.model
+        for element in event.elements:
+            model.add_element(element)
+
     @event_handler(ElementDeleted)
     def on_element_deleted(self, event: ElementDeleted):
         self.model.remove_element(event.element)
@@ -281,9 +290,10 @@ class ModelBrowser(UIComponent, ActionProvider):
         self.model.add_element(element)
         self.select_element_quietly(element)
 
-    @event_handler(ElementUpdated)
-    def on_attribute_changed(self, event: ElementUpdated):
-        self.model.sync(event.element)
+    @event_handler(ElementUpdated, batch=True)
+    def on_attribute_changed(self, events: list[ElementUpdated]):
+        for element in dict.fromkeys(event.element for event in events):
+            self.model.sync(element)
         self.sorter.changed(Gtk.SorterChange.DIFFERENT)
 
     @event_handler(ModelReady, ModelFlushed)
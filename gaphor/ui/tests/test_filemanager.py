@@ -1,3 +1,4 @@
+import os
 import sys
 import textwrap
 import time
@@ -9,8 +10,9 @@ from gi.repository import GLib
 from gaphor import UML
 from gaphor.core import event_handler
 from gaphor.event import ModelChangedOnDisk
+from gaphor.storage import snapshot
 from gaphor.storage.tests.fixtures import create_merge_conflict
-from gaphor.ui.filemanager import FileManager
+from gaphor.ui.filemanager import FileManager, prune_cache
 
 
 def iteration(sentinel):
@@ -75,6 +77,36 @@ def test_model_is_loaded_with_utf8_encoding(
     assert new_package.name == package_name
 
 
+def test_snapshot_is_written_when_model_is_loaded(
+    element_factory, file_manager: FileManager, tmp_path
+):
+    element_factory.create(UML.Class)
+    model_file = tmp_path / "model.gaphor"
+    file_manager.save(model_file)
+    snapshot.snapshot_file(model_file).unlink()
+    element_factory.flush()
+
+    file_manager.load(model_file)
+
+    assert snapshot.snapshot_file(model_file).exists()
+
+
+def test_stale_snapshots_are_pruned(
+    element_factory, file_manager: FileManager, tmp_path
+):
+    element_factory.create(UML.Class)
+    model_file = tmp_path / "model.gaphor"
+    file_manager.save(model_file)
+    stale = snapshot.snapshots_dir() / "stale.snapshot"
+    stale.write_bytes(b"")
+    os.utime(stale, (0, 0))
+
+    prune_cache()
+
+    assert not stale.exists()
+    assert snapshot.snapshot_file(model_file).exists()
+
+
 def test_notify_changes(
     event_manager, element_factory, file_manager: FileManager, tmp_path
 ):
@@ -128,6 +160,7 @@ def test_load_model_merge_conflict_and_manual_resolution(
     from gaphor.core.modeling import PendingChange
 
     assert element_factory.lselect(PendingChange)
+    assert not list(snapshot.snapshots_dir().glob("*.snapshot"))
 
 
 @pytest.mark.filterwarnings("ignore:use .* Repo._get_user_identity:DeprecationWarning")
@@ -0,0 +1,69 @@
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, TypeVar
+
+import pytest
+
+from gaphor.core.modeling.modelinglanguage import (
+    CoreModelingLanguage,
+    MockModelingLanguage,
+)
+from gaphor.RAAML.modelinglanguage import RAAMLModelingLanguage
+from gaphor.SysML.modelinglanguage import SysMLModelingLanguage
+from gaphor.UML.modelinglanguage import UMLModelingLanguage
+
+T = TypeVar("T")
+
+benchmark_results = pytest.StashKey[list[str]]()
+
+
+class Benchmark:
+    """Time code, and report results in the test summary."""
+
+    def __init__(self, name: str, results: list[str]):
+        self._name = name
+        self._results = results
+
+    def time(self, func: Callable[[], T], repeat: int = 1) -> tuple[T, float]:
+        """Call ``func`` ``repeat`` times.
+
+        Returns the last result and the best time in seconds.
+        """
+        best = float("inf")
+        for _ in range(repeat):
+            start = perf_counter()
+            result = func()
+            best = min(best, perf_counter() - start)
+        return result, best
+
+    def report(self, message: str) -> None:
+        self._results.append(f"{self._name}: {message}")
+
+
+@pytest.fixture
+def benchmark(request) -> Benchmark:
+    return Benchmark(
+        request.node.name, request.config.stash.setdefault(benchmark_results, [])
+    )
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if results := config.stash.get(benchmark_results, None):
+        terminalreporter.section("benchmarks")
+        for result in results:
+            terminalreporter.write_line(result)
+
+
+@pytest.fixture
+def modeling_language():
+    return MockModelingLanguage(
+        CoreModelingLanguage(),
+        UMLModelingLanguage(),
+        SysMLModelingLanguage(),
+        RAAMLModelingLanguage(),
+    )
+
+
+@pytest.fixture
+def models():
+    return Path(__file__).parent.parent.parent / "models"
@@ -0,0 +1,30 @@
+"""Time to append items to a collection, for a small and a large
+number of items. Appending should scale linearly."""
+
+import pytest
+
+from gaphor import UML
+
+pytestmark = pytest.mark.benchmark
+
+
+def append_owned_types(element_factory, benchmark, count):
+    package = element_factory.create(UML.Package)
+    types = [element_factory.create(UML.Class) for _ in range(count)]
+
+    def append():
+        for t in types:
+            package.ownedType = t
+
+    _, elapsed = benchmark.time(append)
+
+    assert list(package.ownedType) == types
+    return elapsed
+
+
+def test_append_to_owned_type(element_factory, benchmark):
+    small = append_owned_types(element_factory, benchmark, 10_000)
+    large = append_owned_types(element_factory, benchmark, 50_000)
+
+    # Linear growth would be a factor 5, quadratic a factor 25
+    benchmark.report(f"append 10k: {small:.3f}s, append 50k: {large:.3f}s")
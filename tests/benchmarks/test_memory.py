@@ -0,0 +1,63 @@
+"""Memory used per model element and by the element dispatcher."""
+
+import gc
+import tracemalloc
+
+import pytest
+
+from gaphor.core.modeling import Presentation, elementdispatcher
+from gaphor.storage import storage
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("model", ["UML.gaphor", "SysML.gaphor", "RAAML.gaphor"])
+def test_memory_per_element(
+    element_factory, modeling_language, models, model, benchmark
+):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with (models / model).open(encoding="utf-8") as file_obj:
+            storage.load(file_obj, element_factory, modeling_language)
+        gc.collect()
+        used, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    size = element_factory.size()
+    presentations = len(element_factory.lselect(Presentation))
+
+    benchmark.report(
+        f"{size} elements ({presentations} presentations), "
+        f"{used / size:.0f} bytes per element"
+    )
+
+    assert size > 0
+
+
+def test_dispatcher_memory(element_factory, modeling_language, models, benchmark):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with (models / "UML.gaphor").open(encoding="utf-8") as file_obj:
+            storage.load(file_obj, element_factory, modeling_language)
+        gc.collect()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    used = sum(
+        stat.size
+        for stat in snapshot.filter_traces(
+            [tracemalloc.Filter(True, elementdispatcher.__file__)]
+        ).statistics("filename")
+    )
+    presentations = len(element_factory.lselect(Presentation))
+
+    benchmark.report(
+        f"UML.gaphor: {presentations} presentations, "
+        f"{used / presentations:.0f} dispatcher bytes per presentation"
+    )
+
+    assert presentations > 0
@@ -0,0 +1,20 @@
+"""Time it takes to parse large models."""
+
+from io import StringIO
+
+import pytest
+
+from gaphor.storage.parser import parse
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("model", ["UML.gaphor", "RAAML_full.gaphor"])
+def test_parse_model(models, model, benchmark):
+    text = (models / model).read_text(encoding="utf-8")
+
+    elements, elapsed = benchmark.time(lambda: parse(StringIO(text)), repeat=3)
+
+    benchmark.report(f"{len(elements)} elements parsed in {elapsed:.3f}s")
+
+    assert elements
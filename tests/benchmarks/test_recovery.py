@@ -0,0 +1,47 @@
+"""Replaying a recovery journal with events blocked, compared to
+replaying it through the event manager."""
+
+import pytest
+
+from gaphor.core.modeling import ElementFactory
+from gaphor.storage.recovery import replay_events
+from gaphor.transaction import Transaction
+
+pytestmark = pytest.mark.benchmark
+
+
+def journal(count):
+    transactions = [[("c", "Package", "package", None)]]
+    for n in range(count // 3):
+        transactions.append([("c", "Class", f"class-{n}", None)])
+        transactions.append([("s", f"class-{n}", "package", "package")])
+        transactions.append([("a", f"class-{n}", "name", f"Class {n}")])
+    return transactions
+
+
+def replay(transactions, element_factory, modeling_language):
+    for events in transactions:
+        replay_events(events, element_factory, modeling_language)
+
+
+def test_replay_with_blocked_events(
+    element_factory, event_manager, modeling_language, benchmark
+):
+    transactions = journal(10_000)
+
+    with Transaction(event_manager):
+        _, with_events = benchmark.time(
+            lambda: replay(transactions, element_factory, modeling_language)
+        )
+
+    new_factory = ElementFactory(event_manager)
+    with new_factory.block_events():
+        _, blocked = benchmark.time(
+            lambda: replay(transactions, new_factory, modeling_language)
+        )
+
+    benchmark.report(
+        f"replay 10k changes: with events {with_events:.3f}s, blocked {blocked:.3f}s"
+    )
+
+    assert new_factory.size() == element_factory.size()
@@ -0,0 +1,61 @@
+"""Saving a model with the fast serializer, compared to XMLWriter. Both
+should produce the same output."""
+
+from io import StringIO
+
+import pytest
+
+from gaphor.storage import storage
+from gaphor.storage.xmlwriter import XMLWriter
+
+pytestmark = pytest.mark.benchmark
+
+
+def xmlwriter_element_xml(state):
+    out = StringIO()
+    writer = XMLWriter(out)
+    clazz, id, properties = state
+    writer.startElement(clazz, {"id": id})
+    for kind, name, value in properties:
+        writer.startElement(name, {})
+        if kind == storage.VALUE:
+            writer.startElement("val", {})
+            writer.characters(value)
+            writer.endElement("val")
+        elif kind == storage.REFERENCE:
+            writer.startElement("ref", {"refid": value})
+            writer.endElement("ref")
+        else:
+            writer.startElement("reflist", {})
+            for refid in value:
+                writer.startElement("ref", {"refid": refid})
+                writer.endElement("ref")
+            writer.endElement("reflist")
+        writer.endElement(name)
+    writer.endElement(clazz)
+    return out.getvalue()
+
+
+def write(state, fragment):
+    out = StringIO()
+    for _ in storage.write_generator(out, state, fragment):
+        pass
+    return out.getvalue()
+
+
+def test_save(element_factory, modeling_language, models, benchmark):
+    with (models / "UML.gaphor").open(encoding="utf-8") as file_obj:
+        storage.load(file_obj, element_factory, modeling_language)
+    state = storage.model_state(element_factory)
+
+    expected, xmlwriter_time = benchmark.time(
+        lambda: write(state, xmlwriter_element_xml)
+    )
+    data, save_time = benchmark.time(lambda: write(state, storage.element_xml))
+
+    benchmark.report(
+        f"UML.gaphor: XMLWriter {xmlwriter_time:.3f}s, fast {save_time:.3f}s "
+        f"({len(data)} characters)"
+    )
+
+    assert data == expected
@@ -0,0 +1,41 @@
+"""Loading a model from a snapshot, compared to loading it from XML."""
+
+from io import BytesIO
+
+import pytest
+
+from gaphor.core.modeling import ElementFactory
+from gaphor.storage import snapshot, storage
+
+pytestmark = pytest.mark.benchmark
+
+CHECKSUM = "0" * 64
+
+
+@pytest.mark.parametrize("model", ["UML.gaphor", "RAAML.gaphor"])
+def test_load_snapshot(element_factory, modeling_language, models, model, benchmark):
+    def load_xml():
+        with (models / model).open(encoding="utf-8") as file_obj:
+            storage.load(file_obj, element_factory, modeling_language)
+
+    _, xml_time = benchmark.time(load_xml)
+
+    out = BytesIO()
+    snapshot.save(out, storage.model_state(element_factory), CHECKSUM)
+    data = out.getvalue()
+
+    new_factory = ElementFactory()
+
+    def load_snapshot():
+        for _ in snapshot.load_generator(
+            data, new_factory, modeling_language, CHECKSUM
+        ):
+            pass
+
+    _, snapshot_time = benchmark.time(load_snapshot)
+
+    benchmark.report(
+        f"XML {xml_time:.3f}s, snapshot {snapshot_time:.3f}s ({len(data)} bytes)"
+    )
+
+    assert new_factory.size() == element_factory.size()
@@ -1,11 +1,20 @@
 import pytest
 
 from gaphor.application import Application
+from gaphor.core import event_handler
 from gaphor.core.modeling import Diagram
 from gaphor.diagram.general import Line
 from gaphor.diagram.segment import Segment
-from gaphor.event import SessionShutdown
-from gaphor.storage.recovery import sessions_dir, sha256sum
+from gaphor.event import ModelSaved, SessionShutdown
+from gaphor.storage import recovery, storage
+from gaphor.storage.checksum import sha256sum
+from gaphor.storage.recovery import (
+    HEADER,
+    MAGIC,
+    TRANSACTION,
+    _record,
+    sessions_dir,
+)
 from gaphor.transaction import Transaction
 from gaphor.ui import recover_sessions
 
@@ -101,6 +110,49 @@ def test_no_recovery_for_saved_file(application: Application, test_models, tmp_p
     assert not log_file.exists()
 
 
+def test_recovery_of_changes_made_while_saving(
+    application: Application, test_models, tmp_path, monkeypatch
+):
+    model_file = test_models / "simple-items.gaphor"
+    new_file = tmp_path / "newfile.gaphor"
+    session = application.new_session(filename=model_file)
+    event_manager = session.get_service("event_manager")
+    element_factory = session.get_service("element_factory")
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+        diagram.name = "saved"
+
+    save_file = storage.save_file
+
+    def save_file_while_editing(*args, **kwargs):
+        # The model state is captured, but not written yet
+        with Transaction(event_manager):
+            diagram.name = "changed while saving"
+        save_file(*args, **kwargs)
+
+    saved_events = []
+
+    @event_handler(ModelSaved)
+    def on_model_saved(event):
+        saved_events.append(event)
+
+    event_manager.subscribe(on_model_saved)
+    monkeypatch.setattr(storage, "save_file", save_file_while_editing)
+    session.get_service("file_manager").save(new_file)
+
+    assert saved_events[0].modified
+    assert list(session.get_service("recovery").event_log.read())
+
+    application.shutdown_session(session)
+
+    new_session = application.recover_session(
+        session_id=session.session_id, filename=new_file
+    )
+    new_element_factory = new_session.get_service("element_factory")
+
+    assert new_element_factory.lookup(diagram.id).name == "changed while saving"
+
+
 def test_no_recovey_when_model_changed(application: Application, test_models, tmp_path):
     model_file = tmp_path / "testfile.gaphor"
     model_file.write_text(
@@ -147,17 +199,7 @@ def test_no_recovery_for_properly_closed_session(application: Application, test_
     assert not new_element_factory.lookup(diagram.id)
 
 
-@pytest.mark.parametrize(
-    "errorous_line",
-    [
-        '[("s", "1234", "name", "value")]\n',
-        '[("s", syntax error)]\n',
-        "\n",
-    ],
-)
-def test_broken_recovery_log(
-    application: Application, test_models, caplog, errorous_line
-):
+def test_broken_recovery_log(application: Application, test_models, caplog):
     model_file = test_models / "simple-items.gaphor"
     session = application.new_session(filename=model_file)
     element_factory = session.get_service("element_factory")
@@ -167,8 +209,8 @@ def test_broken_recovery_log(
 
     application.shutdown_session(session)
 
-    with log_file.open("a", encoding="utf-8") as f:
-        f.write(errorous_line)
+    with log_file.open("ab") as f:
+        f.write(_record(TRANSACTION, [("s", "1234", "name", "value")]))
 
     new_session = application.recover_session(
         session_id=session.session_id, filename=model_file
@@ -179,6 +221,92 @@ def test_broken_recovery_log(
     assert "Could not recover model changes" in caplog.text
 
 
+@pytest.mark.parametrize("garbage", [b"\x01syntax error", b"\n", b"\x01\xff"])
+def test_recovery_log_with_incomplete_record(
+    application: Application, test_models, caplog, garbage
+):
+    model_file = test_models / "simple-items.gaphor"
+    session = application.new_session(filename=model_file)
+    element_factory = session.get_service("element_factory")
+    log_file = session.get_service("recovery").event_log.log_file
+    with Transaction(session.get_service("event_manager")):
+        diagram = element_factory.create(Diagram)
+
+    application.shutdown_session(session)
+
+    with log_file.open("ab") as f:
+        f.write(garbage)
+
+    new_session = application.recover_session(
+        session_id=session.session_id, filename=model_file
+    )
+    new_element_factory = new_session.get_service("element_factory")
+
+    assert new_element_factory.lookup(diagram.id)
+    assert "is incomplete" in caplog.text
+
+
+def test_recovery_log_with_incomplete_record_accepts_new_transactions(
+    application: Application, test_models
+):
+    model_file = test_models / "simple-items.gaphor"
+    session = application.new_session(filename=model_file)
+    element_factory = session.get_service("element_factory")
+    log_file = session.get_service("recovery").event_log.log_file
+    with Transaction(session.get_service("event_manager")):
+        diagram = element_factory.create(Diagram)
+
+    application.shutdown_session(session)
+
+    with log_file.open("ab") as f:
+        f.write(b"\x01syntax error")
+
+    new_session = application.recover_session(
+        session_id=session.session_id, filename=model_file
+    )
+    new_element_factory = new_session.get_service("element_factory")
+    with Transaction(new_session.get_service("event_manager")):
+        new_diagram = new_element_factory.create(Diagram)
+
+    application.shutdown_session(new_session)
+
+    last_session = application.recover_session(
+        session_id=session.session_id, filename=model_file
+    )
+    last_element_factory = last_session.get_service("element_factory")
+
+    assert last_element_factory.lookup(diagram.id)
+    assert last_element_factory.lookup(new_diagram.id)
+
+
+def test_recovery_from_checkpoint(application: Application, test_models, monkeypatch):
+    monkeypatch.setattr(recovery, "CHECKPOINT_INTERVAL", 2)
+    model_file = test_models / "simple-items.gaphor"
+    session = application.new_session(filename=model_file)
+    event_manager = session.get_service("event_manager")
+    element_factory = session.get_service("element_factory")
+    event_log = session.get_service("recovery").event_log
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+    with Transaction(event_manager):
+        diagram.name = "checkpoint"
+    with Transaction(event_manager):
+        diagram.name = "tail"
+
+    assert event_log.transactions_since_checkpoint == 1
+    size = element_factory.size()
+
+    application.shutdown_session(session)
+
+    new_session = application.recover_session(
+        session_id=session.session_id, filename=model_file
+    )
+    new_element_factory = new_session.get_service("element_factory")
+
+    assert new_element_factory.lookup(diagram.id).name == "tail"
+    assert new_element_factory.size() == size
+
+
 @pytest.mark.parametrize("template", [True, False])
 def test_recover_from_session_files(application: Application, test_models, template):
     session_id = "1234"
@@ -201,6 +329,42 @@ def test_recover_from_session_files(application: Application, test_models, templ
     assert element_factory.lookup(class_id)
 
 
+def test_checkpoint_is_written_when_idle(
+    application: Application, test_models, monkeypatch
+):
+    idle_callbacks = []
+
+    def idle_add(callback, priority):
+        idle_callbacks.append(callback)
+        return len(idle_callbacks)
+
+    monkeypatch.setattr(recovery, "CHECKPOINT_INTERVAL", 1)
+    monkeypatch.setattr(recovery.GLib, "main_depth", lambda: 1)
+    monkeypatch.setattr(recovery.GLib, "idle_add", idle_add)
+    model_file = test_models / "simple-items.gaphor"
+    session = application.new_session(filename=model_file)
+    event_manager = session.get_service("event_manager")
+    element_factory = session.get_service("element_factory")
+    event_log = session.get_service("recovery").event_log
+    with Transaction(event_manager):
+        diagram = element_factory.create(Diagram)
+
+    assert event_log.transactions_since_checkpoint == 1
+
+    # No checkpoint is written while a transaction is in progress
+    tx = Transaction(event_manager)
+    diagram.name = "checkpoint"
+    idle_callbacks.pop(0)()
+
+    assert event_log.transactions_since_checkpoint == 1
+
+    tx.commit()
+    idle_callbacks.pop(0)()
+
+    assert event_log.transactions_since_checkpoint == 0
+    assert not idle_callbacks
+
+
 def test_recover_with_invalid_filename(application: Application):
     session_id = "1234"
     class_id = "9876"
@@ -266,17 +430,19 @@ def test_recover_with_unparseable_header(application: Application, test_models,
             "template": True,
         },
         [("c", "Class", class_id, None)],
-        raw_prefix="invalid",
+        raw_prefix=b"invalid",
     )
     recover_sessions(application)
 
     assert not application.sessions
 
 
-def create_recovery_file(session_id, *lines, raw_prefix=""):
-    with (sessions_dir() / f"{session_id}.recovery").open("w", encoding="utf-8") as f:
+def create_recovery_file(session_id, header, *transactions, raw_prefix=b""):
+    with (sessions_dir() / f"{session_id}.recovery").open("wb") as f:
         f.write(raw_prefix)
-        f.writelines(f"{repr(stmt)}\n" for stmt in lines)
+        f.write(MAGIC)
+        f.write(_record(HEADER, header))
+        f.writelines(_record(TRANSACTION, t) for t in transactions)
 
 
 def test_recovery_with_unlinked_item(application: Application, test_models):